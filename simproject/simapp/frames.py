@@ -0,0 +1,164 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from django.db.models import Q
+
+from .models import DataModelOutput
+from .scripts.recording import RecordingPolicy
+from .snapshots import SNAPSHOT_DTYPE, apply_delta
+
+# The number of decoded frames kept in memory (a 1500 x 800 field takes 4.8 MB per frame)
+FRAME_CACHE_SIZE = 16
+
+
+class FrameCache:
+    """
+    A thread-safe least recently used cache of decoded frames.
+
+    Attributes
+    ----------
+    size : int
+        The number of frames kept.
+
+    Methods
+    -------
+    get(key)
+        Gets a frame (None if it is not cached).
+    put(key, frame)
+        Adds a frame and drops the least recently used one if the cache is full.
+    clear()
+        Drops all frames.
+    """
+
+    def __init__(self, size=FRAME_CACHE_SIZE):
+        self.size = size
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+            return frame
+
+    def put(self, key, frame):
+        with self._lock:
+            self._frames[key] = frame
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.size:
+                self._frames.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+frame_cache = FrameCache()
+
+
+def recorded_frames(iteration_id):
+    """
+    Get the steps of an iteration that recorded their maps.
+
+    Parameters
+    ----------
+    iteration_id : int
+        The id of the SimulationIteration.
+
+    Returns
+    -------
+    list
+        A dict with the "step" and "date" of every recorded step, ordered by step.
+    """
+    return list(
+        DataModelOutput.objects.filter(iteration_id=iteration_id)
+        .filter(Q(map_data__isnull=False) | Q(map__isnull=False))
+        .order_by('step', 'date')
+        .values('step', 'date')
+    )
+
+
+def get_frame(iteration_id, step, layer='map'):
+    """
+    Get the decoded map of one step.
+
+    A delta step is applied to the cached frame of the recorded step before it
+    if there is one (as while scrubbing through the steps), otherwise it is
+    replayed from its keyframe.
+
+    Parameters
+    ----------
+    iteration_id : int
+        The id of the SimulationIteration.
+    step : int
+        The index of the step.
+    layer : str
+        "map" (crops) or "weed".
+
+    Returns
+    -------
+    np.ndarray
+        The read-only map in ``SNAPSHOT_DTYPE`` (None if the step has no map).
+    """
+    key = (iteration_id, step, layer)
+    frame = frame_cache.get(key)
+    if frame is not None:
+        return frame
+
+    snapshot_field, legacy_field = DataModelOutput.MAPS[layer]
+    output = (
+        DataModelOutput.objects.filter(iteration_id=iteration_id, step=step)
+        .only('iteration_id', 'step', 'keyframe', snapshot_field, legacy_field)
+        .first()
+    )
+    if output is None:
+        return None
+    snapshot = getattr(output, snapshot_field)
+    frame = None
+    if snapshot is not None and not output.keyframe:
+        previous_step = (
+            DataModelOutput.objects.filter(
+                iteration_id=iteration_id, step__lt=step, **{f'{snapshot_field}__isnull': False}
+            )
+            .order_by('-step')
+            .values_list('step', flat=True)
+            .first()
+        )
+        previous = frame_cache.get((iteration_id, previous_step, layer))
+        if previous is not None:
+            frame = apply_delta(previous, snapshot)
+    if frame is None:
+        frame = output._decode(layer)
+        if frame is None:
+            return None
+    frame = np.asarray(frame, dtype=SNAPSHOT_DTYPE)
+    # The cached frames are shared between requests
+    frame.setflags(write=False)
+    frame_cache.put(key, frame)
+    return frame
+
+
+def resize_frame(frame, max_size=None, pooling='mean'):
+    """
+    Pool a frame so that neither side is larger than ``max_size`` cells.
+
+    Parameters
+    ----------
+    frame : np.ndarray
+        The map.
+    max_size : int, optional
+        The largest number of cells per side (the frame is kept as it is if None).
+    pooling : str
+        How the cells of a block are pooled, "mean" or "max".
+
+    Returns
+    -------
+    np.ndarray
+        The pooled map.
+    """
+    if not max_size or max(frame.shape) <= max_size:
+        return frame
+    block = -(-max(frame.shape) // max_size)
+    return RecordingPolicy(downsample=block, pooling=pooling).downsample_map(frame).astype(SNAPSHOT_DTYPE)
@@ -0,0 +1,117 @@
+from django.core.management.base import BaseCommand
+
+from simapp.models import Plant
+from simapp.scripts import benchmarks
+from simapp.scripts.add_initial_data_to_db import add_initial_plant_data_to_db
+
+
+class Command(BaseCommand):
+    help = "Run performance benchmarks of the simulation engine."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=["grow", "weeds", "masks", "scaling", "boundary", "strips", "snapshots", "temporal", "writer", "streaming", "fields"], help="The benchmark to run.")
+        parser.add_argument("--plants", type=int, default=1000, help="Number of plants in the strip.")
+        parser.add_argument("--weeds", type=int, default=2000, help="Number of weeds in the field.")
+        parser.add_argument("--steps", type=int, default=3, help="Number of timed steps.")
+        parser.add_argument("--strips", type=int, default=4, help="Number of strips of the field.")
+        parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: one per strip).")
+
+    def handle(self, *args, **options):
+        if Plant.objects.count() == 0:
+            add_initial_plant_data_to_db()
+
+        if options["name"] == "grow":
+            result = benchmarks.benchmark_grow(options["plants"], options["steps"])
+            self.stdout.write(f"Plants: {result['plants']}")
+            self.stdout.write(f"Per-object step: {result['per_object_step'] * 1000:.1f} ms")
+            self.stdout.write(f"Batched step:    {result['batched_step'] * 1000:.1f} ms")
+            self.stdout.write(f"Speedup: {result['speedup']:.1f}x, identical output: {result['identical']}")
+
+        elif options["name"] == "weeds":
+            result = benchmarks.benchmark_weeds(options["plants"], options["weeds"], options["steps"])
+            self.stdout.write(f"Plants: {result['plants']}, weeds: {result['weeds']}")
+            self.stdout.write(f"Crops only:        {result['crops_only_step'] * 1000:.1f} ms")
+            self.stdout.write(f"Per-object weeds:  {result['per_object_step'] * 1000:.1f} ms")
+            self.stdout.write(f"Batched weeds:     {result['batched_step'] * 1000:.1f} ms")
+            self.stdout.write(f"Identical output: {result['identical']}")
+
+        elif options["name"] == "masks":
+            result = benchmarks.benchmark_masks(options["plants"])
+            self.stdout.write(f"Plants: {result['plants']}")
+            for name in ("uncached", "cached"):
+                self.stdout.write(
+                    f"{name.capitalize():9} {result[name + '_step'] * 1000:.2f} ms, "
+                    f"{result[name + '_bytes'] / 1024:.0f} KiB allocated per step"
+                )
+
+        elif options["name"] == "scaling":
+            self.stdout.write("Field (cm)  Plants  Full field per crop / step  Windowed per crop / step")
+            for result in benchmarks.benchmark_field_scaling():
+                self.stdout.write(
+                    f"{result['field_size']:>10}  {result['plants']:>6}  "
+                    f"{result['full_field_crop'] * 1e6:>10.1f} us / {result['full_field_step']:>8.3f} s  "
+                    f"{result['windowed_crop'] * 1e6:>8.1f} us / {result['windowed_step']:>6.3f} s"
+                )
+
+        elif options["name"] == "boundary":
+            result = benchmarks.benchmark_boundary(options["plants"])
+            self.stdout.write(f"Plants: {result['plants']}")
+            self.stdout.write(f"Convolve per crop: {result['convolve_step'] * 1000:.1f} ms")
+            self.stdout.write(f"Incremental rings: {result['incremental_step'] * 1000:.1f} ms")
+            self.stdout.write(f"Full rebuild:      {result['rebuild_step'] * 1000:.1f} ms")
+            self.stdout.write(f"Incremental layer matches rebuild: {result['consistent']}")
+
+        elif options["name"] == "strips":
+            result = benchmarks.benchmark_strips(options["strips"], options["plants"], options["steps"], options["workers"])
+            self.stdout.write(f"Strips: {result['strips']}, plants: {result['plants']}, workers: {result['workers']}")
+            self.stdout.write(f"Worker startup:  {result['startup'] * 1000:.1f} ms")
+            self.stdout.write(f"Serial step:     {result['serial_step'] * 1000:.1f} ms")
+            self.stdout.write(f"Parallel step:   {result['parallel_step'] * 1000:.1f} ms")
+            self.stdout.write(f"Speedup: {result['speedup']:.1f}x, identical output: {result['identical']}")
+
+        elif options["name"] == "snapshots":
+            result = benchmarks.benchmark_snapshots(steps=options["steps"])
+            self.stdout.write(f"Field: {result['shape'][0]} x {result['shape'][1]}")
+            for name in ("json", "binary"):
+                self.stdout.write(
+                    f"{name.capitalize():7} write {result[name + '_write'] * 1000:7.1f} ms, "
+                    f"read {result[name + '_read'] * 1000:7.1f} ms, "
+                    f"{result[name + '_bytes'] / 1024:8.0f} KiB per output"
+                )
+
+        elif options["name"] == "temporal":
+            result = benchmarks.benchmark_temporal(options["plants"])
+            self.stdout.write(f"Steps: {result['steps']}")
+            for name in ("full", "delta"):
+                self.stdout.write(
+                    f"{name.capitalize():6} {result[name + '_bytes'] / 1024:8.0f} KiB, "
+                    f"encode {result[name + '_encode'] * 1000:6.2f} ms per step, "
+                    f"random access {result[name + '_access'] * 1000:6.2f} ms"
+                )
+
+        elif options["name"] == "writer":
+            result = benchmarks.benchmark_writer()
+            for name in ("sync", "writer"):
+                self.stdout.write(
+                    f"{name.capitalize():6} {result[name + '_step'] * 1000:6.2f} ms per step in the loop, "
+                    f"{result[name + '_total'] * 1000:7.1f} ms total"
+                )
+            self.stdout.write(f"Copying the maps for the writer: {result['copy_step'] * 1000:.2f} ms per step")
+
+        elif options["name"] == "streaming":
+            result = benchmarks.benchmark_streaming()
+            self.stdout.write(f"Steps: {result['steps']}, field: {result['shape'][0]} x {result['shape'][1]}")
+            for name in ("per_iteration", "per_output"):
+                self.stdout.write(
+                    f"{name.replace('_', ' ').capitalize():14} first byte {result[name]['first_byte'] * 1000:8.1f} ms, "
+                    f"total {result[name]['total']:6.2f} s, "
+                    f"peak memory {result[name]['peak_bytes'] / 2**20:7.1f} MiB"
+                )
+
+        elif options["name"] == "fields":
+            result = benchmarks.benchmark_fields()
+            self.stdout.write(f"Iterations: {result['iterations']}, steps: {result['steps']}")
+            for name, label in (("all", "All values"), ("lines", "Yield, growth")):
+                self.stdout.write(
+                    f"{label:14} {result[name + '_time'] * 1000:9.1f} ms, {result[name + '_bytes'] / 1024:9.0f} KiB"
+                )
@@ -1,8 +1,8 @@
 import os
 import csv
 from django.conf import settings
-from django.db.models import Avg
-from simapp.models import DataModelInput, DataModelOutput
+from simapp.models import DataModelInput
+from simapp.summaries import get_summaries
 
 def export_simulation_comparison_data_to_csv():
     # Set the directory to save CSV files
@@ -42,31 +42,27 @@ def export_simulation_comparison_data_to_csv():
                 return value
 
             # Process each iteration and export the data
-            iterations = simulation.iterations.all()
-            for iteration in iterations:
-                last_output = DataModelOutput.objects.filter(iteration=iteration).last()
-                mean_growth = DataModelOutput.objects.filter(iteration=iteration).aggregate(Avg('growth'))['growth__avg']
-                area = last_output.map[0].__len__() * last_output.map.__len__()
-                param_value = iteration.param_value
-
+            # The metrics are read from the summaries the comparison plot uses
+            iterations = list(simulation.iterations.all())
+            for iteration, summary in zip(iterations, get_summaries(iterations)):
                 # Prepare row with formatted values
                 row = {
-                    "param_value": format_decimal(param_value),
-                    "profit_per_plant": format_decimal(last_output.profit / last_output.num_plants if last_output.num_plants else None),
-                    "profit_per_area": format_decimal(last_output.profit / area * 10000 if area else None),
-                    "yield_per_plant": format_decimal(last_output.yield_value / last_output.num_plants if last_output.num_plants else None),
-                    "growth_per_plant": format_decimal(mean_growth / last_output.num_plants if last_output.num_plants else None),
-                    "yield_per_area": format_decimal(last_output.yield_value / area * 10000 if area else None),
-                    "growth_per_area": format_decimal(mean_growth / area * 10000 if area else None),
-                    "number_of_plants": last_output.num_plants,
-                    "mean_growth": format_decimal(mean_growth),
-                    "yield": format_decimal(last_output.yield_value),
-                    "profit": format_decimal(last_output.profit)
+                    "param_value": format_decimal(iteration.param_value),
+                    "profit_per_plant": format_decimal(summary.profit_per_plant),
+                    "profit_per_area": format_decimal(summary.profit_per_area),
+                    "yield_per_plant": format_decimal(summary.yield_per_plant),
+                    "growth_per_plant": format_decimal(summary.growth_per_plant),
+                    "yield_per_area": format_decimal(summary.yield_per_area),
+                    "growth_per_area": format_decimal(summary.growth_per_area),
+                    "number_of_plants": summary.num_plants,
+                    "mean_growth": format_decimal(summary.mean_growth),
+                    "yield": format_decimal(summary.yield_value),
+                    "profit": format_decimal(summary.profit)
                 }
                 
                 writer.writerow(row)
 
-        print(f"Exported {filename} with {iterations.count()} iterations")
+        print(f"Exported {filename} with {len(iterations)} iterations")
 
 # Run the export function
 export_simulation_comparison_data_to_csv()
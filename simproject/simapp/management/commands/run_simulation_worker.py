@@ -0,0 +1,57 @@
+import logging
+import multiprocessing
+
+from django.core.management.base import BaseCommand
+
+from simapp.scripts.add_initial_data_to_db import add_initial_plant_data_to_db, add_initial_weather_data_to_db
+
+
+def configure_logging():
+    # The project disables Django's logging setup; the workers report the jobs they run
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+
+def run_worker_process(poll_interval, burst):
+    # Spawned processes start without Django; the jobs module needs the models
+    import django
+    django.setup()
+    configure_logging()
+    from simapp.scripts.jobs import work
+    work(poll_interval=poll_interval, burst=burst)
+
+
+class Command(BaseCommand):
+    help = "Run the queued simulation jobs in a pool of local worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Number of jobs run at the same time.")
+        parser.add_argument("--poll", type=float, default=1.0, help="Seconds to wait before looking at an empty queue again.")
+        parser.add_argument("--burst", action="store_true", help="Stop when the queue is empty.")
+
+    def handle(self, *args, **options):
+        configure_logging()
+        # The simulations need the plants and the weather; the ones already loaded are skipped (see seed_data)
+        add_initial_plant_data_to_db()
+        add_initial_weather_data_to_db()
+
+        if options["workers"] <= 1:
+            from simapp.scripts.jobs import work
+            work(poll_interval=options["poll"], burst=options["burst"])
+            return
+
+        # The workers are not daemons, so the simulations can start their own worker processes
+        context = multiprocessing.get_context("spawn")
+        processes = [
+            context.Process(target=run_worker_process, args=(options["poll"], options["burst"]))
+            for _ in range(options["workers"])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f"Started {len(processes)} simulation workers.")
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+                process.join()
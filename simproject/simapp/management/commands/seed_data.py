@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from simapp.scripts.add_initial_data_to_db import add_initial_plant_data_to_db, add_weather_data_to_db, WEATHER_FILE
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the plants and the weather the project ships with, and optionally more weather files. "
+        "Records that are already in the database are skipped, so it can be run again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="*", help="More weather CSV files (with date, temperature and rain columns, and optionally the other columns of the shipped file).")
+        parser.add_argument("--site", default="", help="The weather station of the given files (simulations pick it with the weatherSite input).")
+
+    def handle(self, *args, **options):
+        start_time = time.perf_counter()
+        self.stdout.write(f"Plants: {add_initial_plant_data_to_db()} added")
+        for path, site in [(WEATHER_FILE, "")] + [(path, options["site"]) for path in options["files"]]:
+            try:
+                added = add_weather_data_to_db(path, site)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Could not load the weather file {path}: {error}")
+            self.stdout.write(f"Weather {path} ({site or 'default site'}): {added} hours added")
+        self.stdout.write(f"Done in {time.perf_counter() - start_time:.2f} s")
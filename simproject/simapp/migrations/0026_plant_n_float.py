@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+def set_lettuce_growth_curve(apps, schema_editor):
+    # The growth curve is now read from the plant table. Move the seeded
+    # lettuce row to the parameters that were hardcoded for the experiment.
+    Plant = apps.get_model('simapp', 'Plant')
+    Plant.objects.filter(name='Lactuca Sativa L.', k=0.095, b=180).update(
+        H_max=32, k=0.0045, n=1.421, b=9
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0025_datamodeloutput_num_plants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='plant',
+            name='n',
+            field=models.FloatField(),
+        ),
+        migrations.RunPython(set_lettuce_growth_curve, migrations.RunPython.noop),
+    ]
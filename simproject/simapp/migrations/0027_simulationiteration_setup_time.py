@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0026_plant_n_float'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationiteration',
+            name='setup_time',
+            field=models.FloatField(default=0),
+        ),
+    ]
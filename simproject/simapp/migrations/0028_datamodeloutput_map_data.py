@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+from simapp.snapshots import decode_array, encode_array
+
+BATCH_SIZE = 50
+
+
+def _convert(apps, source_filter, convert):
+    # Rows are converted in batches by id, so the table is not written while it is read
+    DataModelOutput = apps.get_model('simapp', 'DataModelOutput')
+    ids = list(DataModelOutput.objects.filter(**source_filter).values_list('id', flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        outputs = list(DataModelOutput.objects.filter(id__in=ids[start:start + BATCH_SIZE]))
+        for output in outputs:
+            convert(output)
+        DataModelOutput.objects.bulk_update(outputs, ['map', 'weed', 'map_data', 'weed_data'])
+
+
+def maps_to_snapshots(apps, schema_editor):
+    def convert(output):
+        output.map_data = None if output.map is None else encode_array(output.map)
+        output.weed_data = None if output.weed is None else encode_array(output.weed)
+        output.map = None
+        output.weed = None
+
+    _convert(apps, {'map_data__isnull': True, 'map__isnull': False}, convert)
+
+
+def snapshots_to_maps(apps, schema_editor):
+    def convert(output):
+        output.map = None if output.map_data is None else decode_array(output.map_data).tolist()
+        output.weed = None if output.weed_data is None else decode_array(output.weed_data).tolist()
+        output.map_data = None
+        output.weed_data = None
+
+    _convert(apps, {'map_data__isnull': False}, convert)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0027_simulationiteration_setup_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datamodeloutput',
+            name='map_data',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='datamodeloutput',
+            name='weed_data',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='datamodeloutput',
+            name='map',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='datamodeloutput',
+            name='weed',
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(maps_to_snapshots, snapshots_to_maps),
+    ]
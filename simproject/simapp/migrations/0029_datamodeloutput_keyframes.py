@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:03
+
+from django.db import migrations, models
+
+
+def number_steps(apps, schema_editor):
+    # Existing outputs are full snapshots; number them in the order the views used
+    DataModelOutput = apps.get_model('simapp', 'DataModelOutput')
+    SimulationIteration = apps.get_model('simapp', 'SimulationIteration')
+    for iteration_id in SimulationIteration.objects.values_list('id', flat=True):
+        outputs = list(DataModelOutput.objects.filter(iteration_id=iteration_id).order_by('date', 'id').only('id'))
+        for step, output in enumerate(outputs):
+            output.step = step
+        DataModelOutput.objects.bulk_update(outputs, ['step'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0028_datamodeloutput_map_data'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datamodeloutput',
+            name='keyframe',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='datamodeloutput',
+            name='step',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='datamodeloutput',
+            index=models.Index(fields=['iteration', 'step'], name='simapp_data_iterati_4e9a87_idx'),
+        ),
+        migrations.RunPython(number_steps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0029_datamodeloutput_keyframes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationiteration',
+            name='field_length',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='simulationiteration',
+            name='field_width',
+            field=models.IntegerField(null=True),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0030_simulationiteration_field_size'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimulationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sim_name', models.CharField(max_length=100)),
+                ('input_data', models.JSONField()),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], default='queued', max_length=10)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(null=True)),
+                ('finished_at', models.DateTimeField(null=True)),
+                ('heartbeat', models.DateTimeField(null=True)),
+                ('iteration', models.IntegerField(default=0)),
+                ('total_iterations', models.IntegerField(default=1)),
+                ('step', models.IntegerField(default=0)),
+                ('total_steps', models.IntegerField(default=0)),
+                ('metrics', models.JSONField(null=True)),
+                ('error', models.TextField(blank=True)),
+                ('input', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='simapp.datamodelinput')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'created_at'], name='simapp_simu_status_c84c4e_idx')],
+            },
+        ),
+    ]
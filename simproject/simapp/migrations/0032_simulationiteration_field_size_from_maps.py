@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:10
+
+import io
+import zlib
+
+import numpy as np
+from django.db import migrations
+from django.db.models import Q
+
+# Enough of a decompressed snapshot to hold the header of its .npy file
+HEADER_BYTES = 4096
+
+
+def snapshot_shape(snapshot):
+    # Only the header of the snapshot is decompressed, the map itself is not decoded
+    header = io.BytesIO(zlib.decompressobj().decompress(bytes(snapshot), HEADER_BYTES))
+    if np.lib.format.read_magic(header) == (1, 0):
+        return np.lib.format.read_array_header_1_0(header)[0]
+    return np.lib.format.read_array_header_2_0(header)[0]
+
+
+def field_size_from_maps(apps, schema_editor):
+    # Iterations recorded before the field size was stored have full resolution
+    # maps; the weed map has the size of the field (the crop map two more columns)
+    DataModelOutput = apps.get_model('simapp', 'DataModelOutput')
+    SimulationIteration = apps.get_model('simapp', 'SimulationIteration')
+    iterations = SimulationIteration.objects.filter(Q(field_length__isnull=True) | Q(field_width__isnull=True))
+    updated = []
+    for iteration in iterations.only('id').iterator(chunk_size=500):
+        outputs = DataModelOutput.objects.filter(iteration_id=iteration.id).order_by('step')
+        # The first keyframe of the iteration, or the first map of the outputs stored as JSON
+        snapshot = outputs.filter(keyframe=True, weed_data__isnull=False).values_list('weed_data', flat=True).first()
+        if snapshot is not None:
+            shape = snapshot_shape(snapshot)
+        else:
+            weed = outputs.filter(weed__isnull=False).values_list('weed', flat=True).first()
+            if weed is None:
+                continue
+            shape = (len(weed), len(weed[0]) if weed else 0)
+        iteration.field_length, iteration.field_width = shape
+        updated.append(iteration)
+    SimulationIteration.objects.bulk_update(updated, ['field_length', 'field_width'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0031_simulationjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(field_size_from_maps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0032_simulationiteration_field_size_from_maps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IterationSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('steps', models.IntegerField(default=0)),
+                ('area', models.IntegerField(null=True)),
+                ('num_plants', models.IntegerField(null=True)),
+                ('yield_value', models.FloatField(null=True)),
+                ('profit', models.FloatField(null=True)),
+                ('water', models.FloatField(null=True)),
+                ('overlap', models.IntegerField(null=True)),
+                ('mean_growth', models.FloatField(null=True)),
+                ('profit_per_plant', models.FloatField(null=True)),
+                ('yield_per_plant', models.FloatField(null=True)),
+                ('growth_per_plant', models.FloatField(null=True)),
+                ('profit_per_area', models.FloatField(null=True)),
+                ('yield_per_area', models.FloatField(null=True)),
+                ('growth_per_area', models.FloatField(null=True)),
+                ('iteration', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='summary', to='simapp.simulationiteration')),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0033_iterationsummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datamodelinput',
+            name='sweepDesign',
+            field=models.CharField(default=None, max_length=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='SweepPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('parameter', models.CharField(max_length=100)),
+                ('value', models.FloatField(null=True)),
+                ('choice', models.CharField(max_length=100, null=True)),
+                ('iteration', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sweep_points', to='simapp.simulationiteration')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['parameter', 'value'], name='simapp_swee_paramet_cc017c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('iteration', 'parameter'), name='unique_sweep_point_parameter')],
+            },
+        ),
+    ]
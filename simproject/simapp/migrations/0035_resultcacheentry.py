@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0034_sweeppoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='simulationiteration',
+            name='cached_from',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='cache_hits', to='simapp.simulationiteration'),
+        ),
+        migrations.CreateModel(
+            name='ResultCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('hits', models.IntegerField(default=0)),
+                ('iteration', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cache_entries', to='simapp.simulationiteration')),
+            ],
+        ),
+    ]
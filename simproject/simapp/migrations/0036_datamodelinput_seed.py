@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0035_resultcacheentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datamodelinput',
+            name='seed',
+            field=models.BigIntegerField(default=None, null=True),
+        ),
+    ]
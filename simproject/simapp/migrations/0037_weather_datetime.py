@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from dateutil import parser
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def parse_dates(apps, schema_editor):
+    # The dates were stored as text, mostly "YYYY-MM-DD HH:MM:SS"; the others are parsed
+    # the way the simulation parsed them, and the ones it skipped (like "NaT") become None
+    Weather = apps.get_model('simapp', 'Weather')
+    records = []
+    for record in Weather.objects.only('id', 'date').iterator(chunk_size=2000):
+        try:
+            time = datetime.strptime(record.date, '%Y-%m-%d %H:%M:%S')
+        except (TypeError, ValueError):
+            try:
+                time = parser.parse(record.date) if record.date not in (None, 'NaT', '') else None
+            except (ValueError, OverflowError):
+                time = None
+        if time is not None and timezone.is_naive(time):
+            time = timezone.make_aware(time)
+        record.time = time
+        records.append(record)
+    Weather.objects.bulk_update(records, ['time'], batch_size=2000)
+
+
+def format_dates(apps, schema_editor):
+    Weather = apps.get_model('simapp', 'Weather')
+    records = []
+    for record in Weather.objects.only('id', 'time').iterator(chunk_size=2000):
+        record.date = 'NaT' if record.time is None else timezone.make_naive(record.time).strftime('%Y-%m-%d %H:%M:%S')
+        records.append(record)
+    Weather.objects.bulk_update(records, ['date'], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0036_datamodelinput_seed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weather',
+            name='time',
+            field=models.DateTimeField(null=True),
+        ),
+        # Nullable while it is converted, so that migrating back can add the column before filling it
+        migrations.AlterField(
+            model_name='weather',
+            name='date',
+            field=models.CharField(max_length=100, null=True),
+        ),
+        migrations.RunPython(parse_dates, format_dates),
+        migrations.RemoveField(
+            model_name='weather',
+            name='date',
+        ),
+        migrations.RenameField(
+            model_name='weather',
+            old_name='time',
+            new_name='date',
+        ),
+        migrations.AlterField(
+            model_name='weather',
+            name='date',
+            field=models.DateTimeField(db_index=True, null=True),
+        ),
+    ]
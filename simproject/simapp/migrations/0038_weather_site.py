@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0037_weather_datetime'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weather',
+            name='site',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='weather',
+            index=models.Index(fields=['site', 'date'], name='simapp_weat_site_db2b6b_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:59
+
+import os
+
+import pandas as pd
+from django.db import migrations, models
+from django.utils import timezone
+
+# The weather the project ships with and the columns of it that were not stored before
+WEATHER_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'data', 'transformed_weather_data.csv')
+COLUMNS = {
+    'Wind': 'wind',
+    'Hum': 'humidity',
+    'Globalstrahlung in J/cm²': 'radiation',
+    'Dampfdruck in hPa': 'vapour_pressure',
+    'Feuchttemperatur in °C': 'wet_bulb_temperature',
+}
+
+
+def fill_columns(apps, schema_editor):
+    # The hours of the shipped weather get the other columns of its file
+    Weather = apps.get_model('simapp', 'Weather')
+    if not os.path.exists(WEATHER_FILE) or not Weather.objects.filter(site='').exists():
+        return
+    data = pd.read_csv(WEATHER_FILE, usecols=['date', *COLUMNS], dtype={'date': 'string'}).rename(columns=COLUMNS)
+    dates = pd.to_datetime(data['date'], format='ISO8601', errors='coerce')
+    dates = dates.dt.tz_localize(timezone.get_current_timezone(), ambiguous='NaT', nonexistent='NaT').dt.tz_convert('UTC')
+    data = data.assign(date=dates).dropna(subset=['date']).drop_duplicates('date')
+    fields = list(COLUMNS.values())
+    values = dict(zip(
+        data['date'].dt.to_pydatetime(),
+        data[fields].astype(object).where(data[fields].notna(), None).itertuples(index=False, name=None),
+    ))
+    records = []
+    for record in Weather.objects.filter(site='', date__isnull=False).only('id', 'date').iterator(chunk_size=2000):
+        row = values.get(record.date)
+        if row is not None:
+            for name, value in zip(fields, row):
+                setattr(record, name, value)
+            records.append(record)
+    Weather.objects.bulk_update(records, fields, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0038_weather_site'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weather',
+            name='humidity',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='weather',
+            name='radiation',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='weather',
+            name='vapour_pressure',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='weather',
+            name='wet_bulb_temperature',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='weather',
+            name='wind',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_columns, migrations.RunPython.noop),
+    ]
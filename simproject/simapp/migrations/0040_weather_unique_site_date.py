@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:01
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicates(apps, schema_editor):
+    # The first record of an hour of a site is kept (the seeding skipped the known hours before too)
+    Weather = apps.get_model('simapp', 'Weather')
+    duplicates = (
+        Weather.objects.filter(date__isnull=False).values('site', 'date')
+        .annotate(count=Count('id'), first=Min('id')).filter(count__gt=1)
+    )
+    for duplicate in list(duplicates):
+        Weather.objects.filter(site=duplicate['site'], date=duplicate['date']).exclude(id=duplicate['first']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0039_weather_columns'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='weather',
+            name='simapp_weat_site_db2b6b_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='weather',
+            constraint=models.UniqueConstraint(fields=('site', 'date'), name='unique_weather_site_date'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simapp', '0040_weather_unique_site_date'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='simulationjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('queued', 'running'))), fields=('sim_name',), name='unique_active_job_sim_name'),
+        ),
+    ]
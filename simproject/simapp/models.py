@@ -1,5 +1,10 @@
 #models.py
+import numpy as np
 from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .snapshots import apply_delta, decode_array, encode_array
 
 
 
@@ -20,7 +25,14 @@ class DataModelInput(models.Model):
     testingValue : FloatField
         The value used for testing the simulation.
     testingKey : CharField
-        The key used for testing the simulation.
+        The key used for testing the simulation (the comma separated
+        parameters of a sweep design).
+    sweepDesign : CharField
+        The design of a multi-dimensional sweep ("grid", "lhs" or "sobol",
+        None for other runs); the values of every iteration are its SweepPoints.
+    seed : BigIntegerField
+        The seed of the random numbers of all iterations (see ``RandomStreams``);
+        running the input again with it gives the same results.
     """
 
     startDate = models.DateField()
@@ -29,7 +41,9 @@ class DataModelInput(models.Model):
     testingMode = models.BooleanField(default=False, null=True)
     testingValue = models.FloatField(default=None, null=True)
     testingKey = models.CharField(max_length=100,default=None, null=True)
+    sweepDesign = models.CharField(max_length=10, default=None, null=True)
     simName = models.CharField(max_length=100)
+    seed = models.BigIntegerField(default=None, null=True)
 
     def set_data(self, data):
         """
@@ -44,16 +58,26 @@ class DataModelInput(models.Model):
         self.stepSize = data.get('stepSize')
         self.rowLength = data.get('rowLength')
         self.testingMode = data.get('testingMode')
-        testing_data = data.get('testingData', {})
-       
-        if testing_data and self.testingMode:
+        self.set_testing_data(data.get('testingData', {}))
+        self.simName = data.get('simName')
+        self.seed = data.get('seed')
+
+    def set_testing_data(self, testing_data):
+        """
+        Set the tested key and value (or the sweep design) from the testing data of the input.
+        """
+        self.sweepDesign = None
+        if testing_data and self.testingMode and 'parameters' in testing_data:
+            self.sweepDesign = testing_data.get('design', 'grid')
+            self.testingKey = ','.join(testing_data['parameters'])[:100]
+            self.testingValue = -99
+        elif testing_data and self.testingMode:
             self.testingKey, self.testingValue = next(iter(testing_data.items()), (None, None))
             if isinstance(self.testingValue,dict):
                 self.testingValue = -99
         else:
             self.testingKey = None
             self.testingValue = None
-        self.simName = data.get('simName')
 
     def get_data(self):
         """
@@ -68,6 +92,7 @@ class DataModelInput(models.Model):
             'startDate': self.startDate,
             'stepSize': self.stepSize,
             'rowLength': self.rowLength,
+            'seed': self.seed,
             'rows': [row.get_data() for row in self.rowdetails_set.all()],
         }
 
@@ -133,11 +158,25 @@ class SimulationIteration(models.Model):
         The index of the current iteration (e.g., 0, 1, 2, etc.).
     param_value : FloatField
         The value of the parameter being changed in this iteration (if applicable).
+    setup_time : FloatField
+        The time (in seconds) spent starting and stopping the workers of the executor,
+        which is not part of the time needed per step.
+    field_length, field_width : IntegerField
+        The size of the simulated field (in cm).
+    cached_from : ForeignKey
+        The iteration whose outputs are the results of this one, if the same
+        simulation was run before (see ``simapp.result_cache``); None if the
+        iteration was simulated.
     """
 
     input = models.ForeignKey(DataModelInput, on_delete=models.CASCADE, related_name='iterations')
     iteration_index = models.IntegerField(default=0)
     param_value = models.FloatField(default=None, null=True)
+    setup_time = models.FloatField(default=0)
+    field_length = models.IntegerField(null=True)
+    field_width = models.IntegerField(null=True)
+    # The outputs of a simulation other iterations link to cannot be deleted
+    cached_from = models.ForeignKey('self', on_delete=models.PROTECT, null=True, related_name='cache_hits')
 
     def set_data(self, data):
         """
@@ -154,6 +193,77 @@ class SimulationIteration(models.Model):
             'param_value': self.param_value,
         }
 
+    @property
+    def area(self):
+        """
+        The area of the simulated field (in cm², None for iterations recorded without it).
+        """
+        if self.field_length is None or self.field_width is None:
+            return None
+        return self.field_length * self.field_width
+
+    @property
+    def result_id(self):
+        """
+        The id of the iteration the outputs of this iteration are stored with.
+        """
+        return self.cached_from_id or self.id
+
+    def get_parameters(self):
+        """
+        Get the parameter values of the iteration in a sweep design (empty for other runs).
+        """
+        return {point.parameter: point.get_value() for point in self.sweep_points.all()}
+
+
+class SweepPoint(models.Model):
+    """
+    Model to store the value of one parameter of an iteration in a sweep design.
+
+    Together, the SweepPoints of an iteration are its point of the design, so
+    the iterations can be filtered and grouped by any of the parameters.
+
+    Attributes
+    ----------
+    iteration : ForeignKey
+        The SimulationIteration.
+    parameter : CharField
+        The input key of the parameter (e.g. "stripWidth").
+    value : FloatField
+        The value of a numeric parameter (None for a named one).
+    choice : CharField
+        The value of a named parameter, like a planting type (None for a numeric one).
+    """
+
+    iteration = models.ForeignKey(SimulationIteration, on_delete=models.CASCADE, related_name='sweep_points')
+    parameter = models.CharField(max_length=100)
+    value = models.FloatField(null=True)
+    choice = models.CharField(max_length=100, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['iteration', 'parameter'], name='unique_sweep_point_parameter'),
+        ]
+        indexes = [
+            models.Index(fields=['parameter', 'value']),
+        ]
+
+    def set_data(self, parameter, value):
+        """
+        Set the parameter and its value, a number or a name.
+        """
+        self.parameter = parameter
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            self.value, self.choice = value, None
+        else:
+            self.value, self.choice = None, str(value)
+
+    def get_value(self):
+        if self.choice is not None:
+            return self.choice
+        # Whole numbers are stored as floats, but are inputs like a row spacing of 20
+        return int(self.value) if self.value is not None and self.value.is_integer() else self.value
+
 
 class DataModelOutput(models.Model):
     """
@@ -172,7 +282,19 @@ class DataModelOutput(models.Model):
     overlap : IntegerField
         The overlap count of crops during the iteration.
     map : JSONField
-        A JSON representation of the crop map during the iteration.
+        A JSON representation of the crop map during the iteration. Only set
+        for outputs recorded before the binary snapshots.
+    weed : JSONField
+        A JSON representation of the weed map (like ``map``).
+    map_data : BinaryField
+        A compressed float32 snapshot of the crop map (see ``simapp.snapshots``).
+    weed_data : BinaryField
+        A compressed float32 snapshot of the weed map.
+    step : IntegerField
+        The index of the recorded step in the iteration.
+    keyframe : BooleanField
+        Whether the snapshots hold the full maps. Otherwise they are deltas
+        to the maps of the step before (see ``snapshots.DeltaEncoder``).
     """
 
     iteration = models.ForeignKey(SimulationIteration, on_delete=models.CASCADE, related_name='outputs')
@@ -181,13 +303,21 @@ class DataModelOutput(models.Model):
     growth = models.FloatField()
     water = models.FloatField()
     overlap = models.IntegerField()
-    map = models.JSONField()
-    weed = models.JSONField()
+    map = models.JSONField(null=True)
+    weed = models.JSONField(null=True)
+    map_data = models.BinaryField(null=True)
+    weed_data = models.BinaryField(null=True)
+    step = models.IntegerField(default=0)
+    keyframe = models.BooleanField(default=True)
     time_needed = models.FloatField()
     profit = models.FloatField()
     rain = models.FloatField()
     temperature = models.FloatField()
     num_plants = models.IntegerField()
+
+    class Meta:
+        indexes = [models.Index(fields=['iteration', 'step'])]
+
     def set_data(self, data):
         """
         Set the output data for this iteration.
@@ -197,8 +327,8 @@ class DataModelOutput(models.Model):
         self.growth = data.get('growth')
         self.water = data.get('water')
         self.overlap = data.get('overlap')
-        self.map = data.get('map')
-        self.weed = data.get('weed')
+        self.set_map(data.get('map'))
+        self.set_weed(data.get('weed'))
         self.time_needed = data.get('time_needed')
         self.profit = data.get('profit')
         self.rain = data.get('rain')
@@ -218,8 +348,8 @@ class DataModelOutput(models.Model):
             'growth': self.growth,
             'water': self.water,
             'overlap': self.overlap,
-            'map': self.map,
-            'weed': self.weed,
+            'map': self.get_map(),
+            'weed': self.get_weed(),
             'time_needed': self.time_needed,
             'profit': self.profit,
             'rain': self.rain,
@@ -227,6 +357,356 @@ class DataModelOutput(models.Model):
             'num_plants': self.num_plants,
         }
 
+    # The scalar values of a step by the name they are sent with, and their fields
+    SCALARS = {
+        'date': 'date',
+        'yield': 'yield_value',
+        'growth': 'growth',
+        'water': 'water',
+        'overlap': 'overlap',
+        'time_needed': 'time_needed',
+        'profit': 'profit',
+        'rain': 'rain',
+        'temperature': 'temperature',
+        'num_plants': 'num_plants',
+    }
+    # The maps stored as snapshots, with their snapshot and legacy JSON fields
+    MAPS = {'map': ('map_data', 'map'), 'weed': ('weed_data', 'weed')}
+
+    def _decode(self, name, previous=None):
+        snapshot_field, legacy_field = self.MAPS[name]
+        snapshot = getattr(self, snapshot_field)
+        if snapshot is None:
+            legacy = getattr(self, legacy_field)
+            return None if legacy is None else np.asarray(legacy, dtype=float)
+        if self.keyframe:
+            return decode_array(snapshot)
+        if previous is None:
+            return self._replay(name)
+        return apply_delta(previous, snapshot)
+
+    def _replay(self, name):
+        """
+        Decode a map of a delta step by replaying the steps from the keyframe before it.
+        """
+        snapshot_field = self.MAPS[name][0]
+        # Steps recorded without maps are skipped, the deltas continue from the last map
+        outputs = DataModelOutput.objects.filter(
+            iteration_id=self.iteration_id, step__lte=self.step, **{f'{snapshot_field}__isnull': False}
+        )
+        keyframe_step = outputs.filter(keyframe=True).aggregate(models.Max('step'))['step__max']
+        array = None
+        for output in outputs.filter(step__gte=keyframe_step).order_by('step').only('step', 'keyframe', snapshot_field):
+            array = output._decode(name, array)
+        return array
+
+    @staticmethod
+    def iter_maps(outputs, names=('map', 'weed')):
+        """
+        Decode the maps of consecutive outputs of an iteration.
+
+        The deltas are applied to the maps of the output before, so every step
+        is decoded once. Only the first output replays from its keyframe if it
+        is a delta.
+
+        Parameters
+        ----------
+        outputs : iterable
+            The outputs, ordered by step.
+        names : tuple
+            The names of the maps to decode ("map", "weed").
+
+        Yields
+        ------
+        tuple
+            The output and a dict with the array of every map (None for a
+            step recorded without maps).
+        """
+        previous = {}
+        for output in outputs:
+            maps = {name: output._decode(name, previous.get(name)) for name in names}
+            previous.update((name, array) for name, array in maps.items() if array is not None)
+            yield output, maps
+
+    def get_map(self):
+        """
+        Get the crop map as a NumPy array (None if no map was recorded).
+        """
+        return self._decode('map')
+
+    def get_weed(self):
+        """
+        Get the weed map as a NumPy array (None if no map was recorded).
+        """
+        return self._decode('weed')
+
+    def set_map(self, array):
+        """
+        Store the crop map as a full binary snapshot.
+        """
+        self.map = None
+        self.keyframe = True
+        self.map_data = None if array is None else encode_array(array)
+
+    def set_weed(self, array):
+        """
+        Store the weed map as a full binary snapshot.
+        """
+        self.weed = None
+        self.keyframe = True
+        self.weed_data = None if array is None else encode_array(array)
+
+    def set_snapshots(self, step, keyframe, snapshots):
+        """
+        Store the maps encoded by a ``snapshots.DeltaEncoder``.
+
+        Parameters
+        ----------
+        step : int
+            The index of the step.
+        keyframe : bool
+            Whether the snapshots are full maps or deltas.
+        snapshots : dict
+            The encoded "map" and "weed".
+        """
+        self.step = step
+        self.keyframe = keyframe
+        self.map = None
+        self.weed = None
+        self.map_data = snapshots.get('map')
+        self.weed_data = snapshots.get('weed')
+
+
+class IterationSummary(models.Model):
+    """
+    Model to cache the summary metrics of an iteration, as shown in the comparison plot.
+
+    The metrics are computed once from the outputs and the stored field size
+    of the iteration (see ``simapp.summaries``).
+
+    Attributes
+    ----------
+    iteration : OneToOneField
+        The summarized SimulationIteration.
+    steps : IntegerField
+        The number of outputs the summary was computed from.
+    area : IntegerField
+        The area of the field (in cm², None if it is unknown).
+    num_plants : IntegerField
+        The number of plants at the last step.
+    yield_value, profit, water : FloatField
+        The yield, profit and water at the last step.
+    overlap : IntegerField
+        The overlap at the last step.
+    mean_growth : FloatField
+        The growth rate averaged over all steps.
+    profit_per_plant, yield_per_plant, growth_per_plant : FloatField
+        The values per plant (None without plants).
+    profit_per_area, yield_per_area, growth_per_area : FloatField
+        The values per m² (None without an area).
+    """
+
+    iteration = models.OneToOneField(SimulationIteration, on_delete=models.CASCADE, related_name='summary')
+    steps = models.IntegerField(default=0)
+    area = models.IntegerField(null=True)
+    num_plants = models.IntegerField(null=True)
+    yield_value = models.FloatField(null=True)
+    profit = models.FloatField(null=True)
+    water = models.FloatField(null=True)
+    overlap = models.IntegerField(null=True)
+    mean_growth = models.FloatField(null=True)
+    profit_per_plant = models.FloatField(null=True)
+    yield_per_plant = models.FloatField(null=True)
+    growth_per_plant = models.FloatField(null=True)
+    profit_per_area = models.FloatField(null=True)
+    yield_per_area = models.FloatField(null=True)
+    growth_per_area = models.FloatField(null=True)
+
+    def set_data(self, steps, area, last_output, mean_growth):
+        """
+        Compute the metrics from the last output and the mean growth of the iteration.
+
+        Parameters
+        ----------
+        steps : int
+            The number of outputs of the iteration.
+        area : int
+            The area of the field (in cm², None if it is unknown).
+        last_output : dict
+            The "num_plants", "yield_value", "profit", "water" and "overlap"
+            of the last output (None for an iteration without outputs).
+        mean_growth : float
+            The mean growth rate of all outputs.
+        """
+        last_output = last_output or {}
+        self.steps = steps
+        self.area = area
+        self.num_plants = last_output.get('num_plants')
+        self.yield_value = last_output.get('yield_value')
+        self.profit = last_output.get('profit')
+        self.water = last_output.get('water')
+        self.overlap = last_output.get('overlap')
+        self.mean_growth = mean_growth
+
+        def per_plant(value):
+            return value / self.num_plants if value is not None and self.num_plants else None
+
+        def per_area(value):
+            # The area is stored in cm², the metrics are per m²
+            return value / area * 10000 if value is not None and area else None
+
+        self.profit_per_plant = per_plant(self.profit)
+        self.yield_per_plant = per_plant(self.yield_value)
+        self.growth_per_plant = per_plant(mean_growth)
+        self.profit_per_area = per_area(self.profit)
+        self.yield_per_area = per_area(self.yield_value)
+        self.growth_per_area = per_area(mean_growth)
+
+    def get_data(self):
+        """
+        Get the metrics by the names of the comparison plot.
+        """
+        return {
+            'profit_per_plant': self.profit_per_plant,
+            'profit_per_area': self.profit_per_area,
+            'yield_per_plant': self.yield_per_plant,
+            'growth_per_plant': self.growth_per_plant,
+            'yield_per_area': self.yield_per_area,
+            'growth_per_area': self.growth_per_area,
+            'number_of_plants': self.num_plants,
+            'growth': self.mean_growth,
+            'yield': self.yield_value,
+            'profit': self.profit,
+            'water': self.water,
+            'overlap': self.overlap,
+        }
+
+
+class ResultCacheEntry(models.Model):
+    """
+    Model to find the results of a simulation by a hash of everything they depend on.
+
+    An entry points to the simulated iteration whose outputs are the results;
+    evicting the entry keeps the outputs (see ``simapp.result_cache``).
+
+    Attributes
+    ----------
+    key : CharField
+        The hash of the normalized input, the plant parameters, the weather,
+        the seed and the engine version.
+    iteration : ForeignKey
+        The simulated SimulationIteration.
+    created_at, last_used_at : DateTimeField
+        When the results were stored and last found.
+    hits : IntegerField
+        How often the results were found.
+    """
+
+    key = models.CharField(max_length=64, unique=True)
+    iteration = models.ForeignKey(SimulationIteration, on_delete=models.CASCADE, related_name='cache_entries')
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    hits = models.IntegerField(default=0)
+
+
+class SimulationJob(models.Model):
+    """
+    Model to queue a simulation run for the background workers.
+
+    The web tier only creates the job; a worker (``manage.py run_simulation_worker``)
+    claims it, runs the simulation and keeps the progress fields up to date.
+
+    Attributes
+    ----------
+    sim_name : CharField
+        The name of the simulation.
+    input_data : JSONField
+        The input data the simulation is run with.
+    status : CharField
+        "queued", "running", "finished" or "failed".
+    input : ForeignKey
+        The DataModelInput of the run, once the worker has saved it.
+    worker : CharField
+        The name of the worker that claimed the job.
+    created_at, started_at, finished_at : DateTimeField
+        When the job was queued, claimed and done.
+    heartbeat : DateTimeField
+        The last time the worker reported progress.
+    iteration, total_iterations : IntegerField
+        The number of finished iterations and the number of iterations of the run.
+    step, total_steps : IntegerField
+        The number of finished steps and the number of steps of the current iteration.
+    metrics : JSONField
+        The scalar values of the last reported step.
+    error : TextField
+        The traceback of a failed job.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FINISHED, 'Finished'),
+        (FAILED, 'Failed'),
+    ]
+    ACTIVE = (QUEUED, RUNNING)
+
+    sim_name = models.CharField(max_length=100)
+    input_data = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    input = models.ForeignKey(DataModelInput, on_delete=models.SET_NULL, null=True, related_name='jobs')
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+    heartbeat = models.DateTimeField(null=True)
+    iteration = models.IntegerField(default=0)
+    total_iterations = models.IntegerField(default=1)
+    step = models.IntegerField(default=0)
+    total_steps = models.IntegerField(default=0)
+    metrics = models.JSONField(null=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+        # Only one queued or running job per name, also when two requests enqueue it at once (see jobs.enqueue)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['sim_name'], condition=models.Q(status__in=('queued', 'running')), name='unique_active_job_sim_name',
+            ),
+        ]
+
+    @property
+    def percent(self):
+        """
+        The share of the run that is done (in %).
+        """
+        if self.status == self.FINISHED:
+            return 100.0
+        done = self.iteration + (self.step / self.total_steps if self.total_steps else 0)
+        return round(100 * min(done / max(self.total_iterations, 1), 1), 1)
+
+    def get_progress(self):
+        """
+        Get the progress of the job as sent by the progress endpoint.
+        """
+        return {
+            'job': self.id,
+            'name': self.sim_name,
+            'status': self.status,
+            'iteration': self.iteration,
+            'total_iterations': self.total_iterations,
+            'step': self.step,
+            'total_steps': self.total_steps,
+            'percent': self.percent,
+            'metrics': self.metrics,
+            'error': self.error or None,
+        }
+
+
 class Plant(models.Model):
     """
     Model to store parameters for each type of plant used in the simulation.
@@ -241,8 +721,10 @@ class Plant(models.Model):
         Maximum height of the plant (in cm).
     k : FloatField
         Growth rate constant (specific to plant type).
-    n : IntegerField
+    n : FloatField
         Shape factor (specific to plant growth model).
+    b : FloatField
+        Scaling factor affecting the steepness of the growth curve.
     max_moves : IntegerField
         Maximum number of moves for the plant (e.g., in a simulation context).
     Yield : FloatField
@@ -258,7 +740,7 @@ class Plant(models.Model):
     W_max = models.FloatField()  # Maximum width
     H_max = models.FloatField()  # Maximum height
     k = models.FloatField()  # Growth rate constant
-    n = models.IntegerField()  # Shape factor
+    n = models.FloatField()  # Shape factor
     b = models.FloatField()  # Shape factor
     max_moves = models.IntegerField()  # Maximum moves
     Yield = models.FloatField()  # Yield per plant
@@ -272,10 +754,45 @@ class Plant(models.Model):
     def __str__(self):
         return self.name
 class Weather(models.Model):
+    """
+    Model to store the weather of one hour.
 
-    date = models.CharField(max_length=100)
+    Attributes
+    ----------
+    date : DateTimeField
+        The hour (None for a record without a valid date); the simulations
+        load the hours they run as a range of this index.
+    temperature : FloatField
+        The temperature (in °C).
+    rain : FloatField
+        The rain (in mm).
+    wind : FloatField
+        The wind speed (in m/s, None if the weather file has no wind).
+    humidity : FloatField
+        The relative humidity (in %, None if unknown).
+    radiation : FloatField
+        The global radiation (in J/cm², None if unknown).
+    vapour_pressure : FloatField
+        The vapour pressure (in hPa, None if unknown).
+    wet_bulb_temperature : FloatField
+        The wet-bulb temperature (in °C, None if unknown).
+    site : CharField
+        The weather station ("" for the weather the project ships with).
+    """
+
+    date = models.DateTimeField(null=True, db_index=True)
     temperature = models.FloatField()
     rain = models.FloatField()
+    wind = models.FloatField(null=True, blank=True)
+    humidity = models.FloatField(null=True, blank=True)
+    radiation = models.FloatField(null=True, blank=True)
+    vapour_pressure = models.FloatField(null=True, blank=True)
+    wet_bulb_temperature = models.FloatField(null=True, blank=True)
+    site = models.CharField(max_length=100, default='', blank=True)
+
+    class Meta:
+        # An hour is stored once per site, so a weather file can be seeded again
+        constraints = [models.UniqueConstraint(fields=['site', 'date'], name='unique_weather_site_date')]
 
 
     def set_data(self, data):
@@ -289,7 +806,23 @@ class Weather(models.Model):
         """
         self.temperature = data.get('temperature')
         self.rain = data.get('rain')
-        self.date = data.get('date')
+        self.wind = data.get('wind')
+        self.humidity = data.get('humidity')
+        self.radiation = data.get('radiation')
+        self.vapour_pressure = data.get('vapour_pressure')
+        self.wet_bulb_temperature = data.get('wet_bulb_temperature')
+        self.site = data.get('site', '')
+        date = data.get('date')
+        if isinstance(date, str):
+            # Dates like "NaT" of the weather files are stored as None
+            try:
+                date = parse_datetime(date)
+            except ValueError:
+                date = None
+        # The hours of the weather files are in the time zone of the project
+        if date is not None and timezone.is_naive(date):
+            date = timezone.make_aware(date)
+        self.date = date
 
     def get_data(self):
         """
@@ -303,5 +836,11 @@ class Weather(models.Model):
         return {
             'temperature': self.temperature,
             'rain': self.rain,
+            'wind': self.wind,
+            'humidity': self.humidity,
+            'radiation': self.radiation,
+            'vapour_pressure': self.vapour_pressure,
+            'wet_bulb_temperature': self.wet_bulb_temperature,
             'date': self.date,
+            'site': self.site,
         }
\ No newline at end of file
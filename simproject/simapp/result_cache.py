@@ -0,0 +1,167 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Plant, ResultCacheEntry
+from .scripts.constants import SIMULATION_DAYS
+from .scripts.random_streams import draws_random_numbers
+from .summaries import summarize
+
+# Bump when a change of the simulation makes it give other results for the same input
+ENGINE_VERSION = 4
+# The number of cached results kept, the least recently used ones are evicted first
+RESULT_CACHE_SIZE = 1000
+# Results not found for this long are evicted
+RESULT_CACHE_MAX_AGE = timedelta(days=90)
+# The inputs that only change how a simulation is run or named, not its results
+# (whether they make it use the strip engine is hashed on its own)
+RUN_INPUTS = (
+    "simName", "testingMode", "testingData", "useCache",
+    "executor", "workers", "sweepWorkers", "sweepRetries",
+    "writerBatchSize", "writerQueueSize", "writerBackpressure", "keyframeInterval",
+)
+
+
+def _normalize(value):
+    # The same input is sent with numbers as strings or floats ("20", 20.0), which must hash alike
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return str(value)
+
+
+def normalize_input(input_data):
+    """
+    Get the input data without the keys that do not change the results, with numbers as floats.
+
+    The seed is left out as well, it is hashed as the exact integer.
+    """
+    return _normalize({key: value for key, value in input_data.items() if key not in RUN_INPUTS and key != "seed"})
+
+
+def result_key(input_data, weather_data, strip_engine=False):
+    """
+    Hash everything the results of a simulation depend on.
+
+    Parameters
+    ----------
+    input_data : dict
+        The input data of the simulation (of one variation in testing mode).
+    weather_data : WeatherSeries
+        The weather, as fetched by ``calculate.fetch_weather_data``; only the
+        days the simulation runs are hashed.
+    strip_engine : bool
+        Whether the simulation grows its crops with a strip engine, whose
+        results differ slightly from the serial growth (see ``executors.uses_strip_engine``).
+
+    Returns
+    -------
+    str
+        The hex SHA-256 of the canonical JSON of the normalized input, the
+        parameters of its plants, its weather, its seed (only if the
+        simulation draws random numbers, so an unseeded rerun of a
+        deterministic simulation is found), the engine version and whether
+        the strip engine is used.
+    """
+    plant_names = sorted({str(row.get("plantType")) for row in input_data.get("rows", [])})
+    plants = [
+        {key: _normalize(value) for key, value in plant.items() if key != "id"}
+        for plant in Plant.objects.filter(name__in=plant_names).order_by("name", "id").values()
+    ]
+    start = datetime.strptime(str(input_data["startDate"]), "%Y-%m-%d")
+    end = start + timedelta(days=SIMULATION_DAYS)
+    weather = hashlib.sha256()
+    if weather_data is not None:
+        window = weather_data.window(start, end)
+        weather.update(window.start.isoformat().encode())
+        for name in sorted(window.columns):
+            weather.update(name.encode() + window.columns[name].tobytes())
+    # The seed only changes the results of simulations that draw random numbers
+    seed = input_data.get("seed") if draws_random_numbers(input_data) else None
+    content = {
+        "input": normalize_input(input_data),
+        "plants": plants,
+        "weather": weather.hexdigest(),
+        "seed": None if seed is None else int(seed),
+        "engine": ENGINE_VERSION,
+        "strip_engine": bool(strip_engine),
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+
+def link_cached_result(iteration, key):
+    """
+    Make an iteration use the cached results of the same simulation, if there are any.
+
+    Parameters
+    ----------
+    iteration : SimulationIteration
+        The new iteration, without outputs.
+    key : str
+        The ``result_key`` of its input.
+
+    Returns
+    -------
+    bool
+        Whether the results were found; the iteration links to their outputs
+        and has their summary then.
+    """
+    entry = ResultCacheEntry.objects.filter(key=key).select_related("iteration").first()
+    if entry is None:
+        return False
+    ResultCacheEntry.objects.filter(id=entry.id).update(hits=F("hits") + 1, last_used_at=timezone.now())
+    source = entry.iteration
+    iteration.cached_from = source
+    iteration.field_length, iteration.field_width = source.field_length, source.field_width
+    iteration.save(update_fields=["cached_from", "field_length", "field_width"])
+    summarize(iteration)
+    return True
+
+
+def store_result(iteration, key):
+    """
+    Cache the results of a simulated iteration and evict the outdated ones.
+    """
+    try:
+        with transaction.atomic():
+            ResultCacheEntry.objects.create(key=key, iteration=iteration)
+    except IntegrityError:
+        # The same simulation finished in another worker first, its results are kept
+        return
+    evict()
+
+
+def evict(max_entries=RESULT_CACHE_SIZE, max_age=RESULT_CACHE_MAX_AGE):
+    """
+    Evict the cached results that were not found for ``max_age`` and the
+    least recently used ones beyond ``max_entries``.
+
+    The outputs stay with their iterations, they are only not found for new
+    simulations anymore.
+
+    Returns
+    -------
+    int
+        The number of evicted entries.
+    """
+    evicted, _ = ResultCacheEntry.objects.filter(last_used_at__lt=timezone.now() - max_age).delete()
+    # The entries used at or before the first one beyond the size are evicted
+    cutoff = list(ResultCacheEntry.objects.order_by("-last_used_at").values_list("last_used_at", flat=True)[max_entries:max_entries + 1])
+    if cutoff:
+        overflow, _ = ResultCacheEntry.objects.filter(last_used_at__lte=cutoff[0]).delete()
+        evicted += overflow
+    return evicted
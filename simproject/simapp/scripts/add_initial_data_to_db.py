@@ -1,6 +1,24 @@
 import os
+
 import pandas as pd
+from django.db import transaction
+from django.utils import timezone
+
 from simapp.models import Plant, Weather
+from simapp.scripts.weather import clear_weather_cache
+
+# The weather the project ships with
+WEATHER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'transformed_weather_data.csv')
+# The rows of a weather file read and inserted at once
+WEATHER_CHUNK_SIZE = 5000
+# The optional columns of a weather file and the Weather fields they are stored in
+WEATHER_COLUMNS = {
+    'Wind': 'wind',
+    'Hum': 'humidity',
+    'Globalstrahlung in J/cm²': 'radiation',
+    'Dampfdruck in hPa': 'vapour_pressure',
+    'Feuchttemperatur in °C': 'wet_bulb_temperature',
+}
 plants_data = [
     {
         "name": "lettuce",
@@ -81,10 +99,11 @@ plants_data = [
     {
         "name": "Lactuca Sativa L.",
         "W_max": 35,
-        "H_max": 35,
-        "k": 0.095,
-        "n": 2.477 ,
-        "b":180,
+        # Richards growth curve parameters from the experiment
+        "H_max": 32,
+        "k": 0.0045,
+        "n": 1.421,
+        "b": 9,
         "max_moves": 5,
         "Yield": 0.8,
         "size_per_plant": 7068.3,
@@ -98,30 +117,95 @@ plants_data = [
 
 # Save the data to the database
 def add_initial_plant_data_to_db():
-    print("Loading plant data...")
-    for plant_data in plants_data:
-        print("Creating plant: ", plant_data["name"])
-        Plant.objects.create(**plant_data)
+    """
+    Create the plants that are not in the database yet.
+
+    Returns
+    -------
+    int
+        The number of created plants.
+    """
+    existing = set(Plant.objects.values_list('name', flat=True))
+    plants = [Plant(**plant_data) for plant_data in plants_data if plant_data['name'] not in existing]
+    Plant.objects.bulk_create(plants)
+    return len(plants)
+
+
+def read_weather_file(path, chunk_size=WEATHER_CHUNK_SIZE):
+    """
+    Read the hours of a weather file in chunks.
+
+    The file needs a "date", a "temperature" (in °C) and a "rain" (in mm)
+    column, like ``data/transformed_weather_data.csv``; the columns of
+    ``WEATHER_COLUMNS`` are read if the file has them. The dates are in the
+    time zone of the project.
+
+    Yields
+    ------
+    pd.DataFrame
+        The "date" (aware, in UTC), "temperature", "rain" and the fields of
+        ``WEATHER_COLUMNS`` (NaN if the file does not have them) of the rows of
+        a chunk; the rows without a valid date, temperature or rain are left out.
+    """
+    chunks = pd.read_csv(
+        path,
+        usecols=lambda name: name in ('date', 'temperature', 'rain') or name in WEATHER_COLUMNS,
+        dtype={'date': 'string'},
+        chunksize=chunk_size,
+    )
+    for chunk in chunks:
+        missing = {'date', 'temperature', 'rain'} - set(chunk.columns)
+        if missing:
+            raise ValueError(f"The weather file has no {', '.join(sorted(missing))} column")
+        chunk = chunk.rename(columns=WEATHER_COLUMNS).reindex(columns=['date', 'temperature', 'rain', *WEATHER_COLUMNS.values()])
+        dates = pd.to_datetime(chunk['date'], format='ISO8601', errors='coerce')
+        if dates.dt.tz is None:
+            # The hours that do not exist or exist twice when the clocks change are left out
+            dates = dates.dt.tz_localize(timezone.get_current_timezone(), ambiguous='NaT', nonexistent='NaT')
+        values = chunk.drop(columns='date').apply(pd.to_numeric, errors='coerce').astype('float64')
+        chunk = values.assign(date=dates.dt.tz_convert('UTC'))[chunk.columns]
+        yield chunk.dropna(subset=['date', 'temperature', 'rain'])
+
+
+def add_weather_data_to_db(path=WEATHER_FILE, site='', chunk_size=WEATHER_CHUNK_SIZE):
+    """
+    Add the hours of a weather file to the database.
+
+    The file is read in chunks and every chunk is bulk created, all in one
+    transaction. Hours the site already has are skipped, so a file can be
+    loaded again, or together with files of the other years of the site.
 
+    Parameters
+    ----------
+    path : str
+        The CSV file (see ``read_weather_file``).
+    site : str
+        The weather station of the file ("" for the weather the project ships with).
+    chunk_size : int
+        The number of rows read and inserted at once.
 
+    Returns
+    -------
+    int
+        The number of added hours.
+    """
+    fields = ['temperature', 'rain', *WEATHER_COLUMNS.values()]
+    with transaction.atomic():
+        count = Weather.objects.filter(site=site).count()
+        for chunk in read_weather_file(path, chunk_size):
+            # The missing values of the optional columns are stored as NULL
+            values = chunk[fields].astype(object).where(chunk[fields].notna(), None).to_dict('records')
+            records = [Weather(date=date, site=site, **row) for date, row in zip(chunk['date'].dt.to_pydatetime(), values)]
+            # The hours the site already has are skipped by the unique site and date
+            Weather.objects.bulk_create(records, batch_size=chunk_size, ignore_conflicts=True)
+        added = Weather.objects.filter(site=site).count() - count
+    # The loaded windows of this process are dropped, other processes notice the new records themselves
+    clear_weather_cache()
+    return added
 
-#check if the weather data is in the db
 
-# Construct the path to the CSV file
 def add_initial_weather_data_to_db():
-    print("Loading weather data...")
-    base_dir = os.path.dirname(os.path.abspath(__file__))  # Gets the directory where the script is located
-    data_file = os.path.join(base_dir, 'data', 'transformed_weather_data.csv')  # Path to the CSV file
-    try:
-        df = pd.read_csv(data_file)
-        for _, row in df.iterrows():
-            weather_instance = Weather()
-            weather_instance.set_data({
-                'date': row['date'],
-                'temperature': row['temperature'],
-                'rain': row['rain']
-            })
-            weather_instance.save()
-
-    except Exception as e:
-        print(f'Error loading weather data: {e}')
\ No newline at end of file
+    """
+    Add the weather the project ships with (see ``add_weather_data_to_db``).
+    """
+    return add_weather_data_to_db(WEATHER_FILE)
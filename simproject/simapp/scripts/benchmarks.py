@@ -0,0 +1,797 @@
+import json
+import time
+import tracemalloc
+from datetime import timedelta
+
+import numpy as np
+from django.test import RequestFactory
+from scipy.ndimage import convolve
+
+from ..models import DataModelInput, DataModelOutput, SimulationIteration
+from ..snapshots import SNAPSHOT_DTYPE, DeltaEncoder, apply_delta, decode_array
+from ..views import get_simulation_data
+from .calculate import Crop, Simulation
+from .circular_masks import circular_masks
+from .executors import ProcessExecutor
+from .output_writer import OutputWriter
+
+
+def benchmark_input(num_plants=1000, strip_width=400, row_spacing=15, step_size=24, plant_type="Lactuca Sativa L.", row_length=None, num_strips=1):
+    """
+    Build the input data of grid planted strips with about the given number of plants per strip.
+
+    Parameters
+    ----------
+    num_plants : int
+        The number of plants that should be planted.
+    strip_width : int
+        The width of the strip (in cm).
+    row_spacing : int
+        The spacing between the plants of a row (in cm).
+    step_size : int
+        The time step size (in hours).
+    plant_type : str
+        The name of the plant in the Plant table.
+    row_length : int, optional
+        The length of the strip (in cm). Overrides the number of plants.
+    num_strips : int
+        The number of identical strips next to each other.
+
+    Returns
+    -------
+    dict
+        The input data for a Simulation.
+    """
+    # Grid planting uses a column distance of 40 cm and an offset of 20 cm at the edges
+    num_columns = len(range(20, strip_width - 20, 40))
+    num_rows = int(np.ceil(num_plants / num_columns))
+    if row_length is None:
+        row_length = num_rows * row_spacing + 40
+    return {
+        "simName": "benchmark",
+        "startDate": "2022-10-01",
+        "stepSize": step_size,
+        "rowLength": row_length,
+        "harvestType": "max_Yield",
+        "testingMode": False,
+        "testingData": {},
+        "useTemperature": False,
+        "useWater": False,
+        "allowWeedgrowth": False,
+        # A fixed seed, so every run of a benchmark simulates the same field
+        "seed": 0,
+        "rows": [
+            {
+                "plantType": plant_type,
+                "plantingType": "grid",
+                "stripWidth": strip_width,
+                "rowSpacing": row_spacing,
+                "numSets": 1,
+            }
+            for _ in range(num_strips)
+        ],
+    }
+
+
+def grow_per_object(sim, strip):
+    """
+    Grow all crops of the simulation one after another using the per-object Crop.grow path.
+    """
+    growthrate = 0
+    overlap = 0
+    for crop_strip in sim.strips:
+        crops = crop_strip.crops
+        for index in range(crops.count):
+            crop = sim.crops_obj_layer[crops.rows[index], crops.cols[index]]
+            crop_growthrate, crop_overlap = crop.grow(
+                sim.crop_size_layer, sim.crops_obj_layer, sim.crops_pos_layer, strip
+            )
+            growthrate += crop_growthrate
+            overlap += crop_overlap
+    return growthrate, overlap
+
+
+def benchmark_grow(num_plants=1000, steps=3, warmup_steps=20, step_size=24):
+    """
+    Compare the per-object Crop.grow path with the batched CropStore.grow_all.
+
+    Both simulations are warmed up with the batched growth so that the plants
+    have a realistic size, then the given number of steps is timed for both paths.
+
+    Returns
+    -------
+    dict
+        The number of plants, the mean step times, the speedup and whether both
+        paths produced identical layers.
+    """
+    input_data = benchmark_input(num_plants, step_size=step_size)
+    per_object = Simulation(input_data, {})
+    batched = Simulation(input_data, {})
+    for sim in (per_object, batched):
+        for strip in sim.strips:
+            strip.planting(sim)
+        for _ in range(warmup_steps):
+            sim.grow_plants(sim.strips[0])
+            sim.current_date += timedelta(hours=sim.stepsize)
+
+    per_object_time = 0
+    batched_time = 0
+    for _ in range(steps):
+        start_time = time.perf_counter()
+        grow_per_object(per_object, per_object.strips[0])
+        per_object_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        batched.grow_plants(batched.strips[0])
+        batched_time += time.perf_counter() - start_time
+
+        for sim in (per_object, batched):
+            sim.current_date += timedelta(hours=sim.stepsize)
+
+    identical = (
+        np.array_equal(per_object.crop_size_layer, batched.crop_size_layer)
+        and np.array_equal(per_object.water_layer, batched.water_layer)
+        and np.array_equal(per_object.boundary_layer, batched.boundary_layer)
+        and np.array_equal(per_object.strips[0].crops.overlap, batched.strips[0].crops.overlap)
+    )
+    return {
+        "plants": int(np.sum(batched.crops_pos_layer)),
+        "per_object_step": per_object_time / steps,
+        "batched_step": batched_time / steps,
+        "speedup": per_object_time / batched_time,
+        "identical": identical,
+    }
+
+
+def grow_weeds_per_object(sim, strip):
+    """
+    Grow all weeds of the simulation one after another using the per-object Crop.grow path.
+    """
+    weeds = sim.weeds
+    for index in range(weeds.count):
+        weed = Crop("weed", (weeds.rows[index], weeds.cols[index]), weeds.parameters, sim, store=weeds, index=index)
+        weed.grow(sim.weeds_size_layer, None, sim.weeds_pos_layer, strip)
+
+
+def benchmark_weeds(num_plants=1000, num_weeds=2000, steps=3, warmup_steps=20):
+    """
+    Compare the growth of a field under weed pressure with the growth of its crops alone.
+
+    The weeds are placed at random, then the crops and weeds of all
+    simulations are warmed up and the given number of steps is timed. The
+    weeds grow with the per-object Crop.grow path in one simulation and with
+    the batched growth of the weed store in the other.
+
+    Returns
+    -------
+    dict
+        The number of plants and weeds, the mean step times of the crops
+        alone, with per-object weeds and with batched weeds, and whether both
+        weed paths produced identical layers.
+    """
+    input_data = benchmark_input(num_plants)
+    crops_only = Simulation(input_data, {})
+    input_data = dict(input_data, allowWeedgrowth=True)
+    per_object = Simulation(input_data, {})
+    batched = Simulation(input_data, {})
+    shape = batched.weeds_pos_layer.shape
+    positions = np.random.default_rng(0).integers(0, shape, size=(num_weeds, 2))
+    for sim in (crops_only, per_object, batched):
+        for strip in sim.strips:
+            strip.planting(sim)
+        if sim.weeds is not None:
+            sim.add_weeds(positions[:, 0], positions[:, 1])
+        for _ in range(warmup_steps):
+            sim.grow_plants(sim.strips[0])
+            if sim.weeds is not None:
+                sim.weeds.grow_all(sim.strips[0], sim.weeds_size_layer)
+            sim.current_date += timedelta(hours=sim.stepsize)
+
+    times = {"crops_only": 0, "per_object": 0, "batched": 0}
+    for _ in range(steps):
+        for name, sim in (("crops_only", crops_only), ("per_object", per_object), ("batched", batched)):
+            start_time = time.perf_counter()
+            sim.grow_plants(sim.strips[0])
+            if sim is per_object:
+                grow_weeds_per_object(sim, sim.strips[0])
+            elif sim is batched:
+                sim.weeds.grow_all(sim.strips[0], sim.weeds_size_layer)
+            times[name] += time.perf_counter() - start_time
+            sim.current_date += timedelta(hours=sim.stepsize)
+
+    identical = (
+        np.array_equal(per_object.weeds_size_layer, batched.weeds_size_layer)
+        and np.array_equal(per_object.water_layer, batched.water_layer)
+        and np.array_equal(per_object.boundary_layer, batched.boundary_layer)
+    )
+    return {
+        "plants": int(np.sum(batched.crops_pos_layer)),
+        "weeds": batched.weeds.count,
+        "crops_only_step": times["crops_only"] / steps,
+        "per_object_step": times["per_object"] / steps,
+        "batched_step": times["batched"] / steps,
+        "identical": identical,
+    }
+
+
+def _uncached_masks(radius, cells_size):
+    """
+    Build the masks of one crop like Crop did before the mask cache: a disk
+    for the size layer, a disk for the cells and a convolved boundary.
+    """
+    for _ in range(2):
+        y, x = np.ogrid[-radius : radius + 1, -radius : radius + 1]
+        mask = x**2 + y**2 <= radius**2
+    cells = np.zeros((cells_size, cells_size), dtype=bool)
+    start = cells_size // 2 - radius
+    cells[start:start + mask.shape[0], start:start + mask.shape[1]] = mask
+    boundary = convolve(cells, np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]]), mode="constant", cval=0.0) ^ cells
+    return mask, boundary
+
+
+def _cached_masks(radius, cells_size):
+    circular_masks.disk(radius)
+    return circular_masks.disk(radius), circular_masks.ring(radius)
+
+
+def benchmark_masks(num_plants=1000, warmup_steps=20):
+    """
+    Measure the mask building work of one step with and without the mask cache.
+
+    The rounded radii of a warmed up strip are used to build the masks every
+    crop needs in one step. The allocated bytes are the sum of the peak traced
+    memory of every crop.
+
+    Returns
+    -------
+    dict
+        The number of plants and, for both variants, the time and the
+        allocated bytes per step.
+    """
+    sim = Simulation(benchmark_input(num_plants), {})
+    for strip in sim.strips:
+        strip.planting(sim)
+    for _ in range(warmup_steps):
+        sim.grow_plants(sim.strips[0])
+        sim.current_date += timedelta(hours=sim.stepsize)
+    crops = sim.strips[0].crops
+    radii = np.round(crops.radius[:crops.count] / 2).astype(int)
+
+    result = {"plants": int(crops.count)}
+    for name, build in (("uncached", _uncached_masks), ("cached", _cached_masks)):
+        start_time = time.perf_counter()
+        for radius in radii:
+            build(radius, crops.cells_size)
+        result[f"{name}_step"] = time.perf_counter() - start_time
+
+        allocated = 0
+        tracemalloc.start()
+        for radius in radii:
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            build(radius, crops.cells_size)
+            allocated += tracemalloc.get_traced_memory()[1] - current
+        tracemalloc.stop()
+        result[f"{name}_bytes"] = allocated
+    return result
+
+
+def _full_field_add(crop, growth_rate, size_layer):
+    """
+    Add the growth rate of a crop like Crop.add_growthrate_tp_plant did before
+    it used windowed updates: through a boolean mask as large as the field.
+    """
+    rounded_radius = int(np.round(crop.radius / 2))
+    mask = crop.generate_circular_mask(rounded_radius)
+    crop_mask = np.zeros_like(size_layer, dtype=bool)
+    row, col = crop.center
+    r_start = int(max(row - rounded_radius, 0))
+    r_end = int(min(row + rounded_radius + 1, size_layer.shape[0]))
+    c_start = int(max(col - rounded_radius, 0))
+    c_end = int(min(col + rounded_radius + 1, size_layer.shape[1]))
+    mask_r_start = int(r_start - (row - rounded_radius))
+    mask_c_start = int(c_start - (col - rounded_radius))
+    crop_mask[r_start:r_end, c_start:c_end] = mask[
+        mask_r_start:mask_r_start + (r_end - r_start), mask_c_start:mask_c_start + (c_end - c_start)
+    ]
+    np.add.at(size_layer, np.where(crop_mask), growth_rate)
+
+
+def benchmark_field_scaling(field_sizes=(100, 250, 500, 1000, 2000), sample=200, warmup_steps=20):
+    """
+    Measure the cost of adding the growth of one crop for square fields of different sizes.
+
+    For every field size a field with the same side length and width is
+    planted and warmed up. The growth of a sample of crops is then added with
+    the full-field mask and with the windowed update of Crop.add_growthrate_tp_plant.
+
+    Returns
+    -------
+    list
+        One dict per field size with the number of plants and the time per
+        crop and per step for both variants.
+    """
+    results = []
+    for field_size in field_sizes:
+        sim = Simulation(benchmark_input(strip_width=field_size, row_length=field_size), {})
+        for strip in sim.strips:
+            strip.planting(sim)
+        for _ in range(warmup_steps):
+            sim.grow_plants(sim.strips[0])
+            sim.current_date += timedelta(hours=sim.stepsize)
+        crops = sim.strips[0].crops
+        views = [
+            sim.crops_obj_layer[crops.rows[index], crops.cols[index]]
+            for index in range(min(sample, crops.count))
+        ]
+        result = {"field_size": field_size, "plants": int(crops.count)}
+        size_layer = sim.crop_size_layer.copy()
+        for name, add in (("full_field", _full_field_add), ("windowed", None)):
+            start_time = time.perf_counter()
+            for crop in views:
+                if add is None:
+                    crop.add_growthrate_tp_plant(0.01, size_layer)
+                else:
+                    add(crop, 0.01, size_layer)
+            per_crop = (time.perf_counter() - start_time) / len(views)
+            result[f"{name}_crop"] = per_crop
+            result[f"{name}_step"] = per_crop * crops.count
+        results.append(result)
+    return results
+
+
+def _convolve_boundary(crops, index, boundary_layer):
+    """
+    Add the boundary of a crop to the boundary layer like Crop.update_boundary
+    did before the incremental boundary layer: by convolving its cells.
+    """
+    rounded_radius = crops.cell_radius[index]
+    cells = np.asarray(crops.cell_stencils(rounded_radius)[0])
+    boundary = convolve(cells, np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]]), mode="constant", cval=0.0) ^ cells
+    row, col = crops.rows[index], crops.cols[index]
+    r_min = max(row - rounded_radius - 1, 0)
+    r_max = min(row + rounded_radius + 2, boundary_layer.shape[0])
+    c_min = max(col - rounded_radius - 1, 0)
+    c_max = min(col + rounded_radius + 2, boundary_layer.shape[1])
+    if r_min == 0 or r_max == boundary_layer.shape[0] or c_min == 0 or c_max == boundary_layer.shape[1]:
+        return
+    start_index = max(crops.parameters["W_max"] // 2 - rounded_radius - 1, 0)
+    end_index = min(crops.parameters["W_max"] // 2 + rounded_radius + 2, crops.parameters["W_max"])
+    new_boundary_slice = boundary[start_index:end_index, start_index:end_index]
+    target = boundary_layer[r_min:r_max, c_min:c_max]
+    if target.shape > new_boundary_slice.shape:
+        target = target[:new_boundary_slice.shape[0], :new_boundary_slice.shape[1]]
+    target += new_boundary_slice.astype(int)
+
+
+def benchmark_boundary(num_plants=1000, warmup_steps=20):
+    """
+    Compare the ways to maintain the boundary layer for one step in which the
+    cells of every crop grew by one.
+
+    The convolve path convolves the cells of every crop, the incremental path
+    swaps the old ring of every crop for the new one and the rebuild path
+    builds the whole layer in one pass.
+
+    Returns
+    -------
+    dict
+        The number of plants, the time of every path and whether the
+        incremental layer matches the rebuilt one.
+    """
+    sim = Simulation(benchmark_input(num_plants), {})
+    for strip in sim.strips:
+        strip.planting(sim)
+    for _ in range(warmup_steps):
+        sim.grow_plants(sim.strips[0])
+        sim.current_date += timedelta(hours=sim.stepsize)
+    crops = sim.strips[0].crops
+    indices = np.arange(crops.count)
+    # Step the cells of every crop back by one so that every ring changes
+    crops.cell_radius[indices] = np.maximum(crops.cell_radius[indices] - 1, 0)
+    sim.rebuild_boundary_layer()
+    crops.cell_radius[indices] += 1
+
+    result = {"plants": int(crops.count)}
+    boundary_layer = sim.boundary_layer.copy()
+    start_time = time.perf_counter()
+    for index in indices:
+        _convolve_boundary(crops, index, boundary_layer)
+    result["convolve_step"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    crops.update_boundary_layer(indices)
+    result["incremental_step"] = time.perf_counter() - start_time
+    incremental = sim.boundary_layer.copy()
+
+    start_time = time.perf_counter()
+    sim.rebuild_boundary_layer()
+    result["rebuild_step"] = time.perf_counter() - start_time
+    result["consistent"] = np.array_equal(incremental, sim.boundary_layer)
+    return result
+
+
+def benchmark_strips(num_strips=4, num_plants=1000, steps=3, workers=None, warmup_steps=20):
+    """
+    Compare the growth of a field with several strips in the simulation
+    process and in the worker processes of a ProcessExecutor.
+
+    Both simulations are warmed up in the simulation process, then the given
+    number of steps is timed for both. Every step grows the crops once per
+    strip, like Simulation.run_simulation.
+
+    Returns
+    -------
+    dict
+        The number of strips, plants and workers, the time to start the
+        workers, the mean step times, the speedup and whether both produced
+        identical layers.
+    """
+    input_data = benchmark_input(num_plants, num_strips=num_strips)
+    serial = Simulation(input_data, {})
+    parallel = Simulation(input_data, {})
+    for sim in (serial, parallel):
+        for strip in sim.strips:
+            strip.planting(sim)
+        for _ in range(warmup_steps):
+            sim.grow_plants(sim.strips[0])
+            sim.current_date += timedelta(hours=sim.stepsize)
+
+    start_time = time.perf_counter()
+    executor = ProcessExecutor(workers or num_strips)
+    parallel.engine = executor.start_engine(parallel)
+    startup_time = time.perf_counter() - start_time
+    serial_time = 0
+    parallel_time = 0
+    try:
+        for _ in range(steps):
+            for sim in (serial, parallel):
+                start_time = time.perf_counter()
+                for strip in sim.strips:
+                    sim.grow_plants(strip)
+                if sim is serial:
+                    serial_time += time.perf_counter() - start_time
+                else:
+                    parallel_time += time.perf_counter() - start_time
+                sim.current_date += timedelta(hours=sim.stepsize)
+        workers = parallel.engine.workers
+    finally:
+        parallel.engine.close()
+        parallel.engine = None
+        executor.close()
+
+    identical = all(
+        np.array_equal(getattr(serial, name), getattr(parallel, name))
+        for name in ("crop_size_layer", "boundary_layer", "water_layer")
+    )
+    return {
+        "strips": num_strips,
+        "plants": int(np.sum(parallel.crops_pos_layer)),
+        "workers": workers,
+        "startup": startup_time,
+        "serial_step": serial_time / steps,
+        "parallel_step": parallel_time / steps,
+        "speedup": serial_time / parallel_time,
+        "identical": identical,
+    }
+
+
+def _json_output(iteration, sim):
+    """
+    Build an output with JSON maps like Simulation.record_data did before the binary snapshots.
+    """
+    output = DataModelOutput(
+        iteration=iteration, date=str(sim.current_date), growth=0, water=0, overlap=0,
+        time_needed=0, profit=0, rain=0, temperature=0, num_plants=0,
+    )
+    output.map = sim.crop_size_layer.tolist()
+    output.weed = sim.weeds_size_layer.tolist()
+    return output
+
+
+def _binary_output(iteration, sim):
+    output = DataModelOutput(
+        iteration=iteration, date=str(sim.current_date), growth=0, water=0, overlap=0,
+        time_needed=0, profit=0, rain=0, temperature=0, num_plants=0,
+    )
+    output.set_map(sim.crop_size_layer)
+    output.set_weed(sim.weeds_size_layer)
+    return output
+
+
+def benchmark_snapshots(row_length=2000, strip_width=300, steps=3, warmup_steps=20):
+    """
+    Compare storing the maps of the outputs as JSON lists and as binary snapshots.
+
+    A field of the given size is planted and warmed up, then the given number
+    of outputs is written to and read back from the database in both formats.
+    The outputs are deleted afterwards.
+
+    Returns
+    -------
+    dict
+        The field shape and, for both formats, the write and read time per
+        output and the stored bytes per output.
+    """
+    sim = Simulation(benchmark_input(strip_width=strip_width, row_length=row_length), {})
+    for strip in sim.strips:
+        strip.planting(sim)
+    for _ in range(warmup_steps):
+        sim.grow_plants(sim.strips[0])
+        sim.current_date += timedelta(hours=sim.stepsize)
+
+    input_instance = DataModelInput.objects.create(
+        startDate=sim.current_date.date(), stepSize=sim.stepsize, rowLength=row_length,
+        testingMode=False, simName="benchmark_snapshots",
+    )
+    result = {"shape": sim.crop_size_layer.shape}
+    try:
+        for name, build in (("json", _json_output), ("binary", _binary_output)):
+            iteration = SimulationIteration.objects.create(input=input_instance)
+            start_time = time.perf_counter()
+            for _ in range(steps):
+                build(iteration, sim).save()
+            result[f"{name}_write"] = (time.perf_counter() - start_time) / steps
+
+            start_time = time.perf_counter()
+            for output in DataModelOutput.objects.filter(iteration=iteration):
+                output.get_map()
+                output.get_weed()
+            result[f"{name}_read"] = (time.perf_counter() - start_time) / steps
+
+            output = DataModelOutput.objects.filter(iteration=iteration).first()
+            if name == "json":
+                result["json_bytes"] = len(json.dumps(output.map)) + len(json.dumps(output.weed))
+            else:
+                result["binary_bytes"] = len(output.map_data) + len(output.weed_data)
+    finally:
+        input_instance.delete()
+    return result
+
+
+def benchmark_temporal(num_plants=1000, steps=48, step_size=1, keyframe_interval=10, warmup_steps=100):
+    """
+    Compare storing every recorded map in full with keyframes and deltas.
+
+    A strip is warmed up, then the maps of the given number of steps are
+    encoded with a keyframe every step and with a keyframe every
+    ``keyframe_interval`` steps. Random access decodes every step on its own,
+    replaying the deltas from the keyframe before it.
+
+    Returns
+    -------
+    dict
+        The number of steps and, for both variants, the stored bytes, the
+        encode time per step and the mean random access time.
+    """
+    sim = Simulation(benchmark_input(num_plants, step_size=step_size), {})
+    for strip in sim.strips:
+        strip.planting(sim)
+    for _ in range(warmup_steps):
+        sim.grow_plants(sim.strips[0])
+        sim.current_date += timedelta(hours=sim.stepsize)
+
+    encoders = {"full": DeltaEncoder(1), "delta": DeltaEncoder(keyframe_interval)}
+    encoded = {name: [] for name in encoders}
+    encode_time = {name: 0 for name in encoders}
+    for _ in range(steps):
+        sim.grow_plants(sim.strips[0])
+        sim.current_date += timedelta(hours=sim.stepsize)
+        for name, encoder in encoders.items():
+            start_time = time.perf_counter()
+            _, keyframe, snapshots = encoder.encode({"map": sim.crop_size_layer})
+            encode_time[name] += time.perf_counter() - start_time
+            encoded[name].append((keyframe, snapshots["map"]))
+
+    result = {"steps": steps}
+    for name, frames in encoded.items():
+        start_time = time.perf_counter()
+        for step in range(steps):
+            keyframe_step = max(index for index in range(step + 1) if frames[index][0])
+            array = decode_array(frames[keyframe_step][1])
+            for _, delta in frames[keyframe_step + 1:step + 1]:
+                array = apply_delta(array, delta)
+        result[f"{name}_access"] = (time.perf_counter() - start_time) / steps
+        result[f"{name}_bytes"] = sum(len(snapshot) for _, snapshot in frames)
+        result[f"{name}_encode"] = encode_time[name] / steps
+    return result
+
+
+def _step_data(sim):
+    return {
+        "date": sim.current_date, "yield": 0, "growth": 0, "water": 0, "overlap": 0,
+        "time_needed": 0, "profit": 0, "rain": 0, "temperature": 0, "num_plants": 0,
+    }
+
+
+def benchmark_writer(row_length=2000, strip_width=300, steps=20, warmup_steps=20):
+    """
+    Compare saving every recorded step in the simulation loop with the OutputWriter.
+
+    Returns
+    -------
+    dict
+        The loop time per step and the total time (including the final
+        flush of the writer) for the synchronous and the background writes,
+        and the time per step to copy the maps for the writer.
+    """
+    sim = Simulation(benchmark_input(strip_width=strip_width, row_length=row_length), {})
+    for strip in sim.strips:
+        strip.planting(sim)
+    for _ in range(warmup_steps):
+        sim.grow_plants(sim.strips[0])
+        sim.current_date += timedelta(hours=sim.stepsize)
+
+    input_instance = DataModelInput.objects.create(
+        startDate=sim.current_date.date(), stepSize=sim.stepsize, rowLength=row_length,
+        testingMode=False, simName="benchmark_writer",
+    )
+    result = {}
+    try:
+        iteration = SimulationIteration.objects.create(input=input_instance)
+        encoder = DeltaEncoder()
+        start_time = time.perf_counter()
+        for _ in range(steps):
+            output = DataModelOutput(iteration=iteration)
+            output.set_data(_step_data(sim))
+            output.set_snapshots(*encoder.encode({"map": sim.crop_size_layer, "weed": sim.weeds_size_layer}))
+            output.save()
+        result["sync_step"] = (time.perf_counter() - start_time) / steps
+        result["sync_total"] = time.perf_counter() - start_time
+
+        # The part of the writer path the loop has to wait for without a free core for the thread
+        start_time = time.perf_counter()
+        for _ in range(steps):
+            sim.crop_size_layer.astype(SNAPSHOT_DTYPE)
+            sim.weeds_size_layer.astype(SNAPSHOT_DTYPE)
+        result["copy_step"] = (time.perf_counter() - start_time) / steps
+
+        iteration = SimulationIteration.objects.create(input=input_instance)
+        writer = OutputWriter(iteration, max_pending=steps)
+        start_time = time.perf_counter()
+        for _ in range(steps):
+            writer.record(_step_data(sim), {
+                "map": sim.crop_size_layer.astype(SNAPSHOT_DTYPE),
+                "weed": sim.weeds_size_layer.astype(SNAPSHOT_DTYPE),
+            })
+        result["writer_step"] = (time.perf_counter() - start_time) / steps
+        writer.close()
+        result["writer_total"] = time.perf_counter() - start_time
+    finally:
+        input_instance.delete()
+    return result
+
+
+def _legacy_simulation_data(simulation_name):
+    # The stream before one record per output: one query and one materialized list per iteration
+    iterations = SimulationIteration.objects.filter(input__simName=simulation_name).order_by('iteration_index')
+    for iteration in iterations:
+        outputs = DataModelOutput.objects.filter(iteration=iteration).order_by('step', 'date')
+        iteration_data = {
+            "iteration_index": iteration.iteration_index,
+            "outputs": [
+                {
+                    "date": output.date,
+                    "yield": output.yield_value,
+                    "growth": output.growth,
+                    "water": output.water,
+                    "overlap": output.overlap,
+                    "map": None if maps["map"] is None else maps["map"].tolist(),
+                    "weed": None if maps["weed"] is None else maps["weed"].tolist(),
+                    "time_needed": output.time_needed,
+                    "profit": output.profit,
+                    "rain": output.rain,
+                    "temperature": output.temperature,
+                    "num_plants": output.num_plants,
+                }
+                for output, maps in DataModelOutput.iter_maps(outputs)
+            ],
+        }
+        yield json.dumps(iteration_data) + '\n'
+
+
+def _measure_stream(make_stream):
+    # Tracing slows the allocations down, so the times are taken in a pass of their own
+    start_time = time.perf_counter()
+    first_byte = None
+    for _ in make_stream():
+        if first_byte is None:
+            first_byte = time.perf_counter() - start_time
+    total = time.perf_counter() - start_time
+    tracemalloc.start()
+    for _ in make_stream():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"first_byte": first_byte, "total": total, "peak_bytes": peak}
+
+
+def benchmark_streaming(steps=1000, row_length=100, strip_width=100):
+    """
+    Compare streaming the results of a long run per iteration and per output.
+
+    The run is recorded through the OutputWriter with maps every step. The
+    peak memory is the one traced by ``tracemalloc`` (Python objects and
+    NumPy arrays) while the stream is consumed.
+
+    Returns
+    -------
+    dict
+        The time to the first byte, the total time and the peak memory of
+        both streams.
+    """
+    sim = Simulation(benchmark_input(strip_width=strip_width, row_length=row_length, step_size=1), {})
+    for strip in sim.strips:
+        strip.planting(sim)
+    input_instance = DataModelInput.objects.create(
+        startDate=sim.current_date.date(), stepSize=sim.stepsize, rowLength=row_length,
+        testingMode=False, simName="benchmark_streaming",
+    )
+    try:
+        iteration = SimulationIteration.objects.create(input=input_instance)
+        writer = OutputWriter(iteration)
+        for _ in range(steps):
+            sim.grow_plants(sim.strips[0])
+            writer.record(_step_data(sim), {
+                "map": sim.crop_size_layer.astype(SNAPSHOT_DTYPE),
+                "weed": sim.weeds_size_layer.astype(SNAPSHOT_DTYPE),
+            })
+            sim.current_date += timedelta(hours=sim.stepsize)
+        writer.close()
+
+        result = {"steps": steps, "shape": sim.crop_size_layer.shape}
+        result["per_iteration"] = _measure_stream(lambda: _legacy_simulation_data(input_instance.simName))
+        request = RequestFactory().get('/api/get_simulation_data/', {'name': input_instance.simName})
+        result["per_output"] = _measure_stream(lambda: get_simulation_data(request).streaming_content)
+    finally:
+        input_instance.delete()
+    return result
+
+
+def benchmark_fields(iterations=24, steps=53, row_length=400, strip_width=300):
+    """
+    Compare streaming all values of a sweep with streaming the line plot values only.
+
+    Every iteration of the sweep records the same maps every step.
+
+    Returns
+    -------
+    dict
+        The time and the number of bytes of the full stream and of the
+        stream of "yield" and "growth".
+    """
+    sim = Simulation(benchmark_input(strip_width=strip_width, row_length=row_length), {})
+    for strip in sim.strips:
+        strip.planting(sim)
+    encoder = DeltaEncoder()
+    recorded = []
+    for _ in range(steps):
+        sim.grow_plants(sim.strips[0])
+        recorded.append((_step_data(sim), encoder.encode({"map": sim.crop_size_layer, "weed": sim.weeds_size_layer})))
+        sim.current_date += timedelta(hours=sim.stepsize)
+
+    input_instance = DataModelInput.objects.create(
+        startDate=sim.current_date.date(), stepSize=sim.stepsize, rowLength=row_length,
+        testingMode=False, simName="benchmark_fields",
+    )
+    try:
+        for index in range(iterations):
+            iteration = SimulationIteration.objects.create(input=input_instance, iteration_index=index)
+            outputs = []
+            for data, snapshots in recorded:
+                output = DataModelOutput(iteration=iteration)
+                output.set_data(data)
+                output.set_snapshots(*snapshots)
+                outputs.append(output)
+            DataModelOutput.objects.bulk_create(outputs)
+
+        result = {"iterations": iterations, "steps": steps}
+        for name, params in (("all", {}), ("lines", {"fields": "yield,growth"})):
+            request = RequestFactory().get('/api/get_simulation_data/', {"name": input_instance.simName, **params})
+            start_time = time.perf_counter()
+            size = sum(len(chunk) for chunk in get_simulation_data(request).streaming_content)
+            result[name + "_time"] = time.perf_counter() - start_time
+            result[name + "_bytes"] = size
+    finally:
+        input_instance.delete()
+    return result
@@ -1,22 +1,33 @@
+import copy
 import numpy as np
 from threading import Lock
 from datetime import datetime, timedelta
-from scipy.ndimage import convolve
-import random
-from concurrent.futures import ThreadPoolExecutor
-from multiprocessing import cpu_count
 from simapp.models import Plant
-from ..models import DataModelInput, DataModelOutput, SimulationIteration, RowDetail, Weather
+from .circular_masks import circular_masks
+from .constants import SIMULATION_DAYS
+from .crop_store import CropStore
+from .designs import design_points, is_design
+from .executors import create_executor, uses_strip_engine
+from .output_writer import OutputWriter
+from .random_streams import RandomStreams
+from .recording import RecordingPolicy
+from .weather import WeatherSeries, load_weather
+from .sweep import SweepTask, run_sweep
+from ..models import DataModelInput, DataModelOutput, SimulationIteration, RowDetail, SweepPoint
+from ..result_cache import link_cached_result, result_key, store_result
+from ..snapshots import SNAPSHOT_DTYPE
+from ..summaries import summarize
 import time
 import csv
 import os
-from dateutil import parser
-from django.core.exceptions import ObjectDoesNotExist
 
 class Crop:
     """
     A class to represent a crop.
 
+    The state of the crop is held by a ``CropStore``; a ``Crop`` is a view on
+    one index of that store.
+
     Attributes
     ----------
     name : str
@@ -29,6 +40,10 @@ class Crop:
         A dictionary of parameters related to the crop.
     sim : Simulation
         The simulation object that manages the growth and interactions of the crop.
+    store : CropStore
+        The store holding the state of the crop.
+    index : int
+        The index of the crop in the store.
     cells : np.ndarray
         An array representing the cells occupied by the crop.
     boundary : np.ndarray
@@ -49,7 +64,7 @@ class Crop:
     generate_circular_mask(radius)
         Generates a circular mask for the crop area with the specified radius.
     """
-    def __init__(self, name, center, parameters, sim):
+    def __init__(self, name, center, parameters, sim, store=None, index=None):
         """
         Initializes the Crop instance.
 
@@ -59,36 +74,73 @@ class Crop:
             The name of the crop.
         center : tuple
             The (x, y) coordinates of the center of the crop.
-        radius : int
-            The radius of the crop.
         parameters : dict
             A dictionary of parameters related to the crop.
         sim : Simulation
             The simulation object managing the crop.
+        store : CropStore, optional
+            The store holding the state of the crop. If no store is given, the
+            crop gets a store of its own.
+        index : int, optional
+            The index of the crop in the store. Required if a store is given.
         """
         self.name = name
-        self.center = center
-        self.radius = 0  # Initial radius is 0
         self.parameters = parameters
         self.sim = sim
         self.size =0
-        self.cells = np.zeros(
-            (
-                self.parameters["W_max"] + self.parameters["max_moves"] + 2,
-                self.parameters["W_max"] + self.parameters["max_moves"] + 2,
-            ),
-            dtype=bool,
-        )
-        self.boundary = np.zeros(
-            (
-                self.parameters["W_max"] + self.parameters["max_moves"] + 2,
-                self.parameters["W_max"] + self.parameters["max_moves"] + 2,
-            ),
-            dtype=bool,
-        )
-        self.moves = 0  # Number of moves
-        self.overlap = 1  # Overlap with other plants
-        self.previous_growth = 0  # Growth rate of the previous hour
+        if store is None:
+            store = CropStore(name, parameters, sim, capacity=1)
+            index = store.add([center[0]], [center[1]])[0]
+        self.store = store
+        self.index = index
+
+    @property
+    def center(self):
+        return (self.store.rows[self.index], self.store.cols[self.index])
+
+    @center.setter
+    def center(self, value):
+        self.store.rows[self.index], self.store.cols[self.index] = value
+
+    @property
+    def radius(self):
+        return self.store.radius[self.index]
+
+    @radius.setter
+    def radius(self, value):
+        self.store.radius[self.index] = value
+
+    @property
+    def overlap(self):
+        return self.store.overlap[self.index]
+
+    @overlap.setter
+    def overlap(self, value):
+        self.store.overlap[self.index] = value
+
+    @property
+    def previous_growth(self):
+        return self.store.previous_growth[self.index]
+
+    @previous_growth.setter
+    def previous_growth(self, value):
+        self.store.previous_growth[self.index] = value
+
+    @property
+    def moves(self):
+        return self.store.moves[self.index]
+
+    @moves.setter
+    def moves(self, value):
+        self.store.moves[self.index] = value
+
+    @property
+    def cells(self):
+        return self.store.cell_stencils(self.store.cell_radius[self.index])[0]
+
+    @property
+    def boundary(self):
+        return self.store.cell_stencils(self.store.cell_radius[self.index])[1]
 
     def grow(self, size_layer, obj_layer, pos_layer, strip):
         """
@@ -116,25 +168,10 @@ class Crop:
             self.update_boundary()
         return growthrate, self.overlap
     def calculate_waterfactor(self):
-        if self.sim.input_data['useWater']:
-            current_time = self.sim.current_date
-            current_paticipitation = self.weather_data[current_time.hour][3]
-            self.sim.water_layer += current_paticipitation* 0.0001
-            self.sim.water_layer[self.sim.water_layer > 2] = 2
-
-            optimal_water = 0.5
-            return 1 - abs(current_paticipitation - optimal_water) / optimal_water
-        else:
-            return 1
+        # The factor only depends on the weather of the step, the simulation computes it once per step
+        return self.sim.water_factor
     def calculate_tempfactor(self):
-        if self.sim.input_data['useTemperature']:
-            current_time = self.sim.current_date
-            current_temperture = self.weather_data[current_time.hour][2]
-            optimal_temp = 20
-            #return 1 if the temperture is optimal gradually decrease if the temperture is not optimal 0 if the temperture is -100% if the emperature is +100% of the optimal temperture
-            return 1 - abs(current_temperture - optimal_temp) / optimal_temp
-        else:
-            return 1
+        return self.sim.temp_factor
     
 
     def calculate_growthrate(self, strip):
@@ -156,24 +193,8 @@ class Crop:
         water_factor = self.calculate_waterfactor()
         temp_factor = self.calculate_tempfactor()
 
-        # Random factor to introduce natural variation in growth
-        random_factor = random.uniform(1, 1.001)
-
-        # Base growth calculation
-        growth = 0.00425 *((1-self.overlap)*0.5)# * water_factor * temp_factor * random_factor
-        # Detailed growth rate calculation using the logistic growth model modified with environmental factors
-        '''
-        h = self.parameters["H_max"]
-        r = self.parameters["k"]
-        m = self.parameters["n"]
-        '''
-        #diese werte fur den Versuch
-        h = 32
-        r = 0.0045
-        m = 1.421
-        x = t_diff_hours
-        b= 9
-        growth_rate=(h*b*r)/(m-1)*np.exp(-r*x)*(1+b*np.exp(-r*x))**(m/(1-m))
+        # Detailed growth rate calculation using the Richards growth curve of the plant
+        growth_rate = self.store.growth_curve.rate(t_diff_hours)
         #get the betrag of the growth rate
         growth_rate = abs(growth_rate*self.sim.stepsize)*self.overlap
         """
@@ -193,84 +214,29 @@ class Crop:
     def add_growthrate_tp_plant(self,growth_rate,size_layer):
         rounded_radius = int(np.round(self.radius / 2))
         mask = self.generate_circular_mask(rounded_radius)
-        crop_mask = np.zeros_like(size_layer, dtype=bool)
 
-        # Check if the mask is within the boundaries of the field
+        # Clip the bounding window of the crop to the boundaries of the field
         r_start = int(max(self.center[0] - rounded_radius, 0))
         r_end = int(min(self.center[0] + rounded_radius + 1, size_layer.shape[0]))
         c_start = int(max(self.center[1] - rounded_radius, 0))
         c_end = int(min(self.center[1] + rounded_radius + 1, size_layer.shape[1]))
 
-        # Check if the mask is within the boundaries of the field
+        # Clip the mask in the same way
         mask_r_start = int(r_start - (self.center[0] - rounded_radius))
         mask_r_end = int(mask_r_start + (r_end - r_start))
         mask_c_start = int(c_start - (self.center[1] - rounded_radius))
         mask_c_end = int(mask_c_start + (c_end - c_start))
 
-        # Add the mask to the crop mask
-        crop_mask[r_start:r_end, c_start:c_end] = mask[
-            mask_r_start:mask_r_end, mask_c_start:mask_c_end
-        ]
-        np.add.at(size_layer, np.where(crop_mask), growth_rate)
+        # Add the growth rate to the cells of the mask inside the window
+        window = size_layer[r_start:r_end, c_start:c_end]
+        window[mask[mask_r_start:mask_r_end, mask_c_start:mask_c_end]] += growth_rate
 
     def check_overlap(self,rounded_radius,size_layer,obj_layer,pos_layer):
-        # Calculate the boundary indices for the area around the crop
-        r_min = max(self.center[0] - rounded_radius - 1, 0)
-        r_max = min(self.center[0] + rounded_radius + 2, size_layer.shape[0])
-        c_min = max(self.center[1] - rounded_radius - 1, 0)
-        c_max = min(self.center[1] + rounded_radius + 2, size_layer.shape[1])
-        # Create a slice of the size_layer to check for overlap
-        snipped_size_layer = size_layer[r_min:r_max, c_min:c_max]
-        # Convert all non-zero cells to 1 to create a mask
-
-
-        mask = np.where(snipped_size_layer > 0, 1, 0)
-
-
-        # Mittelpunkt der Zellen-Matrix
-        center_row = self.cells.shape[0] // 2
-        center_col = self.cells.shape[1] // 2
-
-        # Berechnen der Grenzen rund um den Mittelpunkt mit gegebenem Radius
-        r_min = max(center_row - rounded_radius - 1, 0)
-        r_max = min(center_row + rounded_radius + 2, self.cells.shape[0])
-        c_min = max(center_col - rounded_radius - 1, 0)
-        c_max = min(center_col + rounded_radius + 2, self.cells.shape[1])
-        
-        # Ausschneiden des relevanten Teils der Zellen-Matrix
-        cells_slice = self.cells[r_min:r_max, c_min:c_max]
-        boundary_slice = self.boundary[r_min:r_max, c_min:c_max]
-
-
-        # Subtract the cells of the current crop to avoid self-interference
-        if mask.shape != cells_slice.shape:
-            if mask.shape[0] > cells_slice.shape[0] or mask.shape[1] > cells_slice.shape[1]:
-                mask = mask[:cells_slice.shape[0], :]
-                mask = mask[:, :cells_slice.shape[1]]
-            else:
-                cells_slice = cells_slice[:mask.shape[0], :mask.shape[1]]
-                boundary_slice = boundary_slice[:mask.shape[0], :mask.shape[1]]
-
-        mask -= cells_slice
-        mask[mask < 0] = 0
-
-        # Create a corresponding slice from self.boundary
-        
-
-        # Add the boundary to the mask
-        mask += boundary_slice
-        # Check if there is any overlap with other plants
-        if np.any(mask > 1):
-            # Calculate total and relative overlap
-            total_overlap = np.sum(mask > 1)
-            relative_overlap = total_overlap / np.sum(self.boundary) if np.sum(self.boundary) > 0 else 0
-            maxoverlap = 0.07
-            self.overlap = max(0, min(1, 1 - (relative_overlap / maxoverlap)))
-            if self.moves < self.parameters["max_moves"]:
-                pass
-                #self.move_plant(mask,size_layer,obj_layer,pos_layer)
-        else:
-            self.overlap = 1  # Reset overlap if no interference
+        # Count the cells of the boundary that are occupied by other crops
+        self.overlap = self.store.overlap_factors([self.index], size_layer)[0]
+        if self.overlap < 1 and self.moves < self.parameters["max_moves"]:
+            pass
+            #self.move_plant(mask,size_layer,obj_layer,pos_layer)
 
     def move_plant(self, mask, size_layer, obj_layer, pos_layer):
 
@@ -337,75 +303,12 @@ class Crop:
             Update the cells and boundary of the crop based on the current center and radius
 
             """
-            rounded_radius = int(np.round(self.radius / 2))
-            mask = self.generate_circular_mask(rounded_radius)
-            # Reset the cells and boundary
-            r_start = max(self.cells.shape[0] // 2 - mask.shape[0] // 2, 0)
-            r_end = min(r_start + mask.shape[0], self.cells.shape[0])
-            c_start = max(self.cells.shape[1] // 2 - mask.shape[1] // 2, 0)
-            c_end = min(c_start + mask.shape[1], self.cells.shape[1])
-            # Check if the mask is within the boundaries of the field
-            mask_r_start = 0 if r_start >= 0 else -r_start
-            mask_r_end = (
-                mask.shape[0]
-                if r_end <= self.cells.shape[0]
-                else mask.shape[0] - (r_end - self.cells.shape[0])
-            )
-            mask_c_start = 0 if c_start >= 0 else -c_start
-            mask_c_end = (
-                mask.shape[1]
-                if c_end <= self.cells.shape[1]
-                else mask.shape[1] - (c_end - self.cells.shape[1])
-            )
-            # Add the mask to the cells
-
-            self.cells[r_start:r_end, c_start:c_end] = mask[
-                mask_r_start:mask_r_end, mask_c_start:mask_c_end
-            ]
+            self.store.cell_radius[self.index] = int(np.round(self.radius / 2))
 
     def update_boundary(self):
-            rounded_radius = int(np.round(self.radius / 2))
-            # Update the boundary using a convolution
-            self.boundary = (
-                convolve(
-                    self.cells,
-                    np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]]),
-                    mode="constant",
-                    cval=0.0,
-                )
-                ^ self.cells
-            )
-            # Ensure r_min, r_max, c_min, c_max are within valid range
-            r_min = int(max(self.center[0] - rounded_radius - 1, 0))
-            r_max = int(min(self.center[0] + rounded_radius + 2, self.sim.boundary_layer.shape[0])
-            )
-            c_min = int(max(self.center[1] - rounded_radius - 1, 0))
-            c_max = int(min(self.center[1] + rounded_radius + 2, self.sim.boundary_layer.shape[1])
-            )
+            # Swap the old boundary of the crop for the one of the updated cells
+            self.store.update_boundary_layer([self.index])
 
-            # Check if the boundary expands outside the array
-            if (
-                r_min == 0
-                or r_max == self.sim.boundary_layer.shape[0]
-                or c_min == 0
-                or c_max == self.sim.boundary_layer.shape[1]
-            ):
-                return
-
-            # Create a slice of the boundary array to assign
-            start_index = max(self.parameters["W_max"] // 2 - rounded_radius - 1, 0)
-            end_index = min(self.parameters["W_max"] // 2 + rounded_radius + 2, self.parameters["W_max"])
-
-            # Use the safe indices to slice the array
-            new_boundary_slice = self.boundary[start_index:end_index, start_index:end_index]
-            boundary =self.sim.boundary_layer[r_min:r_max, c_min:c_max]
-            if boundary.shape > new_boundary_slice.shape:
-                boundary = boundary[:new_boundary_slice.shape[0], :new_boundary_slice.shape[1]]
-            # Add the new boundary slice to the existing boundary_layer
-            boundary += new_boundary_slice.astype(
-                int
-            )
-    
 
 
     @staticmethod
@@ -413,7 +316,8 @@ class Crop:
         """
         Generate a circular mask with the given radius. The mask is a boolean
         array that is True within the circle defined by the given radius and
-        False outside.
+        False outside. Masks are taken from the process-wide mask cache and
+        must not be modified.
 
         Parameters
         ----------
@@ -438,9 +342,7 @@ class Crop:
          [0 0 1 1 1 0 0]
          [0 0 0 1 0 0 0]]
         """
-        y, x = np.ogrid[-radius : radius + 1, -radius : radius + 1]
-        mask = x**2 + y**2 <= radius**2
-        return mask
+        return circular_masks.disk(radius)
 
 
 
@@ -473,16 +375,17 @@ class Strip:
         # Tracking previous sizes for the stability check (initiate with None)
         self.previous_sizes = [None] * 5  # List to track the last 5 size changes
         self.plant_parameters = Strip.get_plant_parameters(self.plantType)
+        self.crops = CropStore(self.plantType, self.plant_parameters, sim)
     def get_plant_parameters(plant_name):
         try:
             plant = Plant.objects.get(name=plant_name)
             return {
                 "name": str(plant.name),
                 "W_max": int(plant.W_max),
-                "H_max": int(plant.H_max),
+                "H_max": float(plant.H_max),
                 "k": float(plant.k),
-                "n": int(plant.n),
-                "b": int(plant.b),
+                "n": float(plant.n),
+                "b": float(plant.b),
                 "max_moves": int(plant.max_moves),
                 "Yield": float(plant.Yield),
                 "size_per_plant": float(plant.size_per_plant),
@@ -536,9 +439,13 @@ class Strip:
         # Set crop positions to True in your crop position layer
         sim.crops_pos_layer[row_grid, col_grid] = True
 
-        # Create crop objects using vectorize properly over the grid
-        create_crop = np.vectorize(lambda r, c: Crop(self.plantType, (r, c), plant_parameters, sim))
-        crops = create_crop(row_grid, col_grid)
+        # Add the crops to the store and create crop views using vectorize over the grid
+        indices = self.crops.add(row_grid, col_grid).reshape(row_grid.shape)
+        create_crop = np.vectorize(
+            lambda r, c, i: Crop(self.plantType, (r, c), plant_parameters, sim, self.crops, i),
+            otypes=[object],
+        )
+        crops = create_crop(row_grid, col_grid, indices)
 
         # Place crop objects in the crops_obj_layer
         sim.crops_obj_layer[row_grid, col_grid] = crops
@@ -635,7 +542,7 @@ class Strip:
         print(f"Placing {num_plants} plants in strip {self.index}.")
         # Randomly select positions within the adjusted bounds
         total_positions = adjusted_row_length * adjusted_col_length
-        plant_positions = np.random.choice(total_positions, num_plants, replace=False)
+        plant_positions = sim.random.planting.choice(total_positions, num_plants, replace=False)
         row_indices, col_indices = np.unravel_index(
             plant_positions, (adjusted_row_length, adjusted_col_length)
         )
@@ -648,9 +555,13 @@ class Strip:
         # Set crop positions to True in your crop position layer
         sim.crops_pos_layer[row_indices, col_indices] = True
 
-        # Create crop objects using vectorize properly over the grid
-        create_crop = np.vectorize(lambda r, c: Crop(self.plantType, (r, c), plant_parameters, sim))
-        crops = create_crop(row_indices, col_indices)
+        # Add the crops to the store and create crop views using vectorize over the grid
+        indices = self.crops.add(row_indices, col_indices)
+        create_crop = np.vectorize(
+            lambda r, c, i: Crop(self.plantType, (r, c), plant_parameters, sim, self.crops, i),
+            otypes=[object],
+        )
+        crops = create_crop(row_indices, col_indices, indices)
 
         # Place crop objects in the crops_obj_layer
         sim.crops_obj_layer[row_indices, col_indices] = crops
@@ -689,6 +600,7 @@ class Strip:
                 sim.crops_obj_layer[:, self.start : self.start + self.width] = None
                 # clear the crops from the crop_pos_layer
                 sim.crops_pos_layer[:, self.start : self.start + self.width] = False
+                self.crops.clear()
                 self.current_set += 1
                 # replant the strip if num of sets is not reached
                 if self.current_set < self.num_sets:
@@ -742,6 +654,10 @@ class Simulation:
         The total width of the simulation area based on strip widths.
     water_layer : np.ndarray
         A layer representing water levels across the simulation area.
+    weather : WeatherSeries
+        The hourly weather.
+    water_factor, temp_factor : float
+        The effect of the rain and the temperature of the current step on the growth.
     crop_size_layer : np.ndarray
         A layer representing the size of crops at each position.
     crops_pos_layer : np.ndarray
@@ -752,12 +668,20 @@ class Simulation:
         A layer representing the boundary of the crops.
     weeds_size_layer : np.ndarray
         A layer representing the size of weeds at each position.
-    weeds_obj_layer : np.ndarray
-        A layer storing weed objects at each position.
     weeds_pos_layer : np.ndarray
         A boolean layer indicating the positions occupied by weeds.
+    weeds : CropStore
+        The weeds, in the order they spawned (None if weeds do not grow).
+    weed_spawn_rate : float
+        The mean number of spots a weed may spawn on per strip and step.
     lock : Lock
         A lock to manage concurrent access to shared resources.
+    executor : SerialExecutor
+        The executor that runs the work of the simulation, shared with other
+        simulations of the same run.
+    engine : StripEngine
+        The worker processes that grow the crops of the strips (None if the
+        crops are grown in the simulation process).
     date : str
         The start date of the simulation.
     current_date : datetime
@@ -766,6 +690,16 @@ class Simulation:
         A DataFrame to store simulation data over time.
     stepsize : int
         The time step size for the simulation.
+    output_writer : OutputWriter
+        Writes the recorded steps in a background thread while the simulation runs.
+    recording : RecordingPolicy
+        Decides which steps record their maps and how they are downsampled.
+    step_index : int
+        The index of the current step.
+    progress : JobProgress
+        Reports the finished steps to the job of the run (None outside of jobs).
+    random : RandomStreams
+        The random number generators, seeded with the "seed" of the input.
 
     Methods
     -------
@@ -774,15 +708,21 @@ class Simulation:
     harvesting()
         Checks if crops are ready for harvest based on their size.
     grow_weeds()
-        Grows the weeds in the simulation area using parallel processing.
+        Grows all weeds at once and spawns new ones.
+    spawn_weeds()
+        Spawns a random batch of weeds.
+    add_weeds(rows, cols)
+        Adds weeds at the given positions.
     grow_plants()
         Grows the crops in the simulation area using parallel processing.
+    rebuild_boundary_layer()
+        Rebuilds the boundary layer from the cells of all crops.
     run_simulation()
         Executes the simulation loop for crop and weed growth.
     record_data(date, size, growth_rate, water_level, overlap, size_layer, boundary, weed_size_layer)
         Records the current state of the simulation into the DataFrame.
     """
-    def __init__(self, input_data, weather_data):
+    def __init__(self, input_data, weather_data, executor=None, progress=None):
         """
         Initializes the Simulation instance with the provided input data.
 
@@ -790,25 +730,43 @@ class Simulation:
         ----------
         input_data : dict
             A dictionary containing parameters such as row length, start date, and step size.
+        executor : SerialExecutor, optional
+            The executor shared by all simulations of a run. Without one the
+            simulation creates the executor of its input data and stops it at the end.
+        progress : JobProgress, optional
+            Reports the progress of the simulation to its job.
         """
-        self.weather_data=weather_data
+        self.weather = weather_data if isinstance(weather_data, WeatherSeries) else WeatherSeries.from_records(
+            dict(data, date=date) for date, data in (weather_data or {}).items()
+        )
         self.input_data=input_data
+        # Without a seed the simulation draws one, which makes it differ from every other run
+        seed = self.input_data.get("seed")
+        self.random = RandomStreams(RandomStreams.new_seed() if seed is None else seed)
         length = int(self.input_data["rowLength"])
         self.total_width = int(sum(row["stripWidth"] for row in self.input_data["rows"]))
         self.water_layer = np.full((length, self.total_width), 0.5, dtype=float)
+        self.water_factor = 1
+        self.temp_factor = 1
         self.crop_size_layer = np.zeros((length, self.total_width+2), dtype=float)
         self.crops_pos_layer = np.zeros((length, self.total_width), dtype=bool)
         self.crops_obj_layer = np.full((length, self.total_width), None, dtype=object)
         self.boundary_layer = np.zeros((length, self.total_width), dtype=int)
         self.weeds_size_layer = np.zeros((length, self.total_width), dtype=float)
-        self.weeds_obj_layer = np.full((length, self.total_width), None, dtype=object)
         self.weeds_pos_layer = np.zeros((length, self.total_width), dtype=bool)
+        self.weed_spawn_rate = float(self.input_data.get("weedSpawnRate", 1))
         self.lock = Lock()
+        self.owns_executor = executor is None
+        self.executor = create_executor(input_data) if executor is None else executor
+        self.engine = None
         self.finish = False
         self.current_date = datetime.strptime(
             self.input_data["startDate"] + ":00:00:00", "%Y-%m-%d:%H:%M:%S"
         )
         self.stepsize = int(self.input_data["stepSize"])
+        self.end_date = self.current_date + timedelta(days=SIMULATION_DAYS)
+        # Number of hours the growth curves are tabulated for
+        self.horizon_hours = int((self.end_date - self.current_date).total_seconds() // 3600)
         self.strips = np.array([Strip(
                     strip["stripWidth"],
                     strip["plantType"],
@@ -820,94 +778,124 @@ class Simulation:
                 for index, strip in enumerate(self.input_data["rows"])
             ]
         )
+        # All weeds share one store, their parameters are read once
+        self.weeds = None
+        plant_parameters = [strip.plant_parameters for strip in self.strips]
+        if self.input_data["allowWeedgrowth"]:
+            weed_parameters = Strip.get_plant_parameters("weed")
+            self.weeds = CropStore("weed", weed_parameters, self)
+            plant_parameters.append(weed_parameters)
         self.harvested_plants = np.zeros((length, self.total_width), dtype=float)
+        # Which steps record their maps and at which resolution
+        self.recording = RecordingPolicy.from_input(self.input_data)
+        self.step_index = 0
+        self.progress = progress
+        # Build the circular masks for the largest plant of the simulation up front (they are kept by the process)
+        max_width = max((parameters["W_max"] for parameters in plant_parameters if parameters), default=None)
+        if max_width is not None:
+            circular_masks.preload(int(np.round(max_width / 2)) + 1)
     
   
     def grow_weeds(self, strip):
         """
-        Grows the weeds in parallel using multiple threads or processes to speed up the simulation.
-        Weeds are grown based on the current weed positions and sizes.
+        Grows all weeds with the batched growth of their store, then spawns new weeds.
+        The weeds grow in the order they spawned, each one sees the growth of the ones before it.
         """
         with self.lock:
-            # Extract weeds that are present in the weeds_layer
-
-            weeds = self.weeds_obj_layer[self.weeds_pos_layer]
-            if len(weeds) > 0:
-                weed_list = np.ravel(weeds)
-                np.random.shuffle(weed_list)
-
-                def grow_subset(subset):
-                    for weed in subset:
-                        weed.grow(
-                            self.weeds_size_layer,
-                            self.weeds_obj_layer,
-                            self.weeds_pos_layer,
-                            strip,
-                        )
-
-                num_cores = cpu_count()
-                weed_subsets = np.array_split(weed_list, num_cores)
-                with ThreadPoolExecutor(max_workers=num_cores) as executor:
-                    futures = [
-                        executor.submit(grow_subset, subset) for subset in weed_subsets
-                    ]
-                    for future in futures:
-                        future.result()
-            weed_x = np.random.randint(0, self.crop_size_layer.shape[0], 1)
-            weed_y = np.random.randint(0, self.crop_size_layer.shape[1] - 2, 1)
-            size_at_spot = self.crop_size_layer[weed_x, weed_y]
-            random = np.random.uniform(0, (24 + size_at_spot) / self.stepsize, 1)
-            if random <= 0.2:
-                weed_parameters = Strip.get_plant_parameters("weed")
-                self.weeds_pos_layer[weed_x, weed_y] = True
-                self.weeds_obj_layer[weed_x, weed_y] = Crop(
-                    "weed", (weed_x, weed_y), weed_parameters, self
-                )
+            self.weeds.grow_all(strip, self.weeds_size_layer)
+            self.spawn_weeds()
+
+    def spawn_weeds(self):
+        """
+        Spawns a batch of weeds.
+
+        The number of spots is drawn from a Poisson distribution with a mean of
+        ``weed_spawn_rate``, then the spots and whether a weed spawns on them
+        are drawn at once. A weed spawns on a spot with a chance of
+        0.2 * stepsize / (24 + the size of the crops there), at most 1; spots
+        that have a weed already are left out.
+        """
+        count = self.random.weeds.poisson(self.weed_spawn_rate)
+        if count == 0:
+            return
+        length, width = self.weeds_pos_layer.shape
+        draws = self.random.weeds.random((count, 3))
+        rows = (draws[:, 0] * length).astype(int)
+        cols = (draws[:, 1] * width).astype(int)
+        size_at_spot = self.crop_size_layer[rows, cols]
+        spawns = draws[:, 2] * (24 + size_at_spot) / self.stepsize <= 0.2
+        self.add_weeds(rows[spawns], cols[spawns])
+
+    def add_weeds(self, rows, cols):
+        """
+        Adds weeds at the given positions, at most one per cell and only where there is no weed yet.
+
+        Returns
+        -------
+        np.ndarray
+            The indices of the new weeds in the weed store.
+        """
+        rows = np.asarray(rows, dtype=int)
+        cols = np.asarray(cols, dtype=int)
+        # The first weed of a cell is kept, in the order of the positions
+        _, first = np.unique(rows * self.weeds_pos_layer.shape[1] + cols, return_index=True)
+        first = np.sort(first)
+        rows, cols = rows[first], cols[first]
+        free = ~self.weeds_pos_layer[rows, cols]
+        rows, cols = rows[free], cols[free]
+        self.weeds_pos_layer[rows, cols] = True
+        return self.weeds.add(rows, cols)
 
     def grow_plants(self, strip):
         """
-        Grows the crops in parallel using multiple threads or processes to speed up the simulation.
+        Grows the crops of all strips using the batched growth of the crop stores,
+        or the worker processes of the strip engine if the simulation has one.
         Plants are grown based on their current positions and sizes.
+
+        Here every strip sees the strips before it already grown in this step;
+        with the strip engine, crops at a strip edge see the neighbouring strip
+        as it was at the start of the step, so the results differ slightly.
         """
 
         with self.lock:
-            # Extract crops that are present in the plants_layer
-            crops = self.crops_obj_layer[self.crops_pos_layer]
-            crop_list = np.ravel(crops)  # Flatten the array
-            np.random.shuffle(crop_list)  # Shuffle the crop list
-
-            # Function to grow plants in a specific subset
-            def grow_subset(subset):
-                subset_growthrate = 0
-                subset_overlap = 0
-                for crop in subset:
-                    crop_growthrate, crop_overlap = crop.grow(
-                        self.crop_size_layer,
-                        self.crops_obj_layer,
-                        self.crops_pos_layer,
-                        strip,
-                    )
-                    subset_growthrate += crop_growthrate
-                    subset_overlap += crop_overlap
-                return subset_growthrate, subset_overlap
-
-            # Split the crop list into approximately equal subsets
-            num_cores = cpu_count()
-            crop_subsets = np.array_split(crop_list, num_cores)
-
-            # Execute the grow_subset function in parallel
+            if self.engine is not None:
+                return self.engine.grow(strip)
             growthrate = 0
             overlap = 0
-            with ThreadPoolExecutor(max_workers=num_cores) as executor:
-                futures = [executor.submit(grow_subset, subset) for subset in crop_subsets]
-                for future in futures:
-                    thread_growthrate, thread_overlap = future.result()  # Collect results from each subset
-                    growthrate += thread_growthrate
-                    overlap += thread_overlap
+            # The crops of every strip grow with the sowing date of the given strip
+            for crop_strip in self.strips:
+                strip_growthrate, strip_overlap = crop_strip.crops.grow_all(
+                    strip, self.crop_size_layer
+                )
+                growthrate += strip_growthrate
+                overlap += strip_overlap
 
             return growthrate, overlap
 
 
+    def _crop_stores(self):
+        """
+        Get the stores of all crops and weeds of the simulation.
+        """
+        stores = [strip.crops for strip in self.strips]
+        if self.weeds is not None:
+            stores.append(self.weeds)
+        return stores
+
+    def rebuild_boundary_layer(self):
+        """
+        Rebuild the boundary layer from the current cells of all crops in one pass.
+        """
+        stores = self._crop_stores()
+        cells = [
+            store.ring_cells(np.arange(store.count), store.cell_radius[:store.count])
+            for store in stores
+        ]
+        counts = np.bincount(np.concatenate(cells), minlength=self.boundary_layer.size)
+        self.boundary_layer[:] = counts.reshape(self.boundary_layer.shape)
+        for store in stores:
+            store.boundary_radius[:store.count] = store.cell_radius[:store.count]
+
     def run_simulation(self,iteration_instance):
         """
         Executes the simulation loop for crop and weed growth.
@@ -917,29 +905,84 @@ class Simulation:
 
         for strip in self.strips:
             strip.planting(self)
-        #while not self.finish:
-        while self.current_date < datetime.strptime(self.input_data["startDate"] + ":00:00:00", "%Y-%m-%d:%H:%M:%S") + timedelta(days=53):
-
-            total_growthrate = 0
-            total_overlap = 0
-            start_time = time.time()
-            for strip in self.strips:
-                growthrate,overlap = self.grow_plants(strip)
-                total_growthrate += growthrate
-                total_overlap += overlap
-                if self.input_data["allowWeedgrowth"]:
-                    self.grow_weeds(strip)          
-            end_time = time.time()
-            time_needed = end_time - start_time
-            self.record_data(time_needed,iteration_instance,total_growthrate,total_overlap,)
-            self.current_date += timedelta(hours=self.stepsize)
-
-         #   for strip in self.strips:
-          #    strip.harvesting(self)
+        # Fields with several strips can grow every strip in its own worker process
+        self.engine = self.executor.start_engine(self)
+        # Full maps are recorded every keyframeInterval steps, only the changes in between
+        self.output_writer = OutputWriter(
+            iteration_instance,
+            batch_size=self.input_data.get("writerBatchSize", 10),
+            max_pending=self.input_data.get("writerQueueSize", 8),
+            backpressure=self.input_data.get("writerBackpressure", "block"),
+            keyframe_interval=self.input_data.get("keyframeInterval", 10),
+        )
+        if self.progress is not None:
+            self.progress.start_iteration(int(np.ceil(self.horizon_hours / self.stepsize)))
+        try:
+            #while not self.finish:
+            while self.current_date < self.end_date:
+
+                total_growthrate = 0
+                total_overlap = 0
+                start_time = time.time()
+                self.apply_weather()
+                for strip in self.strips:
+                    growthrate,overlap = self.grow_plants(strip)
+                    total_growthrate += growthrate
+                    total_overlap += overlap
+                    if self.input_data["allowWeedgrowth"]:
+                        self.grow_weeds(strip)          
+                end_time = time.time()
+                time_needed = end_time - start_time
+                data = self.record_data(time_needed,iteration_instance,total_growthrate,total_overlap,)
+                self.current_date += timedelta(hours=self.stepsize)
+                self.step_index += 1
+                if self.progress is not None:
+                    self.progress.step(self.step_index, data)
+
+             #   for strip in self.strips:
+              #    strip.harvesting(self)
+        finally:
+            start_time = time.perf_counter()
+            if self.engine is not None:
+                self.engine.close()
+                self.engine = None
+            if self.owns_executor:
+                self.executor.close()
+            self.executor.overhead += time.perf_counter() - start_time
+            # Write the recorded steps, also if the simulation failed
+            self.output_writer.close()
+        # Starting and stopping workers is recorded apart from the time needed per step
+        iteration_instance.setup_time = self.executor.take_overhead()
+        # The area of the field does not depend on the resolution of the recorded maps
+        iteration_instance.field_length, iteration_instance.field_width = self.crops_pos_layer.shape
+        iteration_instance.save(update_fields=["setup_time", "field_length", "field_width"])
+        # The comparison of iterations reads the summary instead of the outputs
+        summarize(iteration_instance)
+        print(f"Executor setup and teardown: {iteration_instance.setup_time:.3f} s")
+        if self.progress is not None:
+            self.progress.finish_iteration()
         print("Simulation finished.")
 
 
 
+    def apply_weather(self):
+        """
+        Compute the weather factors of the current step and let the rain of the step fall on the field.
+
+        The rain is summed and the temperature averaged over the hours of the step.
+        """
+        self.water_factor = 1
+        self.temp_factor = 1
+        if self.input_data['useWater']:
+            self.water_layer += self.weather.total("rain", self.current_date, self.stepsize) * 0.0001
+            self.water_layer[self.water_layer > 2] = 2
+            optimal_water = 0.5
+            self.water_factor = 1 - abs(self.weather.mean("rain", self.current_date, self.stepsize) - optimal_water) / optimal_water
+        if self.input_data['useTemperature']:
+            optimal_temp = 20
+            #1 if the temperature is optimal, decreasing to 0 at a difference of 100% of the optimal temperature
+            self.temp_factor = 1 - abs(self.weather.mean("temperature", self.current_date, self.stepsize) - optimal_temp) / optimal_temp
+
     def record_data(self,time_needed,iteration_instance,total_growthrate,total_overlap):
         index_where = np.where(self.crops_pos_layer > 0)  
         yields = np.sum(self.crop_size_layer[index_where])*11
@@ -953,21 +996,24 @@ class Simulation:
             "growth": total_growthrate,
             "water": np.sum(self.water_layer),
             "overlap": num_plants-total_overlap,
-            "map": self.crop_size_layer.tolist(),
-            "boundary": self.boundary_layer.tolist(),
-            "weed": self.weeds_size_layer.tolist(),
             "time_needed": time_needed,
             "profit": profit,
-            "temperature": self.weather_data[self.current_date]["temperature"],
-            "rain": self.weather_data[self.current_date]["rain"],
+            "temperature": self.weather.value("temperature", self.current_date),
+            "rain": self.weather.value("rain", self.current_date),
             "num_plants": num_plants,
 
         }
-        output_instance = DataModelOutput(
-            iteration=iteration_instance
-        )
-        output_instance.set_data(data)
-        output_instance.save()
+        # Scalars are recorded every step, the maps only when the recording policy asks for them
+        maps = None
+        last_step = self.current_date + timedelta(hours=self.stepsize) >= self.end_date
+        if self.recording.records_maps(self.step_index, self.current_date, last_step):
+            maps = {
+                "map": self.recording.downsample_map(self.crop_size_layer).astype(SNAPSHOT_DTYPE),
+                "weed": self.recording.downsample_map(self.weeds_size_layer).astype(SNAPSHOT_DTYPE),
+            }
+        # The writer thread encodes and saves the step, the loop only pays for copying the maps
+        self.output_writer.record(data, maps)
+        return data
         """
         # CSV file path (same directory as this script)
         csv_file_path = os.path.join(os.path.dirname(__file__), '6.csv')
@@ -1000,20 +1046,39 @@ class Simulation:
 
 
 
-def main(input_data):
+def main(input_data, progress=None):
     """
     Entry point for running simulations with given input data, considering testing mode adjustments.
+
+    ``progress`` (a ``JobProgress``) is told about every finished step when the
+    run is a background job.
     """
     print(input_data)
+    # The seed is drawn once for all iterations (they use the same random numbers) and saved with the input
+    if input_data.get("seed") in (None, ""):
+        input_data["seed"] = RandomStreams.new_seed()
     input_instance = save_initial_data(input_data)
-    weather_data = fetch_weather_data()
+    weather_data = fetch_weather_data(*weather_window(input_data), site=input_data.get("weatherSite", ""))
+    if progress is not None:
+        progress.start(input_instance, count_iterations(input_data))
+    # One executor is shared by all iterations of the run; a sweep runs them in its own worker processes
+    executor = None if runs_sweep(input_data) else create_executor(input_data)
 
-    if input_data["testingMode"]:
-        print("Running simulation in testing mode.")
-        handle_testing_mode(input_data, input_instance, weather_data)
-    else:
-        print("Running standard simulation.")
-        run_standard_simulation(input_data, input_instance, weather_data)
+    try:
+        if input_data["testingMode"]:
+            print("Running simulation in testing mode.")
+            handle_testing_mode(input_data, input_instance, weather_data, executor, progress)
+        else:
+            print("Running standard simulation.")
+            run_standard_simulation(input_data, input_instance, weather_data, executor, progress)
+    finally:
+        if executor is not None:
+            executor.close()
+        # The workers are stopped after the last iteration, which gets the teardown time
+        last_iteration = input_instance.iterations.order_by('-id').first()
+        if executor is not None and last_iteration is not None:
+            last_iteration.setup_time += executor.take_overhead()
+            last_iteration.save(update_fields=["setup_time"])
     #return the simulation name
     return input_instance.simName
 
@@ -1037,18 +1102,12 @@ def save_initial_data(input_data):
         stepSize=input_data.get('stepSize'),
         rowLength=input_data.get('rowLength'),
         testingMode=input_data.get('testingMode'),
-        simName=input_data.get('simName')
+        simName=input_data.get('simName'),
+        seed=input_data.get('seed'),
     )
     
     # Handle testing data
-    testing_data = input_data.get('testingData', {})
-    if testing_data and input_instance.testingMode:
-        input_instance.testingKey, input_instance.testingValue = next(iter(testing_data.items()), (None, None))
-        if isinstance(input_instance.testingValue, dict):
-            input_instance.testingValue = -99  # or handle accordingly
-    else:
-        input_instance.testingKey = None
-        input_instance.testingValue = None
+    input_instance.set_testing_data(input_data.get('testingData', {}))
     
     # Save the DataModelInput instance to the database
     input_instance.save()
@@ -1070,78 +1129,143 @@ def save_initial_data(input_data):
 
 
 
-def fetch_weather_data():
-    try:
-        # Fetch weather data as a QuerySet of dictionaries
-        weather_data = Weather.objects.values('date', 'rain', 'temperature')
-        weather_data_dict = {}
-
-        for data in weather_data:
-            try:
-                if data["date"] not in [None, 'NaT', '']:
-                    # More flexible parsing that handles a variety of date formats
-                    data['date'] = parser.parse(data["date"])
-                else:
-                    continue  # Skip entries with no valid date
-            except ValueError:
-                print(f"Skipping invalid date format: {data['date']}")
-                continue  # Skip entries with unparseable dates
-
-            weather_data_dict[data['date']] = data
+def fetch_weather_data(start=None, end=None, site=""):
+    """
+    Load the weather of a site (see ``manage.py seed_data``) from ``start`` up
+    to and including ``end`` (all of it without them) as a WeatherSeries; the
+    windows are kept in memory.
+    """
+    return load_weather(start, end, site)
 
-        return weather_data_dict
-    except ObjectDoesNotExist:
-        print("Weather data not found in the database.")
-        return None
+def weather_window(input_data):
+    """
+    Returns the first and the last hour of the weather a run of the input needs
+    (None in testing mode, whose variations may start on other dates).
+    """
+    if input_data.get("testingMode"):
+        return None, None
+    start = datetime.strptime(str(input_data["startDate"]), "%Y-%m-%d")
+    return start, start + timedelta(days=SIMULATION_DAYS)
 
+def count_iterations(input_data):
+    """
+    Returns the number of iterations (simulations) a run of the input data has.
+    """
+    if not input_data["testingMode"]:
+        return 1
+    if is_design(input_data["testingData"]):
+        return len(design_points(input_data["testingData"]))
+    if "rows" in input_data["testingData"]:
+        return len(input_data["rows"])
+    return len(parameter_range(input_data))
 
+def runs_sweep(input_data):
+    """
+    Returns whether the iterations of the input run in the worker processes of a sweep
+    (testing mode with more than one variation and "sweepWorkers" above 1).
+    """
+    return bool(input_data["testingMode"]) and int(input_data.get("sweepWorkers", 1)) > 1 and count_iterations(input_data) > 1
 
-def handle_testing_mode(input_data, input_instance, weather_data):
+def handle_testing_mode(input_data, input_instance, weather_data, executor=None, progress=None):
     """
     Handles variations for testing mode simulations.
     """
-    if "rows" in input_data["testingData"]:
-        handle_row_variations(input_data, input_instance, weather_data)
+    if is_design(input_data["testingData"]):
+        handle_design_variations(input_data, input_instance, weather_data, executor, progress)
+    elif "rows" in input_data["testingData"]:
+        handle_row_variations(input_data, input_instance, weather_data, executor, progress)
     else:
-        handle_parameter_variations(input_data, input_instance, weather_data)
+        handle_parameter_variations(input_data, input_instance, weather_data, executor, progress)
 
-def handle_row_variations(input_data, input_instance, weather_data):
+def handle_row_variations(input_data, input_instance, weather_data, executor=None, progress=None):
     """
     Processes each row variation for testing mode.
     """
-    for row_index, row in enumerate(input_data['rows']):
-        modified_input_data = create_modified_input_data(input_data, row_index)
-        iteration_instance = create_iteration_instance(input_instance, row_index, -99)
-        run_simulation(modified_input_data, weather_data, iteration_instance)
+    variations = [
+        SweepTask(row_index, -99, create_modified_input_data(input_data, row_index))
+        for row_index in range(len(input_data['rows']))
+    ]
+    run_variations(input_data, variations, input_instance, weather_data, executor, progress)
     print("All row variations processed.")
-def handle_parameter_variations(input_data, input_instance, weather_data):
+def parameter_range(input_data):
     """
-    Processes parameter variations for testing mode.
+    Returns the values the tested parameter takes in testing mode.
     """
     testing_key, testing_value = next(iter(input_data["testingData"].items()))
     if testing_key  in input_data["rows"][0]:
         start_value, end_value = sorted([input_data.get(testing_key, input_data["rows"][0][testing_key]), testing_value])
     else:
         start_value, end_value = sorted([input_data.get(testing_key, -99), testing_value])
-    
-    for param_value in range(start_value, end_value + 1):
-        modified_input_data = modify_input_data_for_parameter(input_data, testing_key, param_value)
-        iteration_instance = create_iteration_instance(input_instance, param_value, param_value)
-        run_simulation(modified_input_data, weather_data, iteration_instance)
+    return range(start_value, end_value + 1)
+
+def handle_parameter_variations(input_data, input_instance, weather_data, executor=None, progress=None):
+    """
+    Processes parameter variations for testing mode.
+    """
+    testing_key = next(iter(input_data["testingData"]))
+    variations = [
+        SweepTask(param_value, param_value, modify_input_data_for_parameter(input_data, testing_key, param_value))
+        for param_value in parameter_range(input_data)
+    ]
+    run_variations(input_data, variations, input_instance, weather_data, executor, progress)
     print("All variations processed.")
-def run_standard_simulation(input_data, input_instance, weather_data):
+
+def handle_design_variations(input_data, input_instance, weather_data, executor=None, progress=None):
+    """
+    Processes the points of a multi-dimensional sweep design for testing mode.
+
+    The first numeric parameter of a point is its param_value, so a sweep of
+    one parameter is plotted like the range of testing mode; the full point is
+    stored as SweepPoints.
+    """
+    variations = []
+    for index, point in enumerate(design_points(input_data["testingData"])):
+        modified_input_data = input_data
+        for key, value in point.items():
+            modified_input_data = modify_input_data_for_parameter(modified_input_data, key, value)
+        param_value = next((value for value in point.values() if isinstance(value, (int, float))), -99)
+        variations.append(SweepTask(index, param_value, modified_input_data, point=point))
+    run_variations(input_data, variations, input_instance, weather_data, executor, progress)
+    print("All design points processed.")
+
+def run_variations(input_data, variations, input_instance, weather_data, executor=None, progress=None):
+    """
+    Runs the variations of testing mode, one after another or, with the
+    "sweepWorkers" input, in a pool of worker processes.
+    """
+    sweep_workers = int(input_data.get("sweepWorkers", 1))
+    if runs_sweep(input_data):
+        # The iterations are created up front, in the order of the variations
+        pending = []
+        for task in variations:
+            iteration_instance = create_iteration_instance(input_instance, task.index, task.param_value, task.point)
+            task.iteration_id = iteration_instance.id
+            # The variations run before are not sent to the workers
+            if not link_cached_simulation(task.input_data, weather_data, iteration_instance, progress):
+                pending.append(task)
+        if pending:
+            runtimes = run_sweep(
+                pending, sweep_workers, int(input_data.get("sweepRetries", 1)), progress, input_data.get("weatherSite", ""),
+            )
+            print(f"Sweep of {len(pending)} variations on {sweep_workers} workers, longest {max(runtimes.values()):.1f} s")
+        return
+    for task in variations:
+        iteration_instance = create_iteration_instance(input_instance, task.index, task.param_value, task.point)
+        run_simulation(task.input_data, weather_data, iteration_instance, executor, progress)
+def run_standard_simulation(input_data, input_instance, weather_data, executor=None, progress=None):
     """
     Runs a standard simulation when not in testing mode.
     """
 
     iteration_instance = create_iteration_instance(input_instance, index=1, param_value=-99)
-    run_simulation(input_data, weather_data, iteration_instance)
+    run_simulation(input_data, weather_data, iteration_instance, executor, progress)
 
 def modify_input_data_for_parameter(input_data, key, value):
     """
     Returns a modified copy of input_data with the specified parameter changed.
     """
-    modified_input_data = input_data.copy()
+    # The rows are copied as well, the variations of a sweep exist at the same time
+    modified_input_data = copy.deepcopy(input_data)
     if key in modified_input_data:
         modified_input_data[key] = value
     else:
@@ -1158,19 +1282,52 @@ def create_modified_input_data(original_data, row_index):
     return modified_data
 
 
-def create_iteration_instance(input_instance, index, param_value):
+def create_iteration_instance(input_instance, index, param_value, point=None):
     """
-    Creates a new SimulationIteration instance.
+    Creates a new SimulationIteration instance, with the SweepPoints of its
+    point if it is part of a sweep design.
     """
-    return SimulationIteration.objects.create(
+    iteration_instance = SimulationIteration.objects.create(
         input=input_instance,
         iteration_index=index,
         param_value=param_value
     )
-
-def run_simulation(input_data, weather_data, iteration_instance):
+    if point:
+        sweep_points = []
+        for parameter, value in point.items():
+            sweep_point = SweepPoint(iteration=iteration_instance)
+            sweep_point.set_data(parameter, value)
+            sweep_points.append(sweep_point)
+        SweepPoint.objects.bulk_create(sweep_points)
+    return iteration_instance
+
+def link_cached_simulation(input_data, weather_data, iteration_instance, progress=None, strip_engine=False):
+    """
+    Links the iteration to the results of the same simulation if it was run
+    before (unless the input sets "useCache" to false) and returns whether it was.
+    ``strip_engine`` tells whether the simulation would grow its crops with a strip engine.
+    """
+    if not input_data.get("useCache", True):
+        return False
+    if not link_cached_result(iteration_instance, result_key(input_data, weather_data, strip_engine)):
+        return False
+    print(f"Results of iteration {iteration_instance.iteration_index} found in the result cache.")
+    if progress is not None:
+        progress.start_iteration(0)
+        progress.finish_iteration()
+    return True
+
+def run_simulation(input_data, weather_data, iteration_instance, executor=None, progress=None):
     """
-    Initializes and runs the simulation.
+    Initializes and runs the simulation, or links the results of the same
+    simulation if it was run before.
     """
-    sim = Simulation(input_data, weather_data)
+    # The results of the strip engine and of the serial growth are cached apart
+    strip_engine = uses_strip_engine(input_data, executor)
+    if link_cached_simulation(input_data, weather_data, iteration_instance, progress, strip_engine):
+        return
+    sim = Simulation(input_data, weather_data, executor, progress)
     sim.run_simulation(iteration_instance)
+    # A run whose writer dropped maps under backpressure lacks frames, it is not reused
+    if input_data.get("useCache", True) and not sim.output_writer.dropped:
+        store_result(iteration_instance, result_key(input_data, weather_data, strip_engine))
@@ -0,0 +1,105 @@
+from functools import lru_cache
+from threading import Lock
+
+import numpy as np
+
+
+class CircularMaskCache:
+    """
+    A process-wide cache of circular masks.
+
+    For every radius the cache holds the disk of the crop, the boundary ring
+    around it and the offsets of their cells relative to the center. Radii
+    are small integers bounded by the largest ``W_max`` of the plants, so all
+    masks can be built once and shared by every crop of every simulation.
+
+    Attributes
+    ----------
+    max_radius : int
+        The largest radius that is kept in the cache. Larger masks are built
+        on every call.
+
+    Methods
+    -------
+    preload(radius)
+        Builds all masks up to the given radius.
+    disk(radius)
+        Gets the boolean disk with shape (2*radius+1, 2*radius+1).
+    ring(radius)
+        Gets the boundary ring with shape (2*radius+3, 2*radius+3).
+    disk_offsets(radius), ring_offsets(radius)
+        Gets the (row, column) offsets of the cells of the disk or ring.
+    flat_offsets(radius, row_stride, ring=False)
+        Gets the offsets of the disk (or ring) cells in a flattened layer.
+    """
+
+    def __init__(self, max_radius=128):
+        self.max_radius = max_radius
+        self._disks = []
+        self._rings = []
+        self._disk_offsets = []
+        self._ring_offsets = []
+        self._lock = Lock()
+        self.flat_offsets = lru_cache(maxsize=256)(self._flat_offsets)
+
+    @staticmethod
+    def _build(radius):
+        y, x = np.ogrid[-radius : radius + 1, -radius : radius + 1]
+        disk = x**2 + y**2 <= radius**2
+        # The ring marks every cell with a 4-neighbour in the disk, xor the disk
+        # itself (a disk of radius 0 is part of its own ring)
+        padded = np.pad(disk, 1)
+        neighbours = np.zeros_like(padded)
+        neighbours[1:, :] |= padded[:-1, :]
+        neighbours[:-1, :] |= padded[1:, :]
+        neighbours[:, 1:] |= padded[:, :-1]
+        neighbours[:, :-1] |= padded[:, 1:]
+        ring = neighbours ^ padded
+        disk_offsets = tuple(offset - radius for offset in np.nonzero(disk))
+        ring_offsets = tuple(offset - radius - 1 for offset in np.nonzero(ring))
+        for array in (disk, ring) + disk_offsets + ring_offsets:
+            array.flags.writeable = False
+        return disk, ring, disk_offsets, ring_offsets
+
+    def preload(self, radius):
+        """
+        Build and keep all masks up to the given radius (at most ``max_radius``).
+        """
+        radius = min(int(radius), self.max_radius)
+        with self._lock:
+            for missing in range(len(self._disks), radius + 1):
+                disk, ring, disk_offsets, ring_offsets = self._build(missing)
+                self._disks.append(disk)
+                self._rings.append(ring)
+                self._disk_offsets.append(disk_offsets)
+                self._ring_offsets.append(ring_offsets)
+
+    def _get(self, radius):
+        radius = int(radius)
+        if radius >= len(self._disks):
+            if radius > self.max_radius:
+                return self._build(radius)
+            self.preload(radius)
+        return self._disks[radius], self._rings[radius], self._disk_offsets[radius], self._ring_offsets[radius]
+
+    def disk(self, radius):
+        return self._get(radius)[0]
+
+    def ring(self, radius):
+        return self._get(radius)[1]
+
+    def disk_offsets(self, radius):
+        return self._get(radius)[2]
+
+    def ring_offsets(self, radius):
+        return self._get(radius)[3]
+
+    def _flat_offsets(self, radius, row_stride, ring=False):
+        dy, dx = self.ring_offsets(radius) if ring else self.disk_offsets(radius)
+        offsets = dy * row_stride + dx
+        offsets.flags.writeable = False
+        return offsets
+
+
+# The mask cache shared by all crops of the process
+circular_masks = CircularMaskCache()
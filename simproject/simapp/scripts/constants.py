@@ -0,0 +1,2 @@
+# The days a simulation runs (see Simulation.end_date)
+SIMULATION_DAYS = 53
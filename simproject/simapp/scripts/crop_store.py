@@ -0,0 +1,373 @@
+import numpy as np
+
+from .circular_masks import circular_masks
+from .growth_curve import get_growth_curve
+
+
+class CropStore:
+    """
+    Structure-of-arrays storage for all crops of one strip.
+
+    Instead of keeping one ``Crop`` object per plant, the state of every plant
+    is held in parallel NumPy arrays. ``grow_all`` advances all plants of the
+    store by one step at once. ``Crop`` objects remain available as thin views
+    on a single index of a store.
+
+    Attributes
+    ----------
+    name : str
+        The name of the crop.
+    parameters : dict
+        The plant parameters shared by all crops of the store.
+    growth_curve : GrowthCurve
+        The growth rate curve of the plant, tabulated over the simulation horizon.
+    sim : Simulation
+        The simulation the crops belong to.
+    count : int
+        The number of crops in the store.
+    rows, cols : np.ndarray
+        The center coordinates of the crops.
+    radius : np.ndarray
+        The radius of every crop.
+    overlap : np.ndarray
+        The overlap factor of every crop (1 means no overlap).
+    previous_growth : np.ndarray
+        The growth rate of every crop during the previous time step.
+    moves : np.ndarray
+        The number of moves every crop has made.
+    cell_radius : np.ndarray
+        The rounded radius the cells and boundary of a crop were last built
+        with (-1 if they were never built).
+    boundary_radius : np.ndarray
+        The rounded radius of the ring of a crop that is currently counted in
+        the boundary layer of the simulation (-1 if there is none).
+
+    Methods
+    -------
+    add(rows, cols)
+        Adds crops at the given positions and returns their indices.
+    clear()
+        Removes all crops from the store.
+    get_state(), set_state(state)
+        Gets or replaces the arrays of all crops, e.g. to move the store to
+        another process.
+    update_boundary_layer(indices)
+        Swaps the old boundary rings of crops for their current ones.
+    grow_all(strip, size_layer)
+        Grows every crop of the store by one time step.
+    """
+
+    # The per-crop arrays of the store
+    STATE = ("rows", "cols", "radius", "overlap", "previous_growth", "moves", "cell_radius", "boundary_radius")
+
+    def __init__(self, name, parameters, sim, capacity=64):
+        self.name = name
+        self.parameters = parameters
+        self.sim = sim
+        self.growth_curve = get_growth_curve(parameters, sim.horizon_hours)
+        # Side length of the per-crop cells and boundary arrays
+        self.cells_size = self.parameters["W_max"] + self.parameters["max_moves"] + 2
+        self.count = 0
+        self._stencils = {}
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.rows = np.zeros(capacity, dtype=int)
+        self.cols = np.zeros(capacity, dtype=int)
+        self.radius = np.zeros(capacity, dtype=float)
+        self.overlap = np.ones(capacity, dtype=float)
+        self.previous_growth = np.zeros(capacity, dtype=float)
+        self.moves = np.zeros(capacity, dtype=int)
+        self.cell_radius = np.full(capacity, -1, dtype=int)
+        self.boundary_radius = np.full(capacity, -1, dtype=int)
+
+    def _grow_capacity(self, capacity):
+        state = self.get_state()
+        self._allocate(capacity)
+        for name in self.STATE:
+            getattr(self, name)[:self.count] = state[name]
+
+    def add(self, rows, cols):
+        """
+        Add crops at the given positions.
+
+        Parameters
+        ----------
+        rows, cols : array_like
+            The row and column indices of the new crops.
+
+        Returns
+        -------
+        np.ndarray
+            The indices of the new crops in the store.
+        """
+        rows = np.ravel(rows).astype(int)
+        cols = np.ravel(cols).astype(int)
+        needed = self.count + rows.size
+        if needed > self.rows.size:
+            self._grow_capacity(max(needed, 2 * self.rows.size))
+        indices = np.arange(self.count, needed)
+        self.rows[indices] = rows
+        self.cols[indices] = cols
+        self.count = needed
+        return indices
+
+    def clear(self):
+        """
+        Remove all crops from the store.
+        """
+        # Take the rings of the crops out of the boundary layer
+        self.cell_radius[:self.count] = -1
+        self.update_boundary_layer(np.arange(self.count))
+        self.count = 0
+        self._allocate(self.rows.size)
+
+    def get_state(self):
+        """
+        Get a copy of the arrays of all crops in the store.
+
+        Returns
+        -------
+        dict
+            The array of every name in ``STATE``, cut to the number of crops.
+        """
+        return {name: getattr(self, name)[:self.count].copy() for name in self.STATE}
+
+    def set_state(self, state):
+        """
+        Replace the crops of the store by the crops of a state from ``get_state``.
+
+        The boundary layer is not touched, the rings of the crops are expected
+        to be counted in it already.
+        """
+        count = state["rows"].size
+        self._allocate(max(count, self.rows.size))
+        for name in self.STATE:
+            getattr(self, name)[:count] = state[name]
+        self.count = count
+
+    def cell_stencils(self, rounded_radius):
+        """
+        Get the cells and boundary arrays of a crop whose cells were built
+        with the given rounded radius.
+
+        The arrays are shared between all crops of the store and must not be
+        modified.
+
+        Parameters
+        ----------
+        rounded_radius : int
+            The rounded radius of the cells (-1 for a crop without cells).
+
+        Returns
+        -------
+        tuple
+            The cells array, the boundary array and the number of boundary cells.
+        """
+        stencil = self._stencils.get(rounded_radius)
+        if stencil is None:
+            cells = np.zeros((self.cells_size, self.cells_size), dtype=bool)
+            boundary = np.zeros_like(cells)
+            if rounded_radius >= 0:
+                CropStore._paste_centered(cells, circular_masks.disk(rounded_radius))
+                CropStore._paste_centered(boundary, circular_masks.ring(rounded_radius))
+            cells.flags.writeable = False
+            boundary.flags.writeable = False
+            stencil = (cells, boundary, int(np.sum(boundary)))
+            self._stencils[rounded_radius] = stencil
+        return stencil
+
+    @staticmethod
+    def _paste_centered(target, mask):
+        """
+        Paste a mask into the center of a square array, clipping it at the borders.
+        """
+        offset = target.shape[0] // 2 - mask.shape[0] // 2
+        start = max(offset, 0)
+        end = min(offset + mask.shape[0], target.shape[0])
+        target[start:end, start:end] = mask[start - offset:end - offset, start - offset:end - offset]
+
+    def _stencil_indices(self, indices, rounded_radii, shape, ring=False):
+        """
+        Get the flat indices of the field cells covered by the disks (or rings) of crops.
+
+        Parameters
+        ----------
+        indices : np.ndarray
+            The indices of the crops.
+        rounded_radii : np.ndarray
+            The rounded radius of every crop in ``indices``.
+        shape : tuple
+            The shape of the field layer.
+        ring : bool
+            Whether to use the boundary rings instead of the disks.
+
+        Returns
+        -------
+        tuple
+            The crop index and the flat index of every covered cell that lies
+            inside the field, ordered by crop index.
+        """
+        owners, cells = [], []
+        # A ring reaches one cell further than its disk
+        extent_margin = 1 if ring else 0
+        for rounded_radius in np.unique(rounded_radii):
+            members = indices[rounded_radii == rounded_radius]
+            rows = self.rows[members]
+            cols = self.cols[members]
+            extent = rounded_radius + extent_margin
+            inside = (
+                (rows >= extent) & (rows < shape[0] - extent)
+                & (cols >= extent) & (cols < shape[1] - extent)
+            )
+            # Stencils completely inside the field use the precomputed flat offsets
+            offsets = circular_masks.flat_offsets(rounded_radius, shape[1], ring)
+            flat = (rows[inside] * shape[1] + cols[inside])[:, None] + offsets
+            owners.append(np.repeat(members[inside], offsets.size))
+            cells.append(flat.ravel())
+            # Stencils at the edges of the field are clipped
+            edge = members[~inside]
+            if edge.size:
+                if ring:
+                    dy, dx = circular_masks.ring_offsets(rounded_radius)
+                else:
+                    dy, dx = circular_masks.disk_offsets(rounded_radius)
+                r = rows[~inside, None] + dy
+                c = cols[~inside, None] + dx
+                valid = (r >= 0) & (r < shape[0]) & (c >= 0) & (c < shape[1])
+                owners.append(np.broadcast_to(edge[:, None], r.shape)[valid])
+                cells.append((r * shape[1] + c)[valid])
+        if not owners:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        owners = np.concatenate(owners)
+        # Keep the crops in store order, like a serial pass over the crops
+        order = np.argsort(owners, kind="stable")
+        return owners[order], np.concatenate(cells)[order]
+
+    def ring_cells(self, indices, rounded_radii):
+        """
+        Get the flat indices of the boundary layer cells covered by the rings
+        of the given crops. Crops with a negative radius have no ring.
+        """
+        has_ring = rounded_radii >= 0
+        return self._stencil_indices(
+            indices[has_ring], rounded_radii[has_ring], self.sim.boundary_layer.shape, ring=True
+        )[1]
+
+    def overlap_factors(self, indices, occupied, first_cover=None):
+        """
+        Calculate the overlap factors of crops from the occupied cells of the field.
+
+        Every crop labels the cells of its boundary ring. The ring cells that
+        are occupied by other crops are counted per crop with one bincount,
+        relative to the size of the ring. Ring cells outside the field are
+        never occupied, so crops at the field edges and next to other strips
+        are handled like all others.
+
+        Parameters
+        ----------
+        indices : array_like
+            The indices of the crops.
+        occupied : np.ndarray
+            A field layer that is greater than 0 where the field is occupied.
+        first_cover : np.ndarray, optional
+            A field layer with the index of the first crop of this store that
+            covered a cell in the current step. A cell counts as occupied for a
+            crop if a crop up to its own index covered it.
+
+        Returns
+        -------
+        np.ndarray
+            The overlap factor of every crop between 0 (maximum overlap) and
+            1 (no overlap).
+        """
+        indices = np.asarray(indices, dtype=int)
+        rounded_radii = self.cell_radius[indices]
+        has_ring = rounded_radii >= 0
+        owners, cells = self._stencil_indices(
+            indices[has_ring], rounded_radii[has_ring], occupied.shape, ring=True
+        )
+        hit = occupied.reshape(-1)[cells] > 0
+        if first_cover is not None:
+            hit |= first_cover.reshape(-1)[cells] <= owners
+        # The ring of a crop with radius 0 contains its center, which is the crop itself
+        hit &= cells != self.rows[owners] * occupied.shape[1] + self.cols[owners]
+        total_overlap = np.bincount(owners[hit], minlength=self.count)[indices]
+
+        ring_sizes = np.zeros(indices.size, dtype=int)
+        unique_radii, inverse = np.unique(rounded_radii[has_ring], return_inverse=True)
+        sizes = np.array([circular_masks.ring_offsets(radius)[0].size for radius in unique_radii], dtype=int)
+        ring_sizes[has_ring] = sizes[inverse]
+        relative_overlap = np.divide(
+            total_overlap, ring_sizes, out=np.zeros(indices.size), where=ring_sizes > 0
+        )
+        maxoverlap = 0.07
+        return np.clip(1 - (relative_overlap / maxoverlap), 0, 1)
+
+    def update_boundary_layer(self, indices):
+        """
+        Swap the boundary rings of the given crops in the boundary layer.
+
+        The ring a crop last added to the boundary layer is subtracted and the
+        ring of its current cells is added, so the layer counts how many crop
+        boundaries cover every cell.
+
+        Parameters
+        ----------
+        indices : array_like
+            The indices of the crops whose cells changed.
+        """
+        indices = np.asarray(indices, dtype=int)
+        indices = indices[self.boundary_radius[indices] != self.cell_radius[indices]]
+        if indices.size == 0:
+            return
+        boundary_layer = self.sim.boundary_layer.reshape(-1)
+        np.subtract.at(boundary_layer, self.ring_cells(indices, self.boundary_radius[indices]), 1)
+        np.add.at(boundary_layer, self.ring_cells(indices, self.cell_radius[indices]), 1)
+        self.boundary_radius[indices] = self.cell_radius[indices]
+
+    def grow_all(self, strip, size_layer):
+        """
+        Grow every crop of the store by one time step.
+
+        The result is the same as calling ``Crop.grow`` for every crop in
+        store order: each crop sees the growth that the crops before it added
+        to the size layer in this step.
+
+        Parameters
+        ----------
+        strip : Strip
+            The strip whose sowing date drives the growth curve.
+        size_layer : np.ndarray
+            The layer the growth is added to.
+
+        Returns
+        -------
+        tuple
+            The summed growth rate and the summed overlap of all crops.
+        """
+        n = self.count
+        if n == 0:
+            return 0, 0
+        t_diff_hours = (self.sim.current_date - strip.sowing_date).total_seconds() / 3600
+        growth_rate = abs(self.growth_curve.rate(t_diff_hours) * self.sim.stepsize)
+        growth = growth_rate * self.overlap[:n]
+        self.previous_growth[:n] = growth
+        np.subtract.at(self.sim.water_layer, (self.rows[:n], self.cols[:n]), 0.1 * growth)
+
+        # Occupied cells before this step and the first crop that covers a cell in this step
+        occupied = size_layer > 0
+        first_cover = np.full(size_layer.shape, n, dtype=np.int64)
+        rounded_radii = np.round(self.radius[:n] / 2).astype(int)
+        owners, cells = self._stencil_indices(np.arange(n), rounded_radii, size_layer.shape)
+        np.add.at(size_layer.reshape(-1), cells, growth[owners])
+        growing = growth[owners] > 0
+        np.minimum.at(first_cover.reshape(-1), cells[growing], owners[growing])
+
+        self.radius[:n] = np.minimum(self.radius[:n] + growth, self.parameters["W_max"])
+        rounded_radii = np.round(self.radius[:n] / 2).astype(int)
+        changed = np.flatnonzero(rounded_radii != np.round(growth / 2).astype(int))
+        self.overlap[changed] = self.overlap_factors(changed, occupied, first_cover)
+        self.cell_radius[changed] = rounded_radii[changed]
+        self.update_boundary_layer(changed)
+        return np.sum(growth), np.sum(self.overlap[:n])
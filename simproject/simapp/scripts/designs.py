@@ -0,0 +1,183 @@
+import itertools
+
+import numpy as np
+from scipy.stats import qmc
+
+# The designs of a multi-dimensional sweep
+DESIGNS = ("grid", "lhs", "sobol")
+# A sweep is refused if it has more points, which mostly protects against a grid with a tiny step
+MAX_SWEEP_POINTS = 1000
+# The inputs that are whole numbers (the sizes are cells of the field, in cm)
+INTEGER_INPUTS = ("stepSize", "rowLength", "stripWidth", "rowSpacing", "numSets")
+
+
+class SweepParameter:
+    """
+    A parameter varied by a sweep design.
+
+    The parameter either takes a list of ``values`` (which may be names, like
+    a planting type) or ranges from ``start`` to ``end``. A grid takes every
+    ``step`` of the range; the sampling designs take any value of the range,
+    rounded to the ``step`` if there is one.
+
+    Attributes
+    ----------
+    name : str
+        The input key of the parameter (e.g. "stripWidth").
+    values : list
+        The values of the parameter (None for a range).
+    start, end, step : float
+        The range of the parameter (None for a list of values).
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.values = None
+        self.start = self.end = self.step = None
+        if isinstance(spec, dict) and "values" in spec:
+            self.values = list(spec["values"])
+            if not self.values:
+                raise ValueError(f"Sweep parameter {name!r} has no values")
+        elif isinstance(spec, dict) and "start" in spec and "end" in spec:
+            self.start, self.end = sorted([_number(name, spec["start"]), _number(name, spec["end"])])
+            if spec.get("step") is not None:
+                self.step = _number(name, spec["step"])
+                if self.step <= 0:
+                    raise ValueError(f"Sweep parameter {name!r} needs a positive step")
+        else:
+            raise ValueError(f"Sweep parameter {name!r} needs 'values' or 'start' and 'end'")
+
+    @property
+    def integer(self):
+        """
+        Whether the parameter only takes whole numbers (an integer input or a
+        range with whole bounds and a whole step; a range without a step
+        takes any number in between).
+        """
+        if self.values is not None:
+            return False
+        if self.name in INTEGER_INPUTS:
+            return True
+        if self.step is None:
+            return False
+        return all(float(bound).is_integer() for bound in (self.start, self.end, self.step))
+
+    def grid_values(self):
+        """
+        The values of the parameter in a grid design.
+        """
+        if self.values is not None:
+            return self.values
+        if self.step is None:
+            if self.start != self.end:
+                raise ValueError(f"Sweep parameter {self.name!r} needs a step in a grid design")
+            return [self._cast(self.start)]
+        if self.name in INTEGER_INPUTS and not float(self.step).is_integer():
+            raise ValueError(f"Sweep parameter {self.name!r} takes whole numbers, its step cannot be {self.step}")
+        # The count is rounded, so a float step like 0.1 does not lose the end to rounding errors
+        count = int(np.floor((self.end - self.start) / self.step + 1e-9)) + 1
+        return [self._cast(self.start + index * self.step) for index in range(count)]
+
+    def sample_value(self, unit):
+        """
+        The value of the parameter at a point of the unit interval, as drawn by a sampling design.
+        """
+        if self.values is not None:
+            return self.values[min(int(unit * len(self.values)), len(self.values) - 1)]
+        value = self.start + unit * (self.end - self.start)
+        if self.step is not None:
+            value = min(self.start + round((value - self.start) / self.step) * self.step, self.end)
+        return self._cast(value)
+
+    def _cast(self, value):
+        # The steps are added up in floats, 0.1 + 0.2 is stored as 0.3
+        return int(round(value)) if self.integer else round(float(value), 10)
+
+
+def _number(name, value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Sweep parameter {name!r} has a range bound that is not a number: {value!r}")
+
+
+def is_design(testing_data):
+    """
+    Whether the testing data of an input describes a multi-dimensional sweep design.
+    """
+    return isinstance(testing_data, dict) and "parameters" in testing_data
+
+
+def parse_parameters(testing_data):
+    """
+    Get the SweepParameters of a sweep design, in the order of the input.
+    """
+    parameters = testing_data.get("parameters")
+    if not isinstance(parameters, dict) or not parameters:
+        raise ValueError("A sweep design needs at least one parameter")
+    return [SweepParameter(name, spec) for name, spec in parameters.items()]
+
+
+def design_points(testing_data):
+    """
+    Get the points of a sweep design.
+
+    The testing data of the input has the form::
+
+        {
+            "design": "grid",  # or "lhs" (Latin hypercube) or "sobol"
+            "parameters": {
+                "stripWidth": {"start": 30, "end": 60, "step": 10},
+                "rowSpacing": {"values": [15, 20, 25]},
+                "plantingType": {"values": ["grid", "alternating"]},
+            },
+            "samples": 16,  # the number of points of "lhs" and "sobol" (a power of two for "sobol")
+            "seed": 1,  # the seed of "lhs" and "sobol" (optional)
+        }
+
+    Parameters
+    ----------
+    testing_data : dict
+        The "testingData" of the input.
+
+    Returns
+    -------
+    list
+        The points, each a dict of the parameter values by their names.
+
+    Raises
+    ------
+    ValueError
+        If the design is unknown, a parameter is invalid, the design has too
+        many points or a Sobol design has a number of samples that is not a
+        power of two.
+    """
+    design = testing_data.get("design", "grid")
+    if design not in DESIGNS:
+        raise ValueError(f"Unknown sweep design {design!r}, expected one of {', '.join(DESIGNS)}")
+    parameters = parse_parameters(testing_data)
+    names = [parameter.name for parameter in parameters]
+
+    if design == "grid":
+        axes = [parameter.grid_values() for parameter in parameters]
+        size = int(np.prod([len(axis) for axis in axes]))
+        if size > MAX_SWEEP_POINTS:
+            raise ValueError(f"The sweep grid has {size} points, more than {MAX_SWEEP_POINTS}")
+        return [dict(zip(names, values)) for values in itertools.product(*axes)]
+
+    samples = int(testing_data.get("samples", 0))
+    if not 0 < samples <= MAX_SWEEP_POINTS:
+        raise ValueError(f"A {design} design needs between 1 and {MAX_SWEEP_POINTS} samples")
+    # Other numbers of Sobol points lose the balance of the sequence (scipy warns about it)
+    if design == "sobol" and samples & (samples - 1):
+        raise ValueError(f"A sobol design needs a power of two samples, not {samples}")
+    seed = testing_data.get("seed")
+    if design == "lhs":
+        sampler = qmc.LatinHypercube(len(parameters), rng=seed)
+    else:
+        sampler = qmc.Sobol(len(parameters), rng=seed)
+    units = sampler.random(samples)
+    return [
+        {parameter.name: parameter.sample_value(unit) for parameter, unit in zip(parameters, row)}
+        for row in units
+    ]
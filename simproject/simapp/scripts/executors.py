@@ -0,0 +1,196 @@
+import multiprocessing
+import threading
+import time
+
+from .strip_engine import StripEngine, run_worker
+
+
+class SerialExecutor:
+    """
+    Runs the work of a simulation in the simulation process, one item after another.
+
+    Executors are created once per run and shared by all strips, steps and
+    testing mode iterations, so their workers are only started once. The time
+    to start and stop the workers is collected in ``overhead``.
+
+    Attributes
+    ----------
+    backend : str
+        The name of the backend.
+    workers : int
+        The number of workers.
+    overhead : float
+        The time (in seconds) spent starting and stopping workers that was not
+        yet taken with ``take_overhead``.
+
+    Methods
+    -------
+    start_engine(sim)
+        Starts a strip engine for the simulation (None if the backend grows
+        the crops in the simulation process).
+    take_overhead()
+        Gets and resets the collected start and stop time.
+    close()
+        Stops the workers.
+    """
+
+    backend = "serial"
+
+    def __init__(self, workers=1):
+        self.workers = 1
+        self.overhead = 0
+
+    def start_engine(self, sim):
+        return None
+
+    def take_overhead(self):
+        overhead = self.overhead
+        self.overhead = 0
+        return overhead
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ProcessExecutor(SerialExecutor):
+    """
+    Keeps long-lived worker processes that grow the crops of the strips.
+
+    The workers are used by the strip engines of the simulations; the weeds
+    grow in the simulation process. Fields with a single strip grow like with
+    the ``SerialExecutor``. On fields with several strips, crops that reach
+    across a strip edge see the neighbouring strip as it was at the start of
+    the step, while the serial growth lets every strip see the strips before
+    it already grown, so the results differ slightly (see ``StripEngine``).
+    """
+
+    backend = "process"
+
+    def __init__(self, workers=None, start_method="spawn"):
+        start_time = time.perf_counter()
+        self.workers = workers or multiprocessing.cpu_count()
+        context = multiprocessing.get_context(start_method)
+        self._connections = []
+        self._workers = []
+        for _ in range(self.workers):
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=run_worker, args=(worker_connection,), daemon=True)
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._workers.append(process)
+        self.overhead = time.perf_counter() - start_time
+
+    def start_engine(self, sim):
+        # A field with a single strip has nothing to split
+        if len(sim.strips) < 2:
+            return None
+        start_time = time.perf_counter()
+        engine = StripEngine(sim, self._connections)
+        self.overhead += time.perf_counter() - start_time
+        return engine
+
+    def close(self):
+        start_time = time.perf_counter()
+        for connection in self._connections:
+            try:
+                connection.send(("stop",))
+            except OSError:
+                # The worker died and closed its end of the pipe
+                pass
+            finally:
+                connection.close()
+        for worker in self._workers:
+            worker.join()
+        self._connections = []
+        self._workers = []
+        self.overhead += time.perf_counter() - start_time
+
+
+class ThreadExecutor(ProcessExecutor):
+    """
+    Runs the workers of the strip engines as threads of the simulation process.
+
+    The threads run the same worker loop as the processes of the
+    ``ProcessExecutor`` and get the same commands through pipes, so the strip
+    engine works alike with both. Threads start without a new interpreter and
+    attach the shared layers in the same process, but the parts of the growth
+    that hold the GIL run one at a time.
+    """
+
+    backend = "thread"
+
+    def __init__(self, workers=None):
+        start_time = time.perf_counter()
+        self.workers = workers or multiprocessing.cpu_count()
+        self._connections = []
+        self._workers = []
+        for index in range(self.workers):
+            connection, worker_connection = multiprocessing.Pipe()
+            # The worker closes its end of the pipe when it stops
+            thread = threading.Thread(target=run_worker, args=(worker_connection,), name=f"strip-worker-{index}", daemon=True)
+            thread.start()
+            self._connections.append(connection)
+            self._workers.append(thread)
+        self.overhead = time.perf_counter() - start_time
+
+
+EXECUTORS = {
+    "serial": SerialExecutor,
+    "thread": ThreadExecutor,
+    "process": ProcessExecutor,
+}
+
+
+def create_executor(input_data):
+    """
+    Create the executor configured in the input data.
+
+    Parameters
+    ----------
+    input_data : dict
+        The input data of the simulation. ``workers`` is the number of workers
+        (default 1) and ``executor`` the backend, one of "serial", "thread" or
+        "process" (default "process" for more than one worker).
+
+    Returns
+    -------
+    SerialExecutor
+        The executor.
+    """
+    backend = executor_backend(input_data)
+    if backend not in EXECUTORS:
+        raise ValueError(f"Unknown executor backend: {backend}")
+    return EXECUTORS[backend](int(input_data.get("workers", 1)))
+
+
+def executor_backend(input_data):
+    """
+    Get the name of the executor backend configured in the input data (see ``create_executor``).
+    """
+    return input_data.get("executor", "process" if int(input_data.get("workers", 1)) > 1 else "serial")
+
+
+def uses_strip_engine(input_data, executor=None):
+    """
+    Whether a simulation of the input data grows its crops with a ``StripEngine``.
+
+    That is the case for a field with several strips run with the process or
+    the thread backend, whose crops at the strip edges grow slightly
+    differently from the serial growth.
+
+    Parameters
+    ----------
+    input_data : dict
+        The input data of the simulation.
+    executor : SerialExecutor, optional
+        The executor the simulation runs with (the one of its input data without it).
+    """
+    backend = executor_backend(input_data) if executor is None else executor.backend
+    return backend in (ProcessExecutor.backend, ThreadExecutor.backend) and len(input_data.get("rows", [])) > 1
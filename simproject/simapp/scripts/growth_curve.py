@@ -0,0 +1,103 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+class GrowthCurve:
+    """
+    The Richards-type growth rate curve of a plant, tabulated per hour since sowing.
+
+    All plants of a strip share the same sowing date, so the growth rate of
+    the curve only depends on the hours since sowing. The curve is evaluated
+    once for the whole simulation horizon and looked up afterwards.
+
+    Attributes
+    ----------
+    h : float
+        The asymptotic maximum size (``H_max`` of the plant).
+    r : float
+        The growth rate constant (``k`` of the plant).
+    m : float
+        The shape factor of the curve (``n`` of the plant).
+    b : float
+        The scaling factor affecting the steepness (``b`` of the plant).
+    table : np.ndarray
+        The growth rate for every full hour since sowing up to the horizon.
+
+    Methods
+    -------
+    evaluate(t_diff_hours)
+        Evaluates the curve for the given hours since sowing.
+    rate(t_diff_hours)
+        Looks up the growth rate for the given hours since sowing.
+    """
+
+    def __init__(self, h, r, m, b, horizon_hours=0):
+        self.h = h
+        self.r = r
+        self.m = m
+        self.b = b
+        self.table = self.evaluate(np.arange(int(horizon_hours) + 1, dtype=float))
+        self.table.flags.writeable = False
+
+    def evaluate(self, t_diff_hours):
+        """
+        Evaluate the growth rate curve.
+
+        Parameters
+        ----------
+        t_diff_hours : float or np.ndarray
+            Hours since the sowing date.
+
+        Returns
+        -------
+        float or np.ndarray
+            The growth rate per hour (without step size and overlap).
+        """
+        h, r, m, b = self.h, self.r, self.m, self.b
+        x = t_diff_hours
+        return (h*b*r)/(m-1)*np.exp(-r*x)*(1+b*np.exp(-r*x))**(m/(1-m))
+
+    def rate(self, t_diff_hours):
+        """
+        Get the growth rate for the given hours since sowing.
+
+        Full hours inside the horizon are read from the table, all other
+        times are evaluated directly.
+        """
+        hour = int(t_diff_hours)
+        if hour == t_diff_hours and 0 <= hour < self.table.size:
+            return self.table[hour]
+        return self.evaluate(t_diff_hours)
+
+
+@lru_cache(maxsize=64)
+def _cached_growth_curve(h, r, m, b, horizon_hours):
+    return GrowthCurve(h, r, m, b, horizon_hours)
+
+
+def get_growth_curve(parameters, horizon_hours=0):
+    """
+    Get the growth curve for the given plant parameters.
+
+    Curves are shared between all stores with the same parameters and horizon.
+
+    Parameters
+    ----------
+    parameters : dict
+        The plant parameters as returned by ``Strip.get_plant_parameters``.
+    horizon_hours : int
+        The number of hours since sowing the curve is tabulated for.
+
+    Returns
+    -------
+    GrowthCurve
+        The growth curve of the plant.
+    """
+    return _cached_growth_curve(
+        float(parameters["H_max"]),
+        float(parameters["k"]),
+        float(parameters["n"]),
+        float(parameters["b"]),
+        int(horizon_hours),
+    )
@@ -0,0 +1,223 @@
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from ..models import DataModelInput, SimulationJob
+from .calculate import main
+
+# A running job whose worker has not reported for this long is failed
+STALE_AFTER = timedelta(minutes=10)
+# The metrics of the last step that are reported with the progress
+PROGRESS_METRICS = ("yield", "growth", "water", "overlap", "profit", "num_plants")
+
+logger = logging.getLogger(__name__)
+
+
+class SimulationNameTaken(ValueError):
+    """
+    Raised when a simulation of the same name exists or is queued.
+    """
+
+
+def enqueue(input_data):
+    """
+    Queue a simulation run for the workers.
+
+    Parameters
+    ----------
+    input_data : dict
+        The input data of the simulation, as taken by ``calculate.main``.
+
+    Returns
+    -------
+    SimulationJob
+        The queued job.
+
+    Raises
+    ------
+    SimulationNameTaken
+        If a simulation of the same name was run or is queued.
+    """
+    sim_name = input_data.get("simName")
+    if (
+        DataModelInput.objects.filter(simName=sim_name).exists()
+        or SimulationJob.objects.filter(sim_name=sim_name, status__in=SimulationJob.ACTIVE).exists()
+    ):
+        raise SimulationNameTaken(f"A simulation named {sim_name!r} already exists")
+    # The check above is only a shortcut; of two requests that pass it at once the
+    # unique constraint on the name of the active jobs lets one create its job
+    try:
+        with transaction.atomic():
+            return SimulationJob.objects.create(sim_name=sim_name, input_data=input_data)
+    except IntegrityError:
+        raise SimulationNameTaken(f"A simulation named {sim_name!r} already exists") from None
+
+
+def claim_job(worker):
+    """
+    Claim the oldest queued job.
+
+    The claim is a conditional update, so two workers never run the same job,
+    also when they run in different processes.
+
+    Parameters
+    ----------
+    worker : str
+        The name of the claiming worker.
+
+    Returns
+    -------
+    SimulationJob
+        The claimed job (None if the queue is empty).
+    """
+    queued = SimulationJob.objects.filter(status=SimulationJob.QUEUED).order_by("created_at", "id")
+    for job_id in queued.values_list("id", flat=True)[:10]:
+        now = timezone.now()
+        claimed = SimulationJob.objects.filter(id=job_id, status=SimulationJob.QUEUED).update(
+            status=SimulationJob.RUNNING, worker=worker, started_at=now, heartbeat=now,
+        )
+        if claimed:
+            return SimulationJob.objects.get(id=job_id)
+    return None
+
+
+def fail_stale_jobs():
+    """
+    Fail the running jobs whose worker stopped reporting (e.g. was killed).
+
+    Returns
+    -------
+    int
+        The number of failed jobs.
+    """
+    return SimulationJob.objects.filter(
+        status=SimulationJob.RUNNING, heartbeat__lt=timezone.now() - STALE_AFTER,
+    ).update(
+        status=SimulationJob.FAILED, finished_at=timezone.now(), error="The worker stopped reporting progress.",
+    )
+
+
+class JobProgress:
+    """
+    Writes the progress of a simulation run to its job.
+
+    The steps are reported by the simulation; they are written at most every
+    ``interval`` seconds, so a fast simulation does not wait for the database.
+
+    Attributes
+    ----------
+    job : SimulationJob
+        The job of the run.
+    interval : float
+        The minimal time (in seconds) between two writes of the step progress.
+
+    Methods
+    -------
+    start(input_instance, total_iterations)
+        Reports the saved input and the number of iterations of the run.
+    start_iteration(total_steps)
+        Reports the start of an iteration.
+    step(step, data)
+        Reports a finished step and its scalar values.
+    finish_iteration()
+        Reports the end of an iteration.
+    heartbeat()
+        Reports that the run is alive while it has no step to report.
+    """
+
+    def __init__(self, job, interval=0.5):
+        self.job = job
+        self.interval = interval
+        self._written = 0
+        self._step = 0
+        self._data = None
+
+    def _update(self, **fields):
+        fields["heartbeat"] = timezone.now()
+        SimulationJob.objects.filter(id=self.job.id).update(**fields)
+        for name, value in fields.items():
+            setattr(self.job, name, value)
+        self._written = time.monotonic()
+
+    def start(self, input_instance, total_iterations):
+        self._update(input=input_instance, total_iterations=total_iterations)
+
+    def start_iteration(self, total_steps):
+        self._step = 0
+        self._data = None
+        self._update(step=0, total_steps=total_steps)
+
+    def step(self, step, data):
+        self._step = step
+        self._data = data
+        if time.monotonic() - self._written >= self.interval:
+            self._update(step=step, metrics=self._metrics())
+
+    def finish_iteration(self):
+        # The last step is always written, also if it came within the interval
+        self._update(iteration=self.job.iteration + 1, step=self._step, metrics=self._metrics())
+
+    def heartbeat(self):
+        # E.g. while a sweep waits for its worker processes, which do not report their steps
+        if time.monotonic() - self._written >= self.interval:
+            self._update()
+
+    def _metrics(self):
+        if self._data is None:
+            return None
+        metrics = {name: float(self._data[name]) for name in PROGRESS_METRICS}
+        date = self._data["date"]
+        metrics["date"] = date.isoformat() if isinstance(date, datetime) else str(date)
+        return metrics
+
+
+def run_job(job):
+    """
+    Run a claimed job and record whether it finished or failed.
+
+    Parameters
+    ----------
+    job : SimulationJob
+        The job, claimed with ``claim_job``.
+    """
+    # A job that was failed as stale in the meantime stays failed
+    running = SimulationJob.objects.filter(id=job.id, status=SimulationJob.RUNNING)
+    try:
+        main(job.input_data, progress=JobProgress(job))
+    except Exception:
+        running.update(status=SimulationJob.FAILED, finished_at=timezone.now(), error=traceback.format_exc())
+    else:
+        running.update(status=SimulationJob.FINISHED, finished_at=timezone.now(), heartbeat=timezone.now())
+
+
+def work(worker=None, poll_interval=1.0, burst=False):
+    """
+    Run queued jobs, one after another, until stopped.
+
+    Parameters
+    ----------
+    worker : str, optional
+        The name of the worker (default: host and process id).
+    poll_interval : float
+        The time (in seconds) to wait before looking at an empty queue again.
+    burst : bool
+        Whether to return when the queue is empty instead of waiting.
+    """
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        close_old_connections()
+        fail_stale_jobs()
+        job = claim_job(worker)
+        if job is None:
+            if burst:
+                return
+            time.sleep(poll_interval)
+            continue
+        logger.info("[%s] Running job %s (%s)", worker, job.id, job.sim_name)
+        run_job(job)
@@ -0,0 +1,138 @@
+import itertools
+import queue
+import threading
+
+from django.db import connection, transaction
+
+from ..models import DataModelOutput
+from ..snapshots import DeltaEncoder
+
+BACKPRESSURE_POLICIES = ("block", "drop_maps")
+
+
+class OutputWriter:
+    """
+    Writes the recorded steps of a simulation in a background thread.
+
+    The simulation hands every step to ``record`` with a copy of its maps and
+    continues. The writer thread encodes the maps and inserts the outputs
+    with ``bulk_create``, one transaction per ``batch_size`` steps.
+
+    At most ``max_pending`` steps with maps wait in the queue. When the queue
+    is full, the backpressure policy decides: "block" waits for the writer,
+    "drop_maps" records the step without its maps (the scalars are always
+    written).
+
+    Attributes
+    ----------
+    iteration : SimulationIteration
+        The iteration the outputs belong to.
+    batch_size : int
+        The number of outputs inserted in one transaction.
+    max_pending : int
+        The number of steps with maps that may wait in the queue.
+    backpressure : str
+        The policy when the queue is full ("block" or "drop_maps").
+    encoder : DeltaEncoder
+        Encodes the maps as keyframes and deltas.
+    dropped : int
+        The number of steps whose maps were dropped.
+
+    Methods
+    -------
+    record(data, maps)
+        Queues a step for writing.
+    close()
+        Writes all queued steps and stops the writer thread.
+    """
+
+    def __init__(self, iteration, batch_size=10, max_pending=8, backpressure="block", keyframe_interval=10):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {backpressure}")
+        self.iteration = iteration
+        self.batch_size = max(int(batch_size), 1)
+        self.max_pending = max(int(max_pending), 1)
+        self.backpressure = backpressure
+        self.encoder = DeltaEncoder(keyframe_interval)
+        self.dropped = 0
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, data, maps=None):
+        """
+        Queue a step for writing.
+
+        Parameters
+        ----------
+        data : dict
+            The scalar values of the step, as taken by ``DataModelOutput.set_data``.
+        maps : dict, optional
+            The "map" and "weed" arrays of the step. The writer keeps them, so
+            they must not be changed afterwards.
+        """
+        self._raise_error()
+        if maps is not None:
+            if not self._slots.acquire(blocking=self.backpressure == "block"):
+                maps = None
+                self.dropped += 1
+        self._queue.put((data, maps))
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError("Writing the simulation outputs failed") from self._error
+
+    def _run(self):
+        batch = []
+        try:
+            for step in itertools.count():
+                item = self._queue.get()
+                if item is None:
+                    break
+                data, maps = item
+                try:
+                    # After an error the queue is only drained, so record never blocks
+                    if self._error is None:
+                        output = DataModelOutput(iteration=self.iteration, step=step)
+                        output.set_data(data)
+                        if maps is not None:
+                            _, keyframe, snapshots = self.encoder.encode(maps)
+                            output.set_snapshots(step, keyframe, snapshots)
+                        batch.append(output)
+                        if len(batch) >= self.batch_size:
+                            self._flush(batch)
+                except Exception as error:
+                    self._error = error
+                finally:
+                    if maps is not None:
+                        self._slots.release()
+            if self._error is None:
+                self._flush(batch)
+        except Exception as error:
+            self._error = error
+        finally:
+            # The thread has its own database connection
+            connection.close()
+
+    @staticmethod
+    def _flush(batch):
+        if batch:
+            with transaction.atomic():
+                DataModelOutput.objects.bulk_create(batch)
+            batch.clear()
+
+    def close(self):
+        """
+        Write all queued steps and stop the writer thread.
+
+        Raises
+        ------
+        RuntimeError
+            If writing an output failed.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
@@ -0,0 +1,54 @@
+import secrets
+
+import numpy as np
+
+
+class RandomStreams:
+    """
+    The random number generators of one simulation.
+
+    Every source of randomness draws from its own stream, spawned from the
+    seed of the simulation, so planting more plants does not change where the
+    weeds spawn, and two runs with the same seed draw the same numbers. The
+    variations of a sweep use the seed of the sweep, so they are compared
+    with the same random numbers.
+
+    Attributes
+    ----------
+    seed : int
+        The seed of the streams.
+    planting : np.random.Generator
+        Draws the positions of the random planting.
+    weeds : np.random.Generator
+        Draws how many weeds spawn and where.
+
+    Methods
+    -------
+    new_seed()
+        Draws a seed for a simulation that was not given one.
+    """
+
+    # The streams are spawned in this order, a new one is appended so the others keep their numbers
+    STREAMS = ("planting", "weeds")
+
+    def __init__(self, seed):
+        self.seed = int(seed)
+        children = np.random.SeedSequence(self.seed).spawn(len(self.STREAMS))
+        for name, child in zip(self.STREAMS, children):
+            setattr(self, name, np.random.Generator(np.random.PCG64(child)))
+
+    @staticmethod
+    def new_seed():
+        # 53 bits, so the seed is exact as a JSON number in the browser as well
+        return secrets.randbits(53)
+
+
+def draws_random_numbers(input_data):
+    """
+    Whether a simulation of the input data draws random numbers.
+
+    Only the random planting and the weeds do, so the seed of any other
+    simulation does not change its results.
+    """
+    rows = input_data.get("rows", [])
+    return bool(input_data.get("allowWeedgrowth")) or any(row.get("plantingType") == "random" for row in rows)
@@ -0,0 +1,119 @@
+from datetime import datetime
+
+import numpy as np
+
+MAP_MODES = ("every", "milestones", "none")
+# The value the partial blocks at the edges are padded with for every pooling
+POOLING = {"mean": 0.0, "max": -np.inf}
+
+
+class RecordingPolicy:
+    """
+    Decides which steps of a simulation record their maps and at which resolution.
+
+    The scalar values of a step (yield, growth, profit, number of plants, ...)
+    are recorded every step; the policy only applies to the crop and weed maps.
+
+    Attributes
+    ----------
+    maps : str
+        "every" records the maps every ``interval`` steps, "milestones" only
+        at the ``milestones`` and "none" never (scalar-only, e.g. for sweeps).
+    interval : int
+        The number of steps between two recorded maps.
+    milestones : list
+        Step indices (int), dates ("YYYY-MM-DD", the first step on that date)
+        or "last" (the last step) at which the maps are recorded.
+    downsample : int
+        The side length of the blocks of cells that are pooled into one cell
+        of the recorded maps (1 keeps the full resolution).
+    pooling : str
+        How a block is pooled, "mean" or "max".
+
+    Methods
+    -------
+    from_input(input_data)
+        Creates the policy of the "recording" entry of the input data.
+    records_maps(step, date, last)
+        Whether the maps of a step are recorded.
+    downsample_map(array)
+        Pools an array to the recorded resolution.
+    """
+
+    def __init__(self, maps="every", interval=1, milestones=(), downsample=1, pooling="mean"):
+        if maps not in MAP_MODES:
+            raise ValueError(f"Unknown map recording mode: {maps}")
+        if pooling not in POOLING:
+            raise ValueError(f"Unknown pooling: {pooling}")
+        self.maps = maps
+        self.interval = max(int(interval), 1)
+        self.milestones = list(milestones)
+        self.downsample = max(int(downsample), 1)
+        self.pooling = pooling
+        self._steps = {milestone for milestone in self.milestones if isinstance(milestone, int)}
+        self._dates = {
+            datetime.strptime(milestone, "%Y-%m-%d").date()
+            for milestone in self.milestones
+            if isinstance(milestone, str) and milestone != "last"
+        }
+        self._last = "last" in self.milestones
+        self._recorded_dates = set()
+
+    @classmethod
+    def from_input(cls, input_data):
+        """
+        Create the policy of the "recording" entry of the input data (all maps
+        at full resolution if there is none).
+        """
+        return cls(**input_data.get("recording", {}))
+
+    def records_maps(self, step, date, last=False):
+        """
+        Whether the maps of a step are recorded.
+
+        Parameters
+        ----------
+        step : int
+            The index of the step.
+        date : datetime
+            The date of the step.
+        last : bool
+            Whether it is the last step of the simulation.
+        """
+        if self.maps == "every":
+            return step % self.interval == 0
+        if self.maps == "milestones":
+            if step in self._steps or (last and self._last):
+                return True
+            # A date is recorded once, at its first step
+            day = date.date()
+            if day in self._dates and day not in self._recorded_dates:
+                self._recorded_dates.add(day)
+                return True
+        return False
+
+    def downsample_map(self, array):
+        """
+        Pool an array in blocks of ``downsample`` x ``downsample`` cells.
+
+        Blocks at the lower and right edges may be smaller; they are pooled
+        over the cells they have.
+        """
+        if self.downsample == 1:
+            return array
+        block = self.downsample
+        shape = array.shape
+        rows = -(-array.shape[0] // block)
+        cols = -(-array.shape[1] // block)
+        if shape != (rows * block, cols * block):
+            # Padding with the identity of the reduction keeps the partial blocks correct
+            padded = np.full((rows * block, cols * block), POOLING[self.pooling], dtype=float)
+            padded[:shape[0], :shape[1]] = array
+            array = padded
+        reduce = np.maximum.reduce if self.pooling == "max" else np.add.reduce
+        pooled = reduce(reduce(array.reshape(rows, block, -1), axis=1).reshape(rows, cols, block), axis=2)
+        if self.pooling == "max":
+            return pooled
+        row_sizes = np.minimum(block, shape[0] - block * np.arange(rows))
+        col_sizes = np.minimum(block, shape[1] - block * np.arange(cols))
+        return pooled / np.outer(row_sizes, col_sizes)
@@ -0,0 +1,312 @@
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+
+import numpy as np
+
+from .crop_store import CropStore
+
+# The layers of the simulation that are shared with the workers
+SHARED_LAYERS = ("crop_size_layer", "boundary_layer", "water_layer")
+# The layers crops write to outside of their own strip. The water is only
+# taken at the centers of the crops, so workers use the shared water layer directly.
+HALO_LAYERS = ("crop_size_layer", "boundary_layer")
+
+
+class _Domain:
+    """
+    The crops of one strip inside a worker.
+
+    The domain owns the columns of its strip. The crops are grown on a local
+    copy of the layers that reaches ``halo`` columns into the neighbouring
+    strips, so plants that cross the strip edges see the neighbours as they
+    were at the start of the step. Afterwards the own columns are written back
+    and the changes in the halo columns are handed to the engine.
+    """
+
+    def __init__(self, spec, layers, stepsize, horizon_hours):
+        self.index = spec["index"]
+        self.lo = spec["lo"]
+        self.own = spec["own"]
+        self.hi = spec["hi"]
+        self.sim = SimpleNamespace(
+            current_date=None,
+            stepsize=stepsize,
+            horizon_hours=horizon_hours,
+            boundary_layer=None,
+            water_layer=None,
+        )
+        self.store = CropStore(spec["name"], spec["parameters"], self.sim, capacity=max(spec["state"]["rows"].size, 1))
+        self.store.set_state(spec["state"])
+        # The crops use the coordinates of the local layers
+        self.store.cols[:self.store.count] -= self.lo
+        self.layers = layers
+        self.local = {}
+        self.halo = {}
+        self.sim.water_layer = layers["water_layer"][:, self.lo:self.hi["water_layer"]]
+
+    def snapshot(self):
+        """
+        Copy the columns of the domain and its halo out of the shared layers.
+        """
+        for name in HALO_LAYERS:
+            local = self.layers[name][:, self.lo:self.hi[name]].copy()
+            start, end = (column - self.lo for column in self.own[name])
+            self.local[name] = local
+            self.halo[name] = (local[:, :start].copy(), local[:, end:].copy())
+        self.sim.boundary_layer = self.local["boundary_layer"]
+
+    def grow(self, current_date, sowing_date):
+        """
+        Grow the crops of the domain and write the own columns back.
+
+        Returns
+        -------
+        tuple
+            The summed growth rate, the summed overlap and the changes of the
+            halo columns as (layer name, first column, change) tuples.
+        """
+        self.sim.current_date = current_date
+        growthrate, overlap = self.store.grow_all(
+            SimpleNamespace(sowing_date=sowing_date), self.local["crop_size_layer"]
+        )
+        changes = []
+        for name in HALO_LAYERS:
+            local = self.local[name]
+            start, end = self.own[name]
+            self.layers[name][:, start:end] = local[:, start - self.lo:end - self.lo]
+            left, right = self.halo[name]
+            for column, before in ((self.lo, left), (end, right)):
+                after = local[:, column - self.lo:column - self.lo + before.shape[1]]
+                if before.size and not np.array_equal(after, before):
+                    changes.append((name, column, after - before))
+        return growthrate, overlap, changes
+
+    def get_state(self):
+        state = self.store.get_state()
+        state["cols"] += self.lo
+        return state
+
+
+def _load(layer_specs, domain_specs, stepsize, horizon_hours):
+    """
+    Attach the shared layers of a simulation and build the domains of a worker.
+    """
+    blocks = []
+    layers = {}
+    for name, (block_name, shape, dtype) in layer_specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        layers[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    domains = [_Domain(spec, layers, stepsize, horizon_hours) for spec in domain_specs]
+    return blocks, domains
+
+
+def run_worker(connection):
+    """
+    The loop of a worker (a process or a thread). Answers the commands of strip engines until it is stopped.
+
+    A worker outlives the simulations: every engine loads its domains with
+    ``load`` and releases them with ``unload``.
+    """
+    blocks = []
+    domains = []
+    try:
+        while True:
+            command, *args = connection.recv()
+            if command == "load":
+                blocks, domains = _load(*args)
+                connection.send(None)
+            elif command == "snapshot":
+                for domain in domains:
+                    domain.snapshot()
+                connection.send(None)
+            elif command == "grow":
+                connection.send([(domain.index, domain.grow(*args)) for domain in domains])
+            elif command == "state":
+                connection.send([(domain.index, domain.get_state()) for domain in domains])
+            elif command == "unload":
+                domains = []
+                for block in blocks:
+                    block.close()
+                blocks = []
+                connection.send(None)
+            elif command == "stop":
+                break
+    finally:
+        domains = []
+        for block in blocks:
+            block.close()
+        connection.close()
+
+
+class StripEngine:
+    """
+    Grows the crops of a simulation in the workers of a ``ProcessExecutor`` or ``ThreadExecutor``.
+
+    The field is split along the strip boundaries into column domains. Every
+    domain is owned by one worker that keeps the crop store of its
+    strip. The crop size, boundary and water layers of the simulation are
+    moved into shared memory, so the workers grow their crops directly on the
+    field and only the halo columns where plants cross a strip edge are
+    exchanged through the engine.
+
+    A step has two phases: all workers first copy their domain and halo out of
+    the shared layers, then they grow their crops, write their own columns
+    back and return the changes of the halo columns, which the engine adds
+    after all workers finished. Crops therefore see the crops of other strips
+    as they were at the start of the step; inside a strip the growth is the
+    same as with ``CropStore.grow_all``. The serial growth of
+    ``Simulation.grow_plants`` grows the strips one after another, so there
+    the crops of a strip see the strips before it already grown. Where crops
+    reach across the strip edges the results therefore differ slightly (well
+    below 1 % of the crop size in the tests); without such crops they are the same.
+
+    While the engine runs, the crop stores of the strips in the main process
+    are not updated. ``close`` copies the state of the workers back.
+
+    Attributes
+    ----------
+    sim : Simulation
+        The simulation whose crops are grown.
+    workers : int
+        The number of workers the domains are spread over.
+
+    Methods
+    -------
+    grow(strip)
+        Grows the crops of all strips by one time step.
+    sync()
+        Copies the state of the crops from the workers to the strips.
+    close()
+        Releases the workers and moves the layers back into private memory.
+    """
+
+    def __init__(self, sim, connections):
+        self.sim = sim
+        self._blocks = []
+        layer_specs = {}
+        for name in SHARED_LAYERS:
+            array = getattr(sim, name)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            shared[:] = array
+            setattr(sim, name, shared)
+            self._blocks.append(block)
+            layer_specs[name] = (block.name, array.shape, array.dtype.str)
+
+        domains = [self._domain_spec(strip) for strip in sim.strips if strip.crops.count > 0]
+        self.workers = max(1, min(len(connections), len(domains)))
+        self._connections = list(connections[:self.workers])
+        for worker, connection in enumerate(self._connections):
+            connection.send(("load", layer_specs, domains[worker::self.workers], sim.stepsize, sim.horizon_hours))
+        for connection in self._connections:
+            connection.recv()
+
+    def _domain_spec(self, strip):
+        """
+        Describe the column domain of a strip and the crops in it.
+        """
+        last = strip.index == len(self.sim.strips) - 1
+        # A ring reaches one cell further than the largest disk of the plant
+        halo = int(np.round(strip.plant_parameters["W_max"] / 2)) + 1
+        lo = max(strip.start - halo, 0)
+        own = {}
+        hi = {}
+        for name in SHARED_LAYERS:
+            width = getattr(self.sim, name).shape[1]
+            # The last strip also owns the extra columns of the crop size layer
+            end = width if last else strip.start + strip.width
+            own[name] = (strip.start, end)
+            hi[name] = min(end + halo, width)
+        return {
+            "index": strip.index,
+            "name": strip.crops.name,
+            "parameters": strip.crops.parameters,
+            "state": strip.crops.get_state(),
+            "lo": lo,
+            "own": own,
+            "hi": hi,
+        }
+
+    def _command(self, *message):
+        # Every worker that got the command is answered before an error is raised,
+        # so no reply is left in the pipes of the others
+        sent = []
+        error = None
+        for connection in self._connections:
+            try:
+                connection.send(message)
+            except OSError as send_error:
+                error = error or send_error
+            else:
+                sent.append(connection)
+        results = []
+        for connection in sent:
+            try:
+                result = connection.recv()
+            except (OSError, EOFError) as recv_error:
+                error = error or recv_error
+                continue
+            if result is not None:
+                results.extend(result)
+        if error is not None:
+            raise error
+        # Keep the results in strip order, like a serial pass over the strips
+        return [result for _, result in sorted(results, key=lambda item: item[0])]
+
+    def grow(self, strip):
+        """
+        Grow the crops of all strips by one time step with the sowing date of the given strip.
+
+        Returns
+        -------
+        tuple
+            The summed growth rate and the summed overlap of all crops.
+        """
+        self._command("snapshot")
+        growthrate = 0
+        overlap = 0
+        for domain_growthrate, domain_overlap, changes in self._command("grow", self.sim.current_date, strip.sowing_date):
+            growthrate += domain_growthrate
+            overlap += domain_overlap
+            for name, column, change in changes:
+                getattr(self.sim, name)[:, column:column + change.shape[1]] += change
+        return growthrate, overlap
+
+    def sync(self):
+        """
+        Copy the state of the crops from the workers to the crop stores of the strips.
+        """
+        states = self._command("state")
+        strips = [strip for strip in self.sim.strips if strip.crops.count > 0]
+        for strip, state in zip(strips, states):
+            strip.crops.set_state(state)
+
+    def close(self):
+        """
+        Copy the crops back, release the workers and the shared memory.
+
+        The shared memory is released even if a worker died; an error of
+        copying the crops back is raised afterwards.
+        """
+        if not self._blocks:
+            return
+        try:
+            self.sync()
+        finally:
+            try:
+                try:
+                    self._command("unload")
+                except (OSError, EOFError):
+                    # The other workers have unloaded, a dead one holds no segments
+                    pass
+                self._connections = []
+                for name in SHARED_LAYERS:
+                    setattr(self.sim, name, getattr(self.sim, name).copy())
+            finally:
+                for block in self._blocks:
+                    try:
+                        block.close()
+                    finally:
+                        block.unlink()
+                self._blocks = []
@@ -0,0 +1,213 @@
+import logging
+import math
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.db import close_old_connections
+
+from .constants import SIMULATION_DAYS
+from ..models import DataModelOutput, IterationSummary, SimulationIteration
+
+# The weather data of a sweep worker, fetched once when the worker starts
+_worker_weather_data = None
+# The time (in seconds) between two heartbeats of the job while the sweep waits for its workers
+HEARTBEAT_INTERVAL = 30
+
+logger = logging.getLogger(__name__)
+
+
+class SweepError(RuntimeError):
+    """
+    Raised when variations of a sweep still failed after their retries.
+
+    Attributes
+    ----------
+    failures : dict
+        The error of every failed variation by its iteration index.
+    """
+
+    def __init__(self, failures):
+        self.failures = failures
+        super().__init__(
+            "Sweep variations failed: "
+            + ", ".join(f"{index} ({error})" for index, error in sorted(failures.items()))
+        )
+
+
+class SweepTask:
+    """
+    A variation of a sweep, simulated as one iteration.
+
+    Attributes
+    ----------
+    index : int
+        The iteration index of the variation.
+    param_value : float
+        The value of the varied parameter (-99 if there is none).
+    input_data : dict
+        The input data of the variation.
+    iteration_id : int
+        The id of the SimulationIteration the variation is recorded in.
+    point : dict
+        The parameter values of the variation in a sweep design (None for
+        the variations of one parameter).
+    attempts : int
+        The number of times the variation was started.
+    isolated : bool
+        Whether the variation runs alone, because it was running when a
+        worker died and may have killed it.
+    """
+
+    def __init__(self, index, param_value, input_data, iteration_id=None, point=None):
+        self.index = index
+        self.param_value = param_value
+        self.input_data = input_data
+        self.iteration_id = iteration_id
+        self.point = point
+        self.attempts = 0
+        self.isolated = False
+
+    @property
+    def expected_cost(self):
+        """
+        The expected runtime of the variation, relative to the other variations.
+
+        The simulation grows every plant every step, so the cost is taken as
+        the number of steps times the number of plants, which grows with the
+        strip area and falls with the spacing of the plants.
+        """
+        steps = math.ceil(SIMULATION_DAYS * 24 / int(self.input_data["stepSize"]))
+        plants = sum(
+            int(self.input_data["rowLength"]) * float(row["stripWidth"]) / max(float(row["rowSpacing"]), 1)
+            for row in self.input_data["rows"]
+        )
+        return steps * plants
+
+
+def _init_worker(site=""):
+    # Spawned workers start without Django and fetch the weather once for all their tasks
+    global _worker_weather_data
+    import django
+    django.setup()
+    from .calculate import fetch_weather_data
+    _worker_weather_data = fetch_weather_data(site=site)
+
+
+def _run_task(input_data, iteration_id):
+    from .calculate import run_simulation
+    from .executors import SerialExecutor
+
+    close_old_connections()
+    start_time = time.perf_counter()
+    iteration_instance = SimulationIteration.objects.get(id=iteration_id)
+    # The sweep runs the variations in parallel, each one in a single process
+    with SerialExecutor() as executor:
+        run_simulation(input_data, _worker_weather_data, iteration_instance, executor)
+    return time.perf_counter() - start_time
+
+
+def _discard_results(task):
+    # A retried variation starts from an empty iteration
+    DataModelOutput.objects.filter(iteration_id=task.iteration_id).delete()
+    IterationSummary.objects.filter(iteration_id=task.iteration_id).delete()
+
+
+def run_sweep(tasks, workers, retries=1, progress=None, site=""):
+    """
+    Simulate the variations of a sweep in a pool of worker processes.
+
+    The variations with the longest expected runtime are started first, so a
+    long variation does not start last and keep the other workers idle. Every
+    worker has its own database connection and records its iterations like a
+    serial run. A failed variation is retried (from scratch) up to
+    ``retries`` times while the others continue. When a worker dies, the
+    variations it may have been running are run again one at a time, so only
+    the one that kills its worker uses up its retries.
+
+    Parameters
+    ----------
+    tasks : list
+        The SweepTasks, with the ids of their iterations.
+    workers : int
+        The number of worker processes.
+    retries : int
+        How often a failed variation is started again.
+    progress : JobProgress, optional
+        Is told about every finished variation, and gets a heartbeat while
+        the variations run, so a long variation does not make the job stale.
+    site : str
+        The weather station the workers fetch the weather of.
+
+    Returns
+    -------
+    dict
+        The runtime (in seconds) of every variation by its iteration index.
+
+    Raises
+    ------
+    SweepError
+        If variations failed after their retries; the other variations are
+        recorded nonetheless.
+    """
+    pending = sorted(tasks, key=lambda task: task.expected_cost, reverse=True)
+    runtimes = {}
+    failures = {}
+    context = multiprocessing.get_context("spawn")
+
+    def retry_or_fail(task, error):
+        if task.attempts <= retries:
+            logger.warning("Variation %s failed (%r), retrying.", task.index, error)
+            _discard_results(task)
+            pending.append(task)
+        else:
+            failures[task.index] = repr(error)
+
+    while pending:
+        pool = ProcessPoolExecutor(min(workers, len(pending)), mp_context=context, initializer=_init_worker, initargs=(site,))
+        running = {}
+        try:
+            while pending or running:
+                # Keep one variation per worker in flight, so a retry is started as soon as a worker is free
+                while pending and len(running) < workers:
+                    if running and (pending[0].isolated or any(task.isolated for task in running.values())):
+                        break
+                    task = pending.pop(0)
+                    task.attempts += 1
+                    running[pool.submit(_run_task, task.input_data, task.iteration_id)] = task
+                done, _ = wait(running, timeout=HEARTBEAT_INTERVAL, return_when=FIRST_COMPLETED)
+                if progress is not None:
+                    progress.heartbeat()
+                broken = None
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        runtimes[task.index] = future.result()
+                    except BrokenProcessPool as error:
+                        # The variations that finished before the pool broke keep their results
+                        running[future] = task
+                        broken = error
+                    except Exception as error:
+                        retry_or_fail(task, error)
+                    else:
+                        if progress is not None:
+                            progress.finish_iteration()
+                if broken is not None:
+                    raise broken
+        except BrokenProcessPool as error:
+            # A worker died, which breaks the pool; the variations it had are started in a new pool
+            if len(running) == 1:
+                retry_or_fail(next(iter(running.values())), error)
+            else:
+                for task in running.values():
+                    task.attempts -= 1
+                    task.isolated = True
+                    _discard_results(task)
+                pending[:0] = running.values()
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    if failures:
+        raise SweepError(failures)
+    return runtimes
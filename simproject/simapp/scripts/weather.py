@@ -0,0 +1,244 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from ..models import Weather
+
+# The number of loaded weather windows kept in memory
+WEATHER_CACHE_SIZE = 8
+# The columns of a loaded series (the Weather fields, NaN where a station does not measure one)
+WEATHER_FIELDS = ("temperature", "rain", "wind", "humidity", "radiation", "vapour_pressure", "wet_bulb_temperature")
+
+
+class WeatherSeries:
+    """
+    The hourly weather as one array per column.
+
+    The value of an hour is found by its offset from the first hour, and the
+    sum or mean of any window of hours from running sums, so a step of
+    several hours costs as much as a step of one hour.
+
+    Attributes
+    ----------
+    start : datetime
+        The first hour of the series.
+    columns : dict
+        The hourly values (a float array, NaN for a missing hour) by column name.
+
+    Methods
+    -------
+    from_records(records)
+        Builds the series from weather records with a date.
+    offset(date)
+        Gets the index of the hour of a date.
+    value(name, date)
+        Gets the value of a column at the hour of a date.
+    total(name, date, hours) / mean(name, date, hours)
+        Gets the sum or the mean of a column over the hours from a date.
+    window(start, end)
+        Gets the series of the hours between two dates.
+    """
+
+    def __init__(self, start, columns):
+        self.start = start
+        self.columns = {name: np.asarray(values, dtype=float) for name, values in columns.items()}
+        lengths = {len(values) for values in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("The weather columns have different lengths")
+        self._length = lengths.pop() if lengths else 0
+        # The running sums and counts of the hours with a value, built when a window is first asked for
+        self._sums = {}
+        self._counts = {}
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build the series from weather records.
+
+        Parameters
+        ----------
+        records : iterable
+            Dicts with a "date" (datetime) and a number per column; the hours
+            between the first and the last date without a record are NaN.
+
+        Returns
+        -------
+        WeatherSeries
+            The series (empty without records).
+        """
+        records = [record for record in records if record.get("date") is not None]
+        if not records:
+            return cls(datetime.min, {})
+        names = [name for name in records[0] if name != "date"]
+        return cls.from_hours(
+            [record["date"] for record in records],
+            {name: [record.get(name, np.nan) for record in records] for name in names},
+        )
+
+    @classmethod
+    def from_hours(cls, dates, columns):
+        """
+        Build the series from the dates of the hours and a list of values per column.
+        """
+        if not dates:
+            return cls(datetime.min, {})
+        start = min(dates).replace(minute=0, second=0, microsecond=0)
+        offsets = np.array([(date - start) // timedelta(hours=1) for date in dates])
+        series = {}
+        for name, values in columns.items():
+            series[name] = np.full(offsets.max() + 1, np.nan)
+            series[name][offsets] = values
+        return cls(start, series)
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def end(self):
+        """
+        The hour after the last hour of the series.
+        """
+        return self.start + timedelta(hours=self._length)
+
+    def offset(self, date):
+        """
+        Get the index of the hour of a date.
+
+        Raises
+        ------
+        KeyError
+            If the series has no weather for the date.
+        """
+        offset = (date - self.start) // timedelta(hours=1)
+        if not 0 <= offset < self._length:
+            raise KeyError(f"No weather data for {date}")
+        return offset
+
+    def value(self, name, date):
+        """
+        Get the value of a column at the hour of a date.
+        """
+        return float(self.columns[name][self.offset(date)])
+
+    def total(self, name, date, hours=1):
+        """
+        Get the sum of a column over the hours from a date (the missing hours count as 0).
+        """
+        first, last = self._bounds(date, hours)
+        sums = self._running_sums(name)[0]
+        return float(sums[last] - sums[first])
+
+    def mean(self, name, date, hours=1):
+        """
+        Get the mean of a column over the hours from a date (NaN if all of them are missing).
+        """
+        first, last = self._bounds(date, hours)
+        sums, counts = self._running_sums(name)
+        count = counts[last] - counts[first]
+        return float((sums[last] - sums[first]) / count) if count else float("nan")
+
+    def window(self, start, end):
+        """
+        Get the series of the hours from ``start`` up to and including ``end``.
+        """
+        first = max((start - self.start) // timedelta(hours=1), 0)
+        last = min((end - self.start) // timedelta(hours=1) + 1, self._length)
+        last = max(last, first)
+        return WeatherSeries(
+            self.start + timedelta(hours=first),
+            {name: values[first:last] for name, values in self.columns.items()},
+        )
+
+    def _bounds(self, date, hours):
+        # A window that runs past the end of the series ends with its last hour
+        first = self.offset(date)
+        return first, min(first + max(int(hours), 1), self._length)
+
+    def _running_sums(self, name):
+        if name not in self._sums:
+            values = self.columns[name]
+            present = ~np.isnan(values)
+            self._sums[name] = np.concatenate([[0.0], np.cumsum(np.where(present, values, 0.0))])
+            self._counts[name] = np.concatenate([[0], np.cumsum(present)])
+        return self._sums[name], self._counts[name]
+
+
+class _WeatherCache:
+    # The loaded windows, dropped when the weather table changes
+    def __init__(self, size=WEATHER_CACHE_SIZE):
+        self.size = size
+        self.fingerprint = None
+        self.windows = OrderedDict()
+        self.lock = threading.Lock()
+
+
+_weather_cache = _WeatherCache()
+
+
+def load_weather(start=None, end=None, site=""):
+    """
+    Load the hourly weather of a site from ``start`` up to and including ``end``.
+
+    The window is read with one range query on the date index and kept in
+    memory, so the simulations of a run (and later runs of the process) load
+    it once. The kept windows are dropped when the number or the last id of
+    the weather records changes, e.g. when weather is seeded.
+
+    Parameters
+    ----------
+    start, end : datetime, optional
+        The first and the last hour (naive, in the time zone of the project);
+        without them the weather is loaded from the first or up to the last hour.
+    site : str
+        The weather station ("" for the weather the project ships with).
+
+    Returns
+    -------
+    WeatherSeries
+        The weather of the window (naive hours, like the simulation uses) with
+        a column per name of ``WEATHER_FIELDS``.
+    """
+    fingerprint = tuple(Weather.objects.aggregate(count=Count("id"), last=Max("id")).values())
+    key = (site, start, end)
+    with _weather_cache.lock:
+        if fingerprint != _weather_cache.fingerprint:
+            _weather_cache.windows.clear()
+            _weather_cache.fingerprint = fingerprint
+        series = _weather_cache.windows.get(key)
+        if series is not None:
+            _weather_cache.windows.move_to_end(key)
+            return series
+
+    records = Weather.objects.filter(site=site, date__isnull=False).order_by("date")
+    if start is not None:
+        records = records.filter(date__gte=timezone.make_aware(start))
+    if end is not None:
+        records = records.filter(date__lte=timezone.make_aware(end))
+    rows = list(records.values_list("date", *WEATHER_FIELDS))
+    series = WeatherSeries.from_hours(
+        [row[0] for row in rows],
+        {name: [row[index] for row in rows] for index, name in enumerate(WEATHER_FIELDS, start=1)},
+    )
+    # The hours are counted in the stored time zone, only the first hour is converted
+    if rows:
+        series.start = timezone.make_naive(series.start)
+
+    with _weather_cache.lock:
+        if fingerprint == _weather_cache.fingerprint:
+            _weather_cache.windows[key] = series
+            while len(_weather_cache.windows) > _weather_cache.size:
+                _weather_cache.windows.popitem(last=False)
+    return series
+
+
+def clear_weather_cache():
+    """
+    Drop the loaded weather windows (they are reloaded when the table changed anyway).
+    """
+    with _weather_cache.lock:
+        _weather_cache.windows.clear()
+        _weather_cache.fingerprint = None
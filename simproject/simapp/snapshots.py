@@ -0,0 +1,199 @@
+import io
+import struct
+import zlib
+
+import numpy as np
+
+# Maps are stored as float32, which keeps the sizes to about 7 significant digits
+SNAPSHOT_DTYPE = np.float32
+# zlib level 1 compresses the mostly empty maps almost as well as higher levels
+COMPRESSION_LEVEL = 1
+
+
+def encode_array(array, dtype=SNAPSHOT_DTYPE):
+    """
+    Encode an array as a compressed binary snapshot.
+
+    The snapshot is a zlib compressed ``.npy`` file, so it keeps the shape and
+    dtype of the array.
+
+    Parameters
+    ----------
+    array : array_like
+        The array to encode.
+    dtype : np.dtype
+        The dtype the array is stored with.
+
+    Returns
+    -------
+    bytes
+        The snapshot.
+    """
+    buffer = io.BytesIO()
+    np.save(buffer, np.ascontiguousarray(array, dtype=dtype), allow_pickle=False)
+    return zlib.compress(buffer.getbuffer(), COMPRESSION_LEVEL)
+
+
+def decode_array(snapshot):
+    """
+    Decode a snapshot created by ``encode_array``.
+
+    Parameters
+    ----------
+    snapshot : bytes or memoryview
+        The snapshot.
+
+    Returns
+    -------
+    np.ndarray
+        The array of the snapshot.
+    """
+    return np.load(io.BytesIO(zlib.decompress(snapshot)), allow_pickle=False)
+
+
+def encode_delta(previous, current):
+    """
+    Encode the change between two arrays of the same shape as a sparse delta.
+
+    The delta holds the flat indices of the changed cells (as differences to
+    the previous changed cell, which compress well for the clustered cells
+    under plants) and their new values.
+
+    Parameters
+    ----------
+    previous, current : np.ndarray
+        The arrays in ``SNAPSHOT_DTYPE``.
+
+    Returns
+    -------
+    bytes
+        The delta.
+    """
+    changed = np.flatnonzero(previous != current)
+    buffer = io.BytesIO()
+    np.save(buffer, np.diff(changed, prepend=0).astype(np.uint32), allow_pickle=False)
+    np.save(buffer, current.reshape(-1)[changed], allow_pickle=False)
+    return zlib.compress(buffer.getbuffer(), COMPRESSION_LEVEL)
+
+
+def apply_delta(previous, delta):
+    """
+    Apply a delta created by ``encode_delta``.
+
+    Parameters
+    ----------
+    previous : np.ndarray
+        The array the delta was encoded against. It is not modified.
+    delta : bytes or memoryview
+        The delta.
+
+    Returns
+    -------
+    np.ndarray
+        The array after the change.
+    """
+    buffer = io.BytesIO(zlib.decompress(delta))
+    changed = np.cumsum(np.load(buffer, allow_pickle=False), dtype=np.int64)
+    values = np.load(buffer, allow_pickle=False)
+    current = previous.copy()
+    current.reshape(-1)[changed] = values
+    return current
+
+
+class DeltaEncoder:
+    """
+    Encodes the maps of consecutive steps as keyframes and sparse deltas.
+
+    Every ``keyframe_interval`` steps all maps are stored in full, the steps
+    in between only store the cells that changed since the step before. Any
+    step can be decoded by replaying the deltas from the keyframe before it.
+
+    Attributes
+    ----------
+    keyframe_interval : int
+        The number of steps from one keyframe to the next (1 stores every step in full).
+    step : int
+        The index of the next step.
+
+    Methods
+    -------
+    encode(arrays)
+        Encodes the maps of the next step.
+    """
+
+    def __init__(self, keyframe_interval=10):
+        self.keyframe_interval = max(int(keyframe_interval), 1)
+        self.step = 0
+        self._previous = {}
+
+    def encode(self, arrays):
+        """
+        Encode the maps of the next step.
+
+        Parameters
+        ----------
+        arrays : dict
+            The maps of the step by name. Every step must have the same names.
+            Maps in ``SNAPSHOT_DTYPE`` must not be changed afterwards.
+
+        Returns
+        -------
+        tuple
+            The index of the step, whether it is a keyframe and the encoded
+            map of every name.
+        """
+        # Arrays that already have the snapshot dtype are kept without a copy
+        current = {name: np.asarray(array, dtype=SNAPSHOT_DTYPE) for name, array in arrays.items()}
+        keyframe = self.step % self.keyframe_interval == 0 or any(
+            name not in self._previous or self._previous[name].shape != array.shape
+            for name, array in current.items()
+        )
+        if keyframe:
+            snapshots = {name: encode_array(array) for name, array in current.items()}
+        else:
+            snapshots = {name: encode_delta(self._previous[name], array) for name, array in current.items()}
+        self._previous = current
+        step = self.step
+        self.step += 1
+        return step, keyframe, snapshots
+
+
+def encode_png(array, max_value=None):
+    """
+    Encode a map as an 8-bit grayscale PNG image.
+
+    The values are scaled from 0 to ``max_value`` (default: the largest
+    value of the map), which is needed to read the values back.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        The two-dimensional map.
+    max_value : float, optional
+        The value shown as white.
+
+    Returns
+    -------
+    bytes
+        The PNG image.
+    """
+    if max_value is None:
+        max_value = float(np.max(array, initial=0))
+    scale = 255 / max_value if max_value > 0 else 0
+    pixels = np.clip(np.nan_to_num(array) * scale, 0, 255).round().astype(np.uint8)
+    # Every row of the image starts with the filter type 0 (none)
+    rows = np.hstack([np.zeros((pixels.shape[0], 1), dtype=np.uint8), pixels])
+
+    def chunk(kind, data):
+        return (
+            struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    header = struct.pack('>IIBBBBB', pixels.shape[1], pixels.shape[0], 8, 0, 0, 0, 0)
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', header)
+        + chunk(b'IDAT', zlib.compress(rows.tobytes(), COMPRESSION_LEVEL))
+        + chunk(b'IEND', b'')
+    )
@@ -290,6 +290,11 @@ document.addEventListener('DOMContentLoaded', function () {
                     useWater: document.getElementById('useWater').checked,
                     allowWeedgrowth: document.getElementById('allowWeedgrowth').checked,
                 };
+        // Without a seed the simulation draws one
+        const seedValue = document.getElementById('seed').value;
+        if (seedValue !== '') {
+            requestData.seed = parseInt(seedValue);
+        }
         // Collect data for each row
         rows.forEach((row, index) => {
             const plantType = row.querySelector('.plant-type').value;
@@ -353,21 +358,60 @@ document.addEventListener('DOMContentLoaded', function () {
             },
             body: JSON.stringify(requestData)
         })
-        .then(response => {
+        .then(async response => {
+            const result = await response.json();
             if (!response.ok) {
-                throw new Error(`HTTP error! status: ${response.status}`);
+                throw new Error(result.error || `HTTP error! status: ${response.status}`);
             }
-            return response.json();
+            return result;
         })
         .then(result => {
-            fetchSimulationData(result.name);
+            followSimulationJob(result.progress, result.name);
         })
         .catch(error => {
             console.error('Error:', error);
+            document.getElementById('simulationProgress').textContent = error.message;
         });
+        // The simulation runs in a background worker; its progress is streamed as NDJSON
+        async function followSimulationJob(progressUrl, simulationName) {
+            const progressElement = document.getElementById('simulationProgress');
+            progressElement.textContent = 'Queued';
+            const response = await fetch(progressUrl);
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder('utf-8');
+            let text = '';
+            let progress = null;
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+
+                text += decoder.decode(value, { stream: true });
+                const lines = text.split('\n');
+                text = lines.pop();
+                for (let line of lines) {
+                    if (!line.trim()) continue;
+                    progress = JSON.parse(line);
+                    progressElement.textContent = progress.status === 'queued'
+                        ? 'Queued'
+                        : `Iteration ${Math.min(progress.iteration + 1, progress.total_iterations)}/${progress.total_iterations}, `
+                          + `step ${progress.step}/${progress.total_steps} (${progress.percent}%)`;
+                }
+            }
+
+            if (progress && progress.status === 'finished') {
+                progressElement.textContent = '';
+                fetchSimulationData(simulationName);
+            } else {
+                progressElement.textContent = 'The simulation failed.';
+                console.error(progress ? progress.error : 'No progress received');
+            }
+        }
+        const PLOT_FIELDS = 'date,yield,growth,water,overlap,time_needed,profit,rain,temperature,num_plants';
         async function fetchSimulationData(simulationName) {
             try {
-                const response = await fetch(`/api/get_simulation_data/?name=${encodeURIComponent(simulationName)}`);
+                // The maps are not needed for the plots, the heatmap loads them step by step
+                const response = await fetch(`/api/get_simulation_data/?name=${encodeURIComponent(simulationName)}&fields=${PLOT_FIELDS}`);
         
                 if (!response.ok) {
                     throw new Error(`HTTP error! status: ${response.status}`);
@@ -377,6 +421,8 @@ document.addEventListener('DOMContentLoaded', function () {
                 const decoder = new TextDecoder('utf-8');
                 let jsonText = '';
                 let accumulatedData = [];
+                // The outputs arrive one per line after their iterations
+                const iterationsById = {};
         
                 while (true) {
                     const { done, value } = await reader.read();
@@ -392,7 +438,13 @@ document.addEventListener('DOMContentLoaded', function () {
                         if (line.trim()) {  // Leere Zeilen ignorieren
                             try {
                                 const parsedItem = JSON.parse(line);
-                                accumulatedData.push(parsedItem); // Füge jedes Objekt zur Liste hinzu
+                                if (parsedItem.type === 'iteration') {
+                                    parsedItem.outputs = [];
+                                    iterationsById[parsedItem.id] = parsedItem;
+                                    accumulatedData.push(parsedItem); // Füge jedes Objekt zur Liste hinzu
+                                } else {
+                                    iterationsById[parsedItem.iteration].outputs.push(parsedItem);
+                                }
                             } catch (e) {
                                 console.warn("Fehler beim Parsen von NDJSON:", e);
                             }
@@ -402,7 +454,7 @@ document.addEventListener('DOMContentLoaded', function () {
         
                 // Verarbeite die gesammelten Daten
                 setupCarousel(accumulatedData);
-                setupComparisonPlot(accumulatedData);
+                setupComparisonPlot(simulationName);
         
             } catch (error) {
                 console.error('Failed to fetch NDJSON data:', error);
@@ -498,8 +550,15 @@ document.addEventListener('DOMContentLoaded', function () {
     }
     
 // Function to setup the comparison plot
-function setupComparisonPlot(result) {
+async function setupComparisonPlot(simulationName) {
     const yAxisSelect = document.getElementById('y-axis-select');
+    // The metrics of every iteration are computed on the server, no outputs are needed
+    const response = await fetch(`/api/get_simulation_summary/?name=${encodeURIComponent(simulationName)}`);
+    if (!response.ok) {
+        console.error(`Failed to fetch the simulation summary: ${response.status}`);
+        return;
+    }
+    const result = (await response.json()).iterations;
     
     // Initial plot with default value (growth)
     plotComparison(result, 'growth');
@@ -534,32 +593,7 @@ function plotComparison(allData, yAxisKey) {
         "profit": " Total profit (€)"
     };
 
-    const yValues = allData.map(entry => {
-        const lastOutput = entry.outputs[entry.outputs.length - 1]; // Get the last output of each iteration
-        const area = lastOutput.map[0].length * lastOutput.map.length;
-        switch (yAxisKey) {
-            case "profit_per_plant":
-                return lastOutput.profit / lastOutput.num_plants;
-            case "profit_per_area":
-                return lastOutput.profit / area*10000;
-            case "yield_per_plant":
-                return lastOutput.yield / lastOutput.num_plants;
-            case "growth_per_plant":
-                const meanGrowthPerPlant = entry.outputs.reduce((sum, output) => sum + output.growth, 0) / entry.outputs.length;
-                return meanGrowthPerPlant / lastOutput.num_plants;
-            case "yield_per_area":
-                return lastOutput.yield / area*10000;
-            case "growth_per_area":
-                const meanGrowthPerArea = entry.outputs.reduce((sum, output) => sum + output.growth, 0) / entry.outputs.length;
-                return meanGrowthPerArea / area*10000;
-            case "number_of_plants":
-                return lastOutput.num_plants;
-            case "growth":
-                return entry.outputs.reduce((sum, output) => sum + output.growth, 0) / entry.outputs.length;
-            default:
-                return lastOutput[yAxisKey];
-        }
-    });
+    const yValues = allData.map(entry => entry[yAxisKey]);
 
     const trace = {
         x: xValues,
@@ -683,8 +717,7 @@ function plotComparison(allData, yAxisKey) {
     
     function displaySecondPlot(data, plotId, plotType) {
         const dates = data.outputs.map(output => output.date);
-        const map = data.outputs.map(output => output.map);
-        const area = map[0].length * map[0][0].length;
+        const area = data.area;
         let traces = [];
         let layout;
     
@@ -764,39 +797,73 @@ function plotComparison(allData, yAxisKey) {
         Plotly.react(plotId, traces, layout);
     }
     function displayHeatmap(data, plotId) {
-        const heatmapData = data.outputs.map(output => output.map);
-        const weed = data.outputs.map(output => output.weed);
-        const dates = data.outputs.map(output => output.date);
+        // The maps are loaded from the server one step at a time, only the last few are kept
+        const HEATMAP_SIZE = 400;
+        const FRAME_CACHE_SIZE = 20;
+        const frameCache = new Map();
+        let frames = [];
+        let latestIndex = 0;
         const slider = document.getElementById('dateSlider');
         const sliderValueDisplay = document.getElementById('sliderValue');
-    
-        // Initialize slider
-        slider.max = heatmapData.length - 1; // max value is the length of the heatmapData minus 1
-    
+
+        async function loadFrame(step, layer) {
+            const key = `${step}/${layer}`;
+            if (frameCache.has(key)) {
+                const cached = frameCache.get(key);
+                frameCache.delete(key);
+                frameCache.set(key, cached);
+                return cached;
+            }
+            const response = await fetch(`/api/iterations/${data.id}/frames/${step}/?layer=${layer}&max_size=${HEATMAP_SIZE}`);
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            const [rows, cols] = response.headers.get('X-Frame-Shape').split(',').map(Number);
+            const values = new Float32Array(await response.arrayBuffer());
+            const frame = Array.from({ length: rows }, (_, row) => Array.from(values.subarray(row * cols, (row + 1) * cols)));
+            frameCache.set(key, frame);
+            if (frameCache.size > FRAME_CACHE_SIZE) {
+                frameCache.delete(frameCache.keys().next().value);
+            }
+            return frame;
+        }
+
+        async function showFrame(index) {
+            latestIndex = index;
+            if (!frames[index]) return;
+            const selectedOption = document.getElementById('heatmapOption').value;
+            const [mapData, weedData] = await Promise.all([
+                selectedOption === 'weeds' ? null : loadFrame(frames[index].step, 'map'),
+                selectedOption === 'plants' ? null : loadFrame(frames[index].step, 'weed'),
+            ]);
+            // Frames that arrive after the slider moved on are not drawn
+            if (index === latestIndex) {
+                Heatmap(index, mapData, weedData, frames[index].date);
+            }
+        }
+
         // Event Listener for slider movement
         slider.addEventListener('input', function() {
-            const sliderValue = slider.value;
+            const sliderValue = Number(slider.value);
             sliderValueDisplay.textContent = sliderValue;
-            Heatmap(sliderValue, heatmapData, weed, dates);
+            showFrame(sliderValue);
         });
     
         const showStrips = document.getElementById('showStrips')
         const selectedOption = document.getElementById('heatmapOption');
         showStrips.addEventListener('change', function() {
-            Heatmap(slider.value, heatmapData, weed, dates);
+            showFrame(Number(slider.value));
         });
         selectedOption.addEventListener('change', function() {
-            Heatmap(slider.value, heatmapData, weed, dates);
+            showFrame(Number(slider.value));
         });
     
         // Function to display the corresponding Heatmap data
-        function Heatmap(index, map, weed, dates) {
-            const mapData = map[index];  // Access the data for the heatmap at the given index
-            const weedData = weed[index];
+        function Heatmap(index, mapData, weedData, date) {
             const showStrips = document.getElementById('showStrips').checked;
             const selectedOption = document.getElementById('heatmapOption').value;
     
-            if (mapData) {
+            if (mapData || weedData) {
                 // Heatmap data trace
                 const heatmapTrace = {
                     z: mapData,
@@ -826,7 +893,7 @@ function plotComparison(allData, yAxisKey) {
                 };
     
                 const layout = {
-                    title: `Heatmap on ${dates[index]}`,
+                    title: `Heatmap on ${date}`,
                     xaxis: {
                         title: 'Width',
                         showgrid: false,
@@ -870,8 +937,15 @@ function plotComparison(allData, yAxisKey) {
             }
         }
     
-        // Display the initial heatmap
-        Heatmap(0, heatmapData, weed, dates); // Updated to start at the first index
+        // Only the steps that recorded their maps can be shown
+        fetch(`/api/iterations/${data.id}/frames/`)
+            .then(response => response.json())
+            .then(result => {
+                frames = result.frames;
+                slider.max = frames.length - 1; // max value is the number of recorded steps minus 1
+                showFrame(0); // Display the initial heatmap
+            })
+            .catch(error => console.error('Failed to load the heatmap frames:', error));
     }
     
     },);
@@ -0,0 +1,64 @@
+from django.db.models import Avg, Count
+
+from .models import DataModelOutput, IterationSummary
+
+
+def summarize(iteration):
+    """
+    Compute and store the summary metrics of an iteration.
+
+    Parameters
+    ----------
+    iteration : SimulationIteration
+        The iteration.
+
+    Returns
+    -------
+    IterationSummary
+        The stored summary.
+    """
+    # An iteration found in the result cache is summarized from the outputs it links to
+    outputs = DataModelOutput.objects.filter(iteration_id=iteration.result_id)
+    aggregate = outputs.aggregate(steps=Count('id'), mean_growth=Avg('growth'))
+    last_output = outputs.order_by('-step', '-date').values(
+        'num_plants', 'yield_value', 'profit', 'water', 'overlap'
+    ).first()
+    summary = IterationSummary.objects.filter(iteration_id=iteration.id).first() or IterationSummary(iteration=iteration)
+    summary.set_data(aggregate['steps'], iteration.area, last_output, aggregate['mean_growth'])
+    summary.save()
+    return summary
+
+
+def get_summaries(iterations):
+    """
+    Get the summaries of iterations, computing the ones that are missing or outdated.
+
+    A summary is outdated if its iteration has got outputs since (e.g. it was
+    read while the simulation ran), which is checked with one count query.
+
+    Parameters
+    ----------
+    iterations : list
+        The SimulationIterations.
+
+    Returns
+    -------
+    list
+        The IterationSummary of every iteration, in the same order.
+    """
+    ids = [iteration.id for iteration in iterations]
+    summaries = {summary.iteration_id: summary for summary in IterationSummary.objects.filter(iteration_id__in=ids)}
+    counts = dict(
+        DataModelOutput.objects.filter(iteration_id__in={iteration.result_id for iteration in iterations})
+        .values_list('iteration_id')
+        .annotate(steps=Count('id'))
+        .order_by()
+    )
+    result = []
+    for iteration in iterations:
+        summary = summaries.get(iteration.id)
+        steps = counts.get(iteration.result_id, 0)
+        if summary is None or summary.steps != steps or summary.area != iteration.area:
+            summary = summarize(iteration)
+        result.append(summary)
+    return result
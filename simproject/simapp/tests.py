@@ -1,3 +1,1006 @@
-from django.test import TestCase
+import contextlib
+import copy
+import io
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from scipy.ndimage import convolve
+
+from .models import DataModelInput, DataModelOutput, IterationSummary, Plant, ResultCacheEntry, SimulationIteration, SimulationJob, Weather
+from .result_cache import evict, link_cached_result, result_key
+from .scripts.add_initial_data_to_db import add_initial_plant_data_to_db, add_initial_weather_data_to_db, add_weather_data_to_db
+from .scripts.benchmarks import benchmark_input, grow_per_object
+from .scripts.calculate import Simulation, main, modify_input_data_for_parameter, runs_sweep
+from .scripts.circular_masks import CircularMaskCache
+from .scripts.designs import MAX_SWEEP_POINTS, design_points
+from .scripts.executors import ProcessExecutor, SerialExecutor, ThreadExecutor, uses_strip_engine
+from .scripts.growth_curve import get_growth_curve
+from .scripts.jobs import STALE_AFTER, JobProgress, SimulationNameTaken, claim_job, enqueue, fail_stale_jobs, run_job
+from .scripts.output_writer import OutputWriter
+from .scripts.random_streams import RandomStreams
+from .scripts.recording import RecordingPolicy
+from .scripts.sweep import SweepTask, run_sweep
+from .scripts.weather import WeatherSeries, clear_weather_cache, load_weather
+from .snapshots import DeltaEncoder, apply_delta, decode_array, encode_array
+from .summaries import get_summaries, summarize
+from .views import parse_data_query
+
+
+def quietly(function, *args, **kwargs):
+    # The simulation reports its progress with print
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args, **kwargs)
+
+
+def richards_rate(parameters, hours):
+    # The growth rate of the Richards curve, as Crop.grow computed it before it was tabulated
+    h, r, m, b = parameters["H_max"], parameters["k"], parameters["n"], parameters["b"]
+    return (h * b * r) / (m - 1) * np.exp(-r * hours) * (1 + b * np.exp(-r * hours)) ** (m / (1 - m))
+
+
+def grown_simulation(input_data, steps=10):
+    """
+    Plant a simulation and grow its crops for some steps with the batched growth.
+    """
+    sim = quietly(Simulation, input_data, {})
+    for strip in sim.strips:
+        quietly(strip.planting, sim)
+    for _ in range(steps):
+        sim.grow_plants(sim.strips[0])
+        sim.current_date += timedelta(hours=sim.stepsize)
+    return sim
+
+
+def create_iteration(name="test"):
+    input_instance = DataModelInput.objects.create(startDate="2022-10-01", stepSize=24, rowLength=50, simName=name)
+    return SimulationIteration.objects.create(input=input_instance)
+
+
+class CropStoreTests(TestCase):
+    def setUp(self):
+        add_initial_plant_data_to_db()
+
+    def test_grow_all_matches_per_object_growth(self):
+        input_data = benchmark_input(100)
+        per_object = grown_simulation(input_data)
+        batched = grown_simulation(input_data)
+        for _ in range(3):
+            grow_per_object(per_object, per_object.strips[0])
+            batched.grow_plants(batched.strips[0])
+            for sim in (per_object, batched):
+                sim.current_date += timedelta(hours=sim.stepsize)
+        for name in ("crop_size_layer", "water_layer", "boundary_layer"):
+            np.testing.assert_array_equal(getattr(per_object, name), getattr(batched, name))
+        np.testing.assert_array_equal(per_object.strips[0].crops.overlap, batched.strips[0].crops.overlap)
+
+    def test_masks_are_preloaded_for_the_plants_of_the_simulation(self):
+        # Lettuce is 30 cm wide, the widest plant of the table (cabbage) 60 cm
+        with mock.patch("simapp.scripts.calculate.circular_masks.preload") as preload:
+            quietly(Simulation, benchmark_input(100, plant_type="lettuce"), {})
+        preload.assert_called_once_with(16)
+
+    def test_incremental_boundary_layer_matches_rebuild(self):
+        sim = grown_simulation(benchmark_input(100), steps=20)
+        self.assertGreater(sim.boundary_layer.sum(), 0)
+        incremental = sim.boundary_layer.copy()
+        sim.rebuild_boundary_layer()
+        np.testing.assert_array_equal(incremental, sim.boundary_layer)
+
+    def test_add_grows_the_store(self):
+        sim = grown_simulation(benchmark_input(100), steps=0)
+        store = sim.strips[0].crops
+        count = store.count
+        indices = store.add(np.arange(100), np.zeros(100, dtype=int))
+        np.testing.assert_array_equal(indices, np.arange(count, count + 100))
+        self.assertEqual(store.count, count + 100)
+        self.assertGreaterEqual(store.rows.size, store.count)
+
+
+class GrowthCurveTests(TestCase):
+    def setUp(self):
+        add_initial_plant_data_to_db()
+
+    def test_table_matches_the_richards_curve(self):
+        parameters = {"H_max": 32, "k": 0.0045, "n": 1.421, "b": 9}
+        curve = get_growth_curve(parameters, horizon_hours=100)
+        np.testing.assert_allclose(curve.table, richards_rate(parameters, np.arange(101)), rtol=1e-12)
+        self.assertEqual(curve.rate(2.5), richards_rate(parameters, 2.5))
+        self.assertEqual(curve.rate(200), richards_rate(parameters, 200))
+
+    def test_crop_grows_along_the_curve(self):
+        sim = grown_simulation(benchmark_input(100), steps=5)
+        store = sim.strips[0].crops
+        crop = sim.crops_obj_layer[store.rows[0], store.cols[0]]
+        hours = (sim.current_date - sim.strips[0].sowing_date).total_seconds() / 3600
+        expected = abs(richards_rate(store.parameters, hours) * sim.stepsize) * crop.overlap
+        growthrate, _ = crop.grow(sim.crop_size_layer, sim.crops_obj_layer, sim.crops_pos_layer, sim.strips[0])
+        self.assertGreater(growthrate, 0)
+        self.assertAlmostEqual(growthrate, expected, places=12)
+
+
+class WindowedGrowthTests(TestCase):
+    def setUp(self):
+        add_initial_plant_data_to_db()
+
+    def test_growth_is_added_to_the_clipped_disk(self):
+        sim = grown_simulation(benchmark_input(100), steps=0)
+        store = sim.strips[0].crops
+        crop = sim.crops_obj_layer[store.rows[0], store.cols[0]]
+        crop.radius = 10
+        rows, cols = np.nonzero(CircularMaskCache().disk(5))
+        for center in ((0, 0), (3, 7), (sim.crop_size_layer.shape[0] - 1, sim.crop_size_layer.shape[1] - 2)):
+            crop.center = center
+            layer = np.zeros_like(sim.crop_size_layer)
+            crop.add_growthrate_tp_plant(2.0, layer)
+            # The disk of radius 5 around the center, cut off at the edges of the field
+            expected = np.zeros_like(layer)
+            for row, col in zip(rows + center[0] - 5, cols + center[1] - 5):
+                if 0 <= row < layer.shape[0] and 0 <= col < layer.shape[1]:
+                    expected[row, col] = 2.0
+            np.testing.assert_array_equal(layer, expected)
+
+
+class CircularMaskTests(TestCase):
+    def test_masks_match_the_uncached_masks(self):
+        masks = CircularMaskCache(max_radius=8)
+        for radius in (0, 1, 4, 8, 12):
+            y, x = np.ogrid[-radius:radius + 1, -radius:radius + 1]
+            disk = x**2 + y**2 <= radius**2
+            np.testing.assert_array_equal(masks.disk(radius), disk)
+            # The ring used to be the 4-neighbours of the disk, xor the disk
+            padded = np.pad(disk, 1)
+            ring = convolve(padded, np.array([[0, 1, 0], [1, 0, 1], [0, 1, 0]]), mode="constant", cval=0.0) ^ padded
+            np.testing.assert_array_equal(masks.ring(radius), ring)
+            dy, dx = masks.disk_offsets(radius)
+            np.testing.assert_array_equal(disk[dy + radius, dx + radius], True)
+            self.assertEqual(dy.size, disk.sum())
+
+    def test_masks_are_shared_and_read_only(self):
+        masks = CircularMaskCache(max_radius=8)
+        self.assertIs(masks.disk(3), masks.disk(3))
+        self.assertIsNot(masks.disk(9), masks.disk(9))
+        with self.assertRaises(ValueError):
+            masks.disk(3)[0, 0] = True
+
+
+class StripEngineTests(TestCase):
+    def setUp(self):
+        # A plant wide enough to reach across the edges of its 60 cm strips
+        Plant.objects.create(
+            name="wide", W_max=80, H_max=80, k=0.0045, n=1.421, b=9, max_moves=5, Yield=0.8,
+            size_per_plant=7068.3, row_distance=30, column_distance=30, planting_cost=0.05, revenue=100,
+        )
+
+    def grow(self, executor, steps=30):
+        sim = quietly(Simulation, benchmark_input(20, strip_width=60, row_spacing=60, plant_type="wide", num_strips=3), {}, executor)
+        for strip in sim.strips:
+            quietly(strip.planting, sim)
+        sim.engine = executor.start_engine(sim)
+        try:
+            for _ in range(steps):
+                for strip in sim.strips:
+                    sim.grow_plants(strip)
+                sim.current_date += timedelta(hours=sim.stepsize)
+        finally:
+            if sim.engine is not None:
+                sim.engine.close()
+        return sim
+
+    def test_strip_engine_matches_serial_growth_within_tolerance(self):
+        serial = self.grow(SerialExecutor())
+        with ProcessExecutor(2) as executor:
+            engine = self.grow(executor)
+        # Crops at the strip edges see the neighbouring strip as it was at the start of the step
+        np.testing.assert_allclose(engine.crop_size_layer.sum(), serial.crop_size_layer.sum(), rtol=0.01)
+        for serial_strip, engine_strip in zip(serial.strips, engine.strips):
+            np.testing.assert_allclose(engine_strip.crops.radius, serial_strip.crops.radius, rtol=0.05)
+
+    def test_uses_strip_engine(self):
+        input_data = benchmark_input(20, strip_width=60, num_strips=3)
+        self.assertFalse(uses_strip_engine(input_data))
+        self.assertTrue(uses_strip_engine(dict(input_data, workers=2)))
+        self.assertTrue(uses_strip_engine(dict(input_data, workers=2, executor="thread")))
+        self.assertFalse(uses_strip_engine(dict(input_data, workers=2), SerialExecutor()))
+        self.assertFalse(uses_strip_engine(dict(benchmark_input(20), executor="process")))
+
+    def test_close_releases_the_shared_memory_after_a_worker_died(self):
+        with ProcessExecutor(2) as executor:
+            sim = quietly(Simulation, benchmark_input(20, strip_width=60, row_spacing=60, plant_type="wide", num_strips=3), {}, executor)
+            for strip in sim.strips:
+                quietly(strip.planting, sim)
+            engine = executor.start_engine(sim)
+            names = [block.name for block in engine._blocks]
+            workers = list(executor._workers)
+            workers[0].kill()
+            workers[0].join()
+            with self.assertRaises((OSError, EOFError)):
+                engine.close()
+            for name in names:
+                with self.assertRaises(FileNotFoundError):
+                    shared_memory.SharedMemory(name=name)
+            self.assertTrue(sim.crop_size_layer.flags.owndata)
+        # The executor stops the worker that is still alive
+        self.assertFalse(any(worker.is_alive() for worker in workers))
+
+    def test_thread_workers_grow_like_worker_processes(self):
+        with ThreadExecutor(2) as executor:
+            threads = self.grow(executor)
+        with ProcessExecutor(2) as executor:
+            processes = self.grow(executor)
+        self.assertGreater(threads.crop_size_layer.sum(), 0)
+        np.testing.assert_array_equal(threads.crop_size_layer, processes.crop_size_layer)
+        np.testing.assert_array_equal(threads.boundary_layer, processes.boundary_layer)
+        for thread_strip, process_strip in zip(threads.strips, processes.strips):
+            np.testing.assert_array_equal(thread_strip.crops.radius, process_strip.crops.radius)
+
+
+class SnapshotTests(TestCase):
+    def test_array_round_trip(self):
+        array = np.random.default_rng(0).random((7, 5)).astype(np.float32)
+        decoded = decode_array(encode_array(array))
+        self.assertEqual(decoded.dtype, np.float32)
+        np.testing.assert_array_equal(decoded, array)
+
+    def test_arrays_are_stored_as_float32(self):
+        decoded = decode_array(encode_array(np.arange(6, dtype=np.float64).reshape(2, 3)))
+        self.assertEqual(decoded.dtype, np.float32)
+        self.assertEqual(decoded.shape, (2, 3))
+
+    def test_delta_encoder_replays_every_step(self):
+        rng = np.random.default_rng(1)
+        encoder = DeltaEncoder(keyframe_interval=3)
+        maps = []
+        current = np.zeros((6, 4), dtype=np.float32)
+        for _ in range(7):
+            current = current.copy()
+            current[rng.integers(0, 6), rng.integers(0, 4)] += 1
+            maps.append(current)
+        decoded = None
+        for index, array in enumerate(maps):
+            step, keyframe, snapshots = encoder.encode({"map": array})
+            self.assertEqual(step, index)
+            self.assertEqual(keyframe, index % 3 == 0)
+            decoded = decode_array(snapshots["map"]) if keyframe else apply_delta(decoded, snapshots["map"])
+            np.testing.assert_array_equal(decoded, array)
+
+    def test_shape_change_starts_a_keyframe(self):
+        encoder = DeltaEncoder(keyframe_interval=10)
+        encoder.encode({"map": np.zeros((2, 2))})
+        self.assertFalse(encoder.encode({"map": np.ones((2, 2))})[1])
+        self.assertTrue(encoder.encode({"map": np.ones((3, 2))})[1])
+
+
+def step_data(value):
+    return {
+        "date": "2022-10-01", "yield": value, "growth": value, "water": 0, "overlap": 0,
+        "time_needed": 0, "profit": 0, "temperature": 0, "rain": 0, "num_plants": 0,
+    }
+
+
+class OutputWriterTests(TransactionTestCase):
+    # The writer thread uses its own database connection
+    def setUp(self):
+        self.iteration = create_iteration()
+
+    def maps(self, value):
+        return {"map": np.full((3, 4), value, dtype=np.float32), "weed": np.zeros((3, 4), dtype=np.float32)}
+
+    def test_steps_are_written_in_order(self):
+        writer = OutputWriter(self.iteration, batch_size=4, keyframe_interval=3)
+        for value in range(11):
+            writer.record(step_data(value), self.maps(value) if value % 5 else None)
+        writer.close()
+        outputs = DataModelOutput.objects.filter(iteration=self.iteration).order_by("step")
+        self.assertEqual([output.step for output in outputs], list(range(11)))
+        for value, (output, maps) in enumerate(DataModelOutput.iter_maps(outputs)):
+            self.assertEqual(output.growth, value)
+            if value % 5:
+                np.testing.assert_array_equal(maps["map"], self.maps(value)["map"])
+            else:
+                self.assertIsNone(maps["map"])
+        # A delta step decodes on its own by replaying from its keyframe
+        np.testing.assert_array_equal(outputs.get(step=9).get_map(), self.maps(9)["map"])
+
+    def stalled_writer(self, backpressure):
+        writer = OutputWriter(self.iteration, max_pending=1, backpressure=backpressure)
+        release = threading.Event()
+        encode = writer.encoder.encode
+
+        def stalled_encode(maps):
+            release.wait()
+            return encode(maps)
+
+        writer.encoder.encode = stalled_encode
+        return writer, release
+
+    def test_drop_maps_keeps_the_scalars_of_a_full_queue(self):
+        writer, release = self.stalled_writer("drop_maps")
+        # The first step holds the only slot until the writer encoded it
+        writer.record(step_data(0), self.maps(0))
+        writer.record(step_data(1), self.maps(1))
+        release.set()
+        writer.close()
+        self.assertEqual(writer.dropped, 1)
+        outputs = DataModelOutput.objects.filter(iteration=self.iteration).order_by("step")
+        self.assertEqual([output.growth for output in outputs], [0, 1])
+        self.assertIsNotNone(outputs[0].map_data)
+        self.assertIsNone(outputs[1].map_data)
+
+    def test_block_waits_for_the_writer(self):
+        writer, release = self.stalled_writer("block")
+        writer.record(step_data(0), self.maps(0))
+        threading.Timer(0.1, release.set).start()
+        writer.record(step_data(1), self.maps(1))
+        writer.close()
+        self.assertEqual(writer.dropped, 0)
+        outputs = DataModelOutput.objects.filter(iteration=self.iteration).order_by("step")
+        np.testing.assert_array_equal(outputs[1].get_map(), self.maps(1)["map"])
+
+    def test_unknown_backpressure_policy(self):
+        with self.assertRaises(ValueError):
+            OutputWriter(self.iteration, backpressure="skip")
+
+
+class RecordingPolicyTests(TestCase):
+    def recorded_steps(self, policy, steps=10):
+        start = datetime(2022, 10, 1)
+        return [
+            step for step in range(steps)
+            if policy.records_maps(step, start + timedelta(hours=12 * step), last=step == steps - 1)
+        ]
+
+    def test_cadence(self):
+        self.assertEqual(self.recorded_steps(RecordingPolicy()), list(range(10)))
+        self.assertEqual(self.recorded_steps(RecordingPolicy(interval=4)), [0, 4, 8])
+        self.assertEqual(self.recorded_steps(RecordingPolicy(maps="none")), [])
+
+    def test_milestones(self):
+        policy = RecordingPolicy(maps="milestones", milestones=[1, "2022-10-03", "last"])
+        # 2022-10-03 is reached at step 4 and 5, only the first records
+        self.assertEqual(self.recorded_steps(policy), [1, 4, 9])
+
+    def test_unknown_modes(self):
+        with self.assertRaises(ValueError):
+            RecordingPolicy(maps="sometimes")
+        with self.assertRaises(ValueError):
+            RecordingPolicy(pooling="median")
+
+    def test_downsampling_pools_the_partial_blocks_over_their_cells(self):
+        array = np.arange(20, dtype=float).reshape(4, 5)
+        mean = RecordingPolicy(downsample=3).downsample_map(array)
+        maximum = RecordingPolicy(downsample=3, pooling="max").downsample_map(array)
+        self.assertEqual(mean.shape, (2, 2))
+        for row in range(2):
+            for col in range(2):
+                block = array[3 * row:3 * row + 3, 3 * col:3 * col + 3]
+                self.assertAlmostEqual(mean[row, col], block.mean())
+                self.assertEqual(maximum[row, col], block.max())
+        self.assertIs(RecordingPolicy().downsample_map(array), array)
+
+
+class JobTests(TestCase):
+    def test_a_job_is_claimed_once(self):
+        job = enqueue({"simName": "job"})
+        claimed = claim_job("worker-1")
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, SimulationJob.RUNNING)
+        self.assertEqual(claimed.worker, "worker-1")
+        self.assertIsNone(claim_job("worker-2"))
+
+    def test_queued_name_is_taken(self):
+        enqueue({"simName": "job"})
+        with self.assertRaises(SimulationNameTaken):
+            enqueue({"simName": "job"})
+
+    def test_name_is_taken_by_a_job_queued_after_the_check(self):
+        enqueue({"simName": "job"})
+        # As if the other request created its job after this one looked for it
+        with mock.patch("django.db.models.query.QuerySet.exists", return_value=False):
+            with self.assertRaises(SimulationNameTaken):
+                enqueue({"simName": "job"})
+        self.assertEqual(SimulationJob.objects.filter(sim_name="job").count(), 1)
+
+    def test_name_of_a_failed_job_can_be_queued_again(self):
+        failed = enqueue({"simName": "job"})
+        SimulationJob.objects.filter(id=failed.id).update(status=SimulationJob.FAILED)
+        self.assertNotEqual(enqueue({"simName": "job"}).id, failed.id)
+
+    def test_only_stale_jobs_fail(self):
+        stale = enqueue({"simName": "stale"})
+        fresh = enqueue({"simName": "fresh"})
+        claim_job("worker")
+        claim_job("worker")
+        SimulationJob.objects.filter(id=stale.id).update(heartbeat=timezone.now() - STALE_AFTER - timedelta(seconds=1))
+        self.assertEqual(fail_stale_jobs(), 1)
+        self.assertEqual(SimulationJob.objects.get(id=stale.id).status, SimulationJob.FAILED)
+        self.assertEqual(SimulationJob.objects.get(id=fresh.id).status, SimulationJob.RUNNING)
+
+    def test_a_job_failed_as_stale_stays_failed(self):
+        enqueue({"simName": "slow"})
+        job = claim_job("worker")
+
+        def stale_run(input_data, progress):
+            # Another worker fails the job while it still runs
+            SimulationJob.objects.filter(id=job.id).update(heartbeat=timezone.now() - STALE_AFTER - timedelta(seconds=1))
+            fail_stale_jobs()
+
+        with mock.patch("simapp.scripts.jobs.main", stale_run):
+            run_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, SimulationJob.FAILED)
+        self.assertEqual(job.error, "The worker stopped reporting progress.")
+
+    def test_heartbeat_keeps_a_job_fresh(self):
+        enqueue({"simName": "sweep"})
+        job = claim_job("worker")
+        SimulationJob.objects.filter(id=job.id).update(heartbeat=timezone.now() - STALE_AFTER - timedelta(seconds=1))
+        JobProgress(job, interval=0).heartbeat()
+        self.assertEqual(fail_stale_jobs(), 0)
+
+
+class DataStreamTests(TestCase):
+    def setUp(self):
+        input_instance = DataModelInput.objects.create(startDate="2022-10-01", stepSize=24, rowLength=50, simName="stream")
+        self.iterations = [SimulationIteration.objects.create(input=input_instance, iteration_index=index) for index in range(2)]
+        for iteration in self.iterations:
+            encoder = DeltaEncoder(keyframe_interval=2)
+            for step in range(3):
+                output = DataModelOutput(iteration=iteration, step=step)
+                output.set_data(dict(step_data(step), date=f"2022-10-0{step + 1} 00:00:00"))
+                maps = {"map": np.full((2, 3), step, dtype=np.float32), "weed": np.zeros((2, 3), dtype=np.float32)}
+                output.set_snapshots(*encoder.encode(maps))
+                output.save()
+
+    def records(self, **params):
+        response = self.client.get(reverse("get_simulation_data"), dict(params, name="stream"))
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        return [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+
+    def test_one_record_per_iteration_then_per_output(self):
+        records = self.records()
+        self.assertEqual([record["type"] for record in records], ["iteration"] * 2 + ["output"] * 6)
+        self.assertEqual([record["id"] for record in records[:2]], [iteration.id for iteration in self.iterations])
+        outputs = records[2:]
+        self.assertEqual(
+            [(record["iteration"], record["growth"]) for record in outputs],
+            [(iteration.id, step) for iteration in self.iterations for step in range(3)],
+        )
+        # The delta steps are sent as full maps
+        self.assertEqual(outputs[1]["map"], [[1.0] * 3] * 2)
+
+    def test_selection(self):
+        iteration = self.iterations[1]
+        outputs = self.records(fields="growth", iterations="1", stride=2)[1:]
+        self.assertEqual(outputs, [
+            {"type": "output", "iteration": iteration.id, "growth": step} for step in (0, 2)
+        ])
+        # The maps of a skipped delta step are still applied
+        outputs = self.records(fields="map", iterations="1", from_date="2022-10-02")[1:]
+        self.assertEqual([output["map"][0][0] for output in outputs], [1.0, 2.0])
+
+    def test_a_name_is_required(self):
+        self.assertEqual(self.client.get(reverse("get_simulation_data")).status_code, 400)
+
+    def test_an_invalid_query_is_rejected(self):
+        self.assertEqual(self.client.get(reverse("get_simulation_data"), {"name": "stream", "stride": 0}).status_code, 400)
+
+
+class DataQueryTests(TestCase):
+    def test_defaults(self):
+        query = parse_data_query(QueryDict(""))
+        self.assertIn("yield", query["fields"])
+        self.assertEqual((query["from_step"], query["to_step"], query["stride"]), (0, None, 1))
+
+    def test_dates_are_inclusive(self):
+        query = parse_data_query(QueryDict("from_date=2022-10-01&to_date=2022-10-02&iterations=0,2"))
+        self.assertEqual((query["from_date"], query["to_date"]), ("2022-10-01", "2022-10-03"))
+        self.assertEqual(query["iterations"], [0, 2])
+
+    def test_invalid_parameters(self):
+        for params in ("fields=yield,nothing", "stride=0", "from_step=first", "from_date=01.10.2022", "iterations=a"):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                parse_data_query(QueryDict(params))
+
+
+class FrameTests(TransactionTestCase):
+    # The outputs are saved by the writer thread of the simulation, which needs committed data
+    def setUp(self):
+        add_initial_plant_data_to_db()
+        add_initial_weather_data_to_db()
+        input_data = benchmark_input(20, strip_width=60)
+        input_data.update(simName="frames", keyframeInterval=1)
+        quietly(main, input_data)
+        self.iteration = SimulationIteration.objects.get(input__simName="frames")
+
+    def test_frame_is_revalidated_with_its_etag(self):
+        url = reverse("frame", args=[self.iteration.id, 0])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        rows, cols = map(int, response["X-Frame-Shape"].split(","))
+        self.assertEqual(len(response.content), rows * cols * 4)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+        self.assertEqual(self.client.get(url, {"layer": "weed"}, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+    def test_invalid_frames(self):
+        self.assertEqual(self.client.get(reverse("frame", args=[self.iteration.id, 0]), {"layer": "soil"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("frame", args=[self.iteration.id, 10000])).status_code, 404)
+
+    def test_frame_matches_the_recorded_map(self):
+        frames = self.client.get(reverse("frame_index", args=[self.iteration.id])).json()["frames"]
+        self.assertTrue(frames)
+        step = frames[-1]["step"]
+        output = DataModelOutput.objects.get(iteration=self.iteration, step=step)
+        response = self.client.get(reverse("frame", args=[self.iteration.id, step]))
+        frame = np.frombuffer(response.content, dtype="<f4").reshape(output.get_map().shape)
+        np.testing.assert_array_equal(frame, output.get_map())
+
+
+class IterationSummaryTests(TestCase):
+    def setUp(self):
+        self.iteration = create_iteration()
+        self.iteration.field_length = 200
+        self.iteration.field_width = 50
+        self.iteration.save()
+        # Saved out of step order, the last output is the one of the last step
+        for step in (1, 3, 0, 2):
+            self.add_output(step)
+
+    def add_output(self, step):
+        output = DataModelOutput(iteration=self.iteration, step=step)
+        output.set_data(dict(step_data(step * 10), growth=step + 0.5, profit=step * 3, num_plants=step + 1))
+        output.save()
+
+    def test_summary_matches_the_outputs(self):
+        outputs = list(DataModelOutput.objects.filter(iteration=self.iteration).order_by("step"))
+        last = outputs[-1]
+        mean_growth = sum(output.growth for output in outputs) / len(outputs)
+        summary = summarize(self.iteration)
+        self.assertEqual(summary.steps, 4)
+        self.assertEqual((summary.num_plants, summary.yield_value, summary.profit), (last.num_plants, last.yield_value, last.profit))
+        self.assertAlmostEqual(summary.mean_growth, mean_growth)
+        self.assertAlmostEqual(summary.yield_per_plant, last.yield_value / last.num_plants)
+        self.assertAlmostEqual(summary.growth_per_plant, mean_growth / last.num_plants)
+        # 200 x 50 cm² are 1 m²
+        self.assertAlmostEqual(summary.profit_per_area, last.profit)
+        self.assertAlmostEqual(summary.growth_per_area, mean_growth)
+
+    def test_summaries_are_cached_until_the_outputs_change(self):
+        summary = summarize(self.iteration)
+        with self.assertNumQueries(2):
+            self.assertEqual(get_summaries([self.iteration])[0].id, summary.id)
+        self.add_output(4)
+        self.assertEqual(get_summaries([self.iteration])[0].num_plants, 5)
+
+    def test_endpoint(self):
+        response = self.client.get(reverse("get_simulation_summary"), {"name": "test"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(IterationSummary.objects.get().num_plants, 4)
+
+
+class SweepTests(TestCase):
+    def sweep_input(self, **extra):
+        input_data = benchmark_input(20, strip_width=60)
+        input_data.update(testingMode=True, testingData={"parameters": {"rowSpacing": {"values": [15, 20]}}}, **extra)
+        return input_data
+
+    def test_variations_do_not_share_their_rows(self):
+        input_data = benchmark_input(20)
+        first = modify_input_data_for_parameter(input_data, "rowSpacing", 20)
+        second = modify_input_data_for_parameter(input_data, "rowSpacing", 30)
+        self.assertEqual((first["rows"][0]["rowSpacing"], second["rows"][0]["rowSpacing"]), (20, 30))
+        self.assertEqual(input_data["rows"][0]["rowSpacing"], 15)
+
+    def test_denser_variations_are_expected_to_take_longer(self):
+        input_data = benchmark_input(20)
+        dense = SweepTask(0, 15, modify_input_data_for_parameter(input_data, "rowSpacing", 15))
+        sparse = SweepTask(1, 30, modify_input_data_for_parameter(input_data, "rowSpacing", 30))
+        self.assertAlmostEqual(dense.expected_cost, 2 * sparse.expected_cost)
+
+    def test_runs_sweep(self):
+        self.assertTrue(runs_sweep(self.sweep_input(sweepWorkers=2)))
+        self.assertFalse(runs_sweep(self.sweep_input()))
+        self.assertFalse(runs_sweep(dict(self.sweep_input(sweepWorkers=2), testingMode=False)))
+
+    def test_a_sweep_starts_no_executor(self):
+        add_initial_plant_data_to_db()
+        add_initial_weather_data_to_db()
+        with mock.patch("simapp.scripts.calculate.create_executor") as create_executor, \
+                mock.patch("simapp.scripts.calculate.run_sweep", return_value={0: 0.0, 1: 0.0}) as run_sweep:
+            quietly(main, self.sweep_input(sweepWorkers=2, executor="process", workers=2))
+        create_executor.assert_not_called()
+        self.assertEqual(len(run_sweep.call_args.args[0]), 2)
+
+    def test_expected_cost_counts_the_steps(self):
+        daily = SweepTask(0, 0, benchmark_input(20, step_size=24)).expected_cost
+        hourly = SweepTask(0, 0, benchmark_input(20, step_size=1)).expected_cost
+        self.assertEqual(hourly, 24 * daily)
+
+    def test_variations_finished_before_a_worker_died_are_not_run_again(self):
+        tasks = [SweepTask(index, 0, benchmark_input(20), create_iteration(f"variation {index}").id) for index in range(2)]
+        broken, finished, retried = Future(), Future(), Future()
+        broken.set_exception(BrokenProcessPool("A worker died"))
+        finished.set_result(2.0)
+        retried.set_result(1.0)
+        outcomes = [broken, finished, retried]
+        submitted = []
+
+        class Pool:
+            def __init__(self, *args, **kwargs):
+                pass
+
+            def submit(self, function, input_data, iteration_id):
+                submitted.append(iteration_id)
+                return outcomes.pop(0)
+
+            def shutdown(self, cancel_futures=False):
+                pass
+
+        # Both variations are done when the pool is looked at, the broken one first
+        with mock.patch("simapp.scripts.sweep.ProcessPoolExecutor", Pool), \
+                mock.patch("simapp.scripts.sweep.wait", lambda futures, **kwargs: (list(futures), set())), \
+                self.assertLogs("simapp.scripts.sweep", "WARNING"):
+            runtimes = run_sweep(tasks, workers=2)
+        self.assertEqual(runtimes, {0: 1.0, 1: 2.0})
+        self.assertEqual(submitted, [tasks[0].iteration_id, tasks[1].iteration_id, tasks[0].iteration_id])
+
+
+class DesignTests(TestCase):
+    def test_grid_takes_every_combination(self):
+        points = design_points({
+            "design": "grid",
+            "parameters": {
+                "stripWidth": {"start": 30, "end": 50, "step": 10},
+                "plantingType": {"values": ["grid", "alternating"]},
+            },
+        })
+        self.assertEqual(len(points), 6)
+        self.assertEqual(points[0], {"stripWidth": 30, "plantingType": "grid"})
+        self.assertEqual(points[-1], {"stripWidth": 50, "plantingType": "alternating"})
+        self.assertIsInstance(points[1]["stripWidth"], int)
+
+    def test_grid_keeps_the_end_of_a_float_step(self):
+        points = design_points({"parameters": {"rowSpacing": {"values": [15]}, "k": {"start": 0, "end": 0.3, "step": 0.1}}})
+        self.assertEqual([point["k"] for point in points], [0.0, 0.1, 0.2, 0.3])
+
+    def test_integer_input_rejects_a_fractional_step(self):
+        with self.assertRaises(ValueError):
+            design_points({"parameters": {"stripWidth": {"start": 30, "end": 60, "step": 7.5}}})
+
+    def test_grid_is_limited(self):
+        with self.assertRaises(ValueError):
+            design_points({"parameters": {"stripWidth": {"start": 1, "end": MAX_SWEEP_POINTS + 1, "step": 1}}})
+
+    def test_unknown_design(self):
+        with self.assertRaises(ValueError):
+            design_points({"design": "random", "parameters": {"stripWidth": {"values": [30]}}})
+
+    def test_lhs_samples_the_ranges(self):
+        testing_data = {
+            "design": "lhs",
+            "parameters": {"k": {"start": 0.5, "end": 1.5}, "rowSpacing": {"start": 10, "end": 20, "step": 5}},
+            "samples": 10,
+            "seed": 3,
+        }
+        points = design_points(testing_data)
+        self.assertEqual(len(points), 10)
+        self.assertEqual(points, design_points(testing_data))
+        for point in points:
+            self.assertTrue(0.5 <= point["k"] <= 1.5)
+            self.assertIn(point["rowSpacing"], (10, 15, 20))
+        # A Latin hypercube takes one sample from every tenth of a range
+        bins = {int((point["k"] - 0.5) * 10) for point in points}
+        self.assertEqual(len(bins), 10)
+
+    def test_range_without_step_is_not_rounded(self):
+        testing_data = {"design": "sobol", "parameters": {"a": {"start": 0, "end": 1}}, "samples": 8, "seed": 1}
+        values = [point["a"] for point in design_points(testing_data)]
+        self.assertEqual(len(set(values)), 8)
+        self.assertTrue(all(0 <= value <= 1 for value in values))
+
+    def test_whole_step_and_integer_inputs_are_rounded(self):
+        testing_data = {
+            "design": "lhs",
+            "parameters": {"a": {"start": 0, "end": 10, "step": 2}, "stripWidth": {"start": 30, "end": 60}},
+            "samples": 8,
+            "seed": 1,
+        }
+        for point in design_points(testing_data):
+            self.assertIsInstance(point["a"], int)
+            self.assertEqual(point["a"] % 2, 0)
+            self.assertIsInstance(point["stripWidth"], int)
+
+    def test_sobol_needs_a_power_of_two(self):
+        with self.assertRaises(ValueError):
+            design_points({"design": "sobol", "parameters": {"a": {"start": 0, "end": 1}}, "samples": 5})
+
+
+class ResultCacheTests(TestCase):
+    def test_link_counts_the_hit(self):
+        source = create_iteration("source")
+        ResultCacheEntry.objects.create(key="a" * 64, iteration=source)
+        iteration = create_iteration("copy")
+        self.assertTrue(link_cached_result(iteration, "a" * 64))
+        self.assertEqual(iteration.cached_from, source)
+        self.assertEqual(iteration.result_id, source.id)
+        self.assertEqual(ResultCacheEntry.objects.get().hits, 1)
+        self.assertFalse(link_cached_result(create_iteration("miss"), "b" * 64))
+
+    def test_evict_removes_old_and_least_recently_used_entries(self):
+        iteration = create_iteration()
+        now = timezone.now()
+        for index in range(5):
+            ResultCacheEntry.objects.create(key=str(index) * 64, iteration=iteration)
+            ResultCacheEntry.objects.filter(key=str(index) * 64).update(last_used_at=now - timedelta(days=index))
+        ResultCacheEntry.objects.filter(key="4" * 64).update(last_used_at=now - timedelta(days=200))
+        self.assertEqual(evict(max_entries=2, max_age=timedelta(days=90)), 3)
+        self.assertEqual(set(ResultCacheEntry.objects.values_list("key", flat=True)), {"0" * 64, "1" * 64})
+
+
+    def test_key_ignores_the_name_and_the_number_format(self):
+        add_initial_plant_data_to_db()
+        hours = 60 * 24
+        weather_data = WeatherSeries(datetime(2022, 10, 1), {"rain": np.ones(hours), "temperature": np.full(hours, 10.0)})
+        input_data = benchmark_input(20)
+        key = result_key(input_data, weather_data)
+        renamed = dict(input_data, simName="other", rowLength=str(input_data["rowLength"]), writerBatchSize=5)
+        self.assertEqual(result_key(renamed, weather_data), key)
+        self.assertNotEqual(result_key(dict(input_data, rowLength=input_data["rowLength"] + 1), weather_data), key)
+        weather_data.columns["rain"][19 * 24] = 2.0
+        self.assertNotEqual(result_key(input_data, weather_data), key)
+
+    def test_key_has_the_seed_only_if_random_numbers_are_drawn(self):
+        add_initial_plant_data_to_db()
+        input_data = benchmark_input(20)
+        self.assertEqual(result_key(dict(input_data, seed=1), None), result_key(dict(input_data, seed=2), None))
+        weedy = dict(input_data, allowWeedgrowth=True)
+        self.assertNotEqual(result_key(dict(weedy, seed=1), None), result_key(dict(weedy, seed=2), None))
+        random_planting = copy.deepcopy(input_data)
+        random_planting["rows"][0]["plantingType"] = "random"
+        self.assertNotEqual(result_key(dict(random_planting, seed=1), None), result_key(dict(random_planting, seed=2), None))
+
+
+class CachedRunTests(TransactionTestCase):
+    # The outputs are saved by the writer thread of the simulation, which needs committed data
+    def test_an_unseeded_rerun_is_found_in_the_cache(self):
+        add_initial_plant_data_to_db()
+        add_initial_weather_data_to_db()
+        input_data = benchmark_input(20, strip_width=60)
+        del input_data["seed"]
+        for name in ("first", "rerun"):
+            quietly(main, dict(input_data, simName=name))
+        first = SimulationIteration.objects.get(input__simName="first")
+        rerun = SimulationIteration.objects.get(input__simName="rerun")
+        self.assertIsNone(first.cached_from)
+        self.assertEqual(rerun.cached_from, first)
+        # Both runs drew a seed of their own
+        self.assertNotEqual(first.input.seed, rerun.input.seed)
+
+    def test_a_run_with_dropped_maps_is_not_cached(self):
+        add_initial_plant_data_to_db()
+        add_initial_weather_data_to_db()
+        record = OutputWriter.record
+
+        def dropping_record(writer, data, maps=None):
+            # As if the queue of the writer were always full
+            writer.dropped += maps is not None
+            record(writer, data, None)
+
+        with mock.patch.object(OutputWriter, "record", dropping_record):
+            quietly(main, dict(benchmark_input(20, strip_width=60), writerBackpressure="drop_maps"))
+        self.assertFalse(ResultCacheEntry.objects.exists())
+
+
+class RandomStreamTests(TestCase):
+    def setUp(self):
+        add_initial_plant_data_to_db()
+
+    def simulate(self, seed, steps=15):
+        input_data = benchmark_input(50, strip_width=120)
+        input_data.update(seed=seed, allowWeedgrowth=True)
+        input_data["rows"][0]["plantingType"] = "random"
+        sim = quietly(Simulation, input_data, {})
+        for strip in sim.strips:
+            quietly(strip.planting, sim)
+        for _ in range(steps):
+            sim.grow_weeds(sim.strips[0])
+            sim.grow_plants(sim.strips[0])
+            sim.current_date += timedelta(hours=sim.stepsize)
+        return sim
+
+    def test_the_same_seed_gives_the_same_results(self):
+        first, second = self.simulate(42), self.simulate(42)
+        self.assertTrue(first.weeds_pos_layer.any())
+        np.testing.assert_array_equal(first.crops_pos_layer, second.crops_pos_layer)
+        np.testing.assert_array_equal(first.crop_size_layer, second.crop_size_layer)
+        np.testing.assert_array_equal(first.weeds_pos_layer, second.weeds_pos_layer)
+        np.testing.assert_array_equal(first.weeds_size_layer, second.weeds_size_layer)
+
+    def test_another_seed_plants_elsewhere(self):
+        self.assertFalse(np.array_equal(self.simulate(1, steps=0).crops_pos_layer, self.simulate(2, steps=0).crops_pos_layer))
+
+    def test_streams_are_independent(self):
+        streams = RandomStreams(7)
+        planting = streams.planting.random(3)
+        self.assertEqual(RandomStreams(7).weeds.random(), streams.weeds.random())
+        np.testing.assert_array_equal(RandomStreams(7).planting.random(3), planting)
+
+
+class WeatherSeriesTests(TestCase):
+    def setUp(self):
+        start = datetime(2022, 10, 1)
+        # The hour 03:00 has no record
+        self.series = WeatherSeries.from_records([
+            {"date": start + timedelta(hours=hour), "rain": float(hour), "temperature": 10.0 + hour}
+            for hour in (0, 1, 2, 4, 5)
+        ])
+
+    def test_hourly_lookup(self):
+        self.assertEqual(len(self.series), 6)
+        self.assertEqual(self.series.value("rain", datetime(2022, 10, 1, 2, 30)), 2.0)
+        self.assertTrue(np.isnan(self.series.value("rain", datetime(2022, 10, 1, 3))))
+        with self.assertRaises(KeyError):
+            self.series.value("rain", datetime(2022, 10, 1, 6))
+
+    def test_windows_skip_the_missing_hours(self):
+        date = datetime(2022, 10, 1, 1)
+        self.assertEqual(self.series.total("rain", date, hours=4), 1 + 2 + 4)
+        self.assertEqual(self.series.mean("temperature", date, hours=4), (11 + 12 + 14) / 3)
+        self.assertTrue(np.isnan(self.series.mean("rain", datetime(2022, 10, 1, 3))))
+        # A window past the end of the series ends with its last hour
+        self.assertEqual(self.series.total("rain", datetime(2022, 10, 1, 4), hours=24), 9)
+
+    def test_window(self):
+        window = self.series.window(datetime(2022, 10, 1, 1), datetime(2022, 10, 1, 2))
+        self.assertEqual(window.start, datetime(2022, 10, 1, 1))
+        np.testing.assert_array_equal(window.columns["rain"], [1.0, 2.0])
+
+
+class LoadWeatherTests(TestCase):
+    def setUp(self):
+        clear_weather_cache()
+        self.addCleanup(clear_weather_cache)
+        for hour in range(6):
+            self.add_weather(f"2022-10-01 {hour:02}:00:00", rain=hour)
+
+    def add_weather(self, date, rain):
+        weather = Weather()
+        weather.set_data({"date": date, "rain": rain, "temperature": 10.0})
+        weather.save()
+
+    def test_window(self):
+        series = load_weather(datetime(2022, 10, 1, 2), datetime(2022, 10, 1, 4))
+        self.assertEqual(series.start, datetime(2022, 10, 1, 2))
+        np.testing.assert_array_equal(series.columns["rain"], [2.0, 3.0, 4.0])
+        self.assertEqual(series.value("rain", datetime(2022, 10, 1, 3)), 3.0)
+
+    def test_loading_is_memoized_until_the_weather_changes(self):
+        series = load_weather()
+        # Only the fingerprint of the table is read again
+        with self.assertNumQueries(1):
+            self.assertIs(load_weather(), series)
+        self.add_weather("2022-10-01 06:00:00", rain=6)
+        reloaded = load_weather()
+        self.assertIsNot(reloaded, series)
+        self.assertEqual(len(reloaded), 7)
+
+
+class SeedDataTests(TestCase):
+    def seed(self, *args, **options):
+        out = io.StringIO()
+        call_command("seed_data", *args, stdout=out, **options)
+        return out.getvalue()
+
+    def counts(self):
+        return Plant.objects.count(), Weather.objects.filter(site="").count(), Weather.objects.filter(site="station").count()
+
+    def test_seeding_twice_changes_nothing(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as file:
+            file.write("date,temperature,rain\n2022-10-01 00:00:00,10.0,0.0\n2022-10-01 01:00:00,11.0,0.5\n")
+        self.addCleanup(os.remove, file.name)
+        self.seed(file.name, site="station")
+        counts = self.counts()
+        self.assertTrue(all(counts))
+        # The bundled weather has the same hours, but of another site
+        self.assertEqual(counts[2], 2)
+        output = self.seed(file.name, site="station")
+        self.assertEqual(self.counts(), counts)
+        self.assertIn("Plants: 0 added", output)
+        self.assertEqual(output.count(": 0 hours added"), 2)
+
+    def test_a_missing_file_is_an_error(self):
+        with self.assertRaises(CommandError):
+            self.seed("no_such_weather.csv")
+
+
+class WeedTests(TestCase):
+    def setUp(self):
+        add_initial_plant_data_to_db()
+
+    def simulation(self, spawn_rate=1, seed=0):
+        input_data = benchmark_input(50, strip_width=120)
+        input_data.update(seed=seed, allowWeedgrowth=True, weedSpawnRate=spawn_rate)
+        return quietly(Simulation, input_data, {})
+
+    def test_one_weed_per_cell(self):
+        sim = self.simulation()
+        self.assertEqual(list(sim.add_weeds([3, 5, 3], [4, 6, 4])), [0, 1])
+        # A cell with a weed keeps it
+        self.assertEqual(len(sim.add_weeds([5, 7], [6, 8])), 1)
+        self.assertEqual(sim.weeds.count, 3)
+        self.assertEqual(sim.weeds_pos_layer.sum(), 3)
+
+    def test_spawned_weeds_grow(self):
+        sim = self.simulation(spawn_rate=20)
+        for _ in range(10):
+            sim.grow_weeds(sim.strips[0])
+            sim.current_date += timedelta(hours=sim.stepsize)
+        self.assertGreater(sim.weeds.count, 0)
+        self.assertEqual(sim.weeds.count, sim.weeds_pos_layer.sum())
+        self.assertGreater(sim.weeds_size_layer.sum(), 0)
+
+    def test_spawn_rate(self):
+        sim = self.simulation(spawn_rate=0)
+        for _ in range(10):
+            sim.spawn_weeds()
+        self.assertEqual(sim.weeds.count, 0)
+        # Nothing is planted, so a spot gets a weed with a chance of 0.2 at a daily step
+        sim = self.simulation(spawn_rate=100)
+        for _ in range(10):
+            sim.spawn_weeds()
+        self.assertTrue(100 < sim.weeds.count < 300)
+
+    def test_the_same_seed_spawns_the_same_weeds(self):
+        layers = []
+        for _ in range(2):
+            sim = self.simulation(spawn_rate=5, seed=3)
+            for _ in range(5):
+                sim.spawn_weeds()
+            layers.append(sim.weeds_pos_layer)
+        np.testing.assert_array_equal(*layers)
+
+
+class WeatherTests(TestCase):
+    def add_weather_file(self, content, site):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return add_weather_data_to_db(file.name, site)
+
+    def test_the_other_columns_are_loaded(self):
+        self.add_weather_file(
+            "date,Wind,temperature,Hum,rain\n"
+            "2023-05-01 00:00:00,1.5,10.0,80.0,0.0\n"
+            "2023-05-01 01:00:00,2.5,11.0,,0.5\n",
+            "station",
+        )
+        series = load_weather(site="station")
+        np.testing.assert_array_equal(series.columns["wind"], [1.5, 2.5])
+        np.testing.assert_array_equal(series.columns["humidity"], [80.0, np.nan])
+        self.assertTrue(np.isnan(series.columns["radiation"]).all())
+
+    def test_a_file_needs_temperature_and_rain(self):
+        added = self.add_weather_file("date,temperature,rain\n2023-05-01 00:00:00,10.0,0.0\n", "station")
+        self.assertEqual(added, 1)
+        self.assertEqual(self.add_weather_file("date,temperature,rain\n2023-05-01 00:00:00,10.0,0.0\n", "station"), 0)
+        with self.assertRaises(ValueError):
+            self.add_weather_file("date,temperature\n2023-05-01 00:00:00,10.0\n", "other")
+
+    def test_an_hour_is_stored_once_per_site(self):
+        content = "date,temperature,rain\n2023-05-01 00:00:00,10.0,0.0\n2023-05-01 00:00:00,12.0,1.0\n"
+        self.assertEqual(self.add_weather_file(content, "station"), 1)
+        self.assertEqual(self.add_weather_file(content, "other"), 1)
+        self.assertEqual(Weather.objects.filter(site="station").get().temperature, 10.0)
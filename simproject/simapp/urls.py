@@ -5,7 +5,11 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),  # Home page
     path('run_simulation/', views.run_simulation, name='run_simulation'),  # URL to trigger the script
+    path('api/jobs/<int:job_id>/progress/', views.job_progress, name='job_progress'),  # Progress of a queued simulation
+    path('api/iterations/<int:iteration_id>/frames/', views.frame_index, name='frame_index'),  # Steps with heatmaps
+    path('api/iterations/<int:iteration_id>/frames/<int:step>/', views.frame, name='frame'),  # Heatmap of one step
     path('api/get_simulation_data/', views.get_simulation_data, name='get_simulation_data'),  # API to fetch simulation results
+    path('api/get_simulation_summary/', views.get_simulation_summary, name='get_simulation_summary'),  # Metrics per iteration
     path('plants/', views.plant_list, name='plant_list'),
     path('plants/manage/', views.plant_manage, name='plant_manage'),
     path('plants/manage/<int:plant_id>/', views.plant_manage, name='plant_manage'),
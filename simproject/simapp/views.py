@@ -1,16 +1,38 @@
 from django.shortcuts import render
 from django.http import JsonResponse, HttpResponseBadRequest
-from .scripts.calculate import main  # Ensure this function exists and is correct
-from .scripts.add_initial_data_to_db import add_initial_weather_data_to_db, add_initial_plant_data_to_db
+from .scripts.jobs import SimulationNameTaken, enqueue
 import json
 from .models import  DataModelOutput, SimulationIteration
-from .models import Weather, Plant,DataModelInput
+from .models import Weather, Plant,DataModelInput, SimulationJob
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.urls import reverse
 from django.shortcuts import get_object_or_404
 from .forms import PlantForm
 from django.http import StreamingHttpResponse
+import time
+from itertools import groupby
+from operator import attrgetter
+from datetime import datetime, timedelta
+from django.db.models import F
+from django.db.models.functions import Mod
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+import numpy as np
+from .frames import get_frame, recorded_frames, resize_frame
+from .snapshots import encode_png
+from .summaries import get_summaries
+
+# Seconds between two looks at the progress of a job
+PROGRESS_POLL_INTERVAL = 0.5
+# Seconds after which an idle event stream gets a comment
+PROGRESS_KEEPALIVE = 15
+# Outputs fetched from the database at once while streaming the results
+OUTPUT_CHUNK_SIZE = 50
+# Seconds a browser may reuse a frame without asking again
+FRAME_MAX_AGE = 24 * 3600
+
 def index(request):
     simulations = DataModelInput.objects.all().values_list('simName', flat=True)
     print(simulations)
@@ -20,65 +42,188 @@ def index(request):
 def run_simulation(request):
     if request.method != 'POST':
         return JsonResponse({'error': 'POST request required'}, status=405)
-    simulation_name = request.POST.get('simName')
-    if DataModelInput.objects.filter(simName=simulation_name).exists():
-        print("Simulation name already exists. Please choose a different name.")
-        messages.error(request, 'Simulation name already exists. Please choose a different name.')
-        return redirect('index')  
-
     try:
         data = json.loads(request.body.decode('utf-8'))  # Ensure this is where you intend to get your data
-        # Insert code to add weather and plant data if not present
-        if Weather.objects.count() == 0:
-            add_initial_weather_data_to_db()
-        if Plant.objects.count() == 0:
-            add_initial_plant_data_to_db()
-
-        main(data)  # This will process your data and presumably save results
-        # Return the name of the simulation after it runs
-        return JsonResponse({'name': data["simName"]})
-
     except json.JSONDecodeError:
         return HttpResponseBadRequest("Invalid JSON format")
 
+    # The simulation runs in a worker (manage.py run_simulation_worker), not in the request
+    try:
+        job = enqueue(data)
+    except SimulationNameTaken:
+        return JsonResponse({'error': 'Simulation name already exists. Please choose a different name.'}, status=409)
+    return JsonResponse(
+        {'job': job.id, 'name': job.sim_name, 'progress': reverse('job_progress', args=[job.id])},
+        status=202,
+    )
 
 
+def job_progress(request, job_id):
+    """
+    Stream the progress of a simulation job until it finished or failed.
 
+    Every change is sent as one JSON record, as Server-Sent Events if the client
+    accepts text/event-stream (or asks for ?format=sse) and as NDJSON otherwise.
+    """
+    job = get_object_or_404(SimulationJob, pk=job_id)
+    sse = request.GET.get('format') == 'sse' or 'text/event-stream' in request.headers.get('Accept', '')
+
+    def progress_generator():
+        last = None
+        last_sent = time.monotonic()
+        while True:
+            progress = SimulationJob.objects.get(pk=job.pk).get_progress()
+            if progress != last:
+                record = json.dumps(progress)
+                yield f"event: progress\ndata: {record}\n\n" if sse else record + '\n'
+                last = progress
+                last_sent = time.monotonic()
+            elif sse and time.monotonic() - last_sent > PROGRESS_KEEPALIVE:
+                # Keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                last_sent = time.monotonic()
+            if progress['status'] not in SimulationJob.ACTIVE:
+                return
+            time.sleep(PROGRESS_POLL_INTERVAL)
+
+    response = StreamingHttpResponse(
+        progress_generator(), content_type="text/event-stream" if sse else "application/x-ndjson"
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+
+
+
+def parse_data_query(params):
+    """
+    Read the selection of the simulation data API from the query parameters.
+
+    Parameters
+    ----------
+    params : QueryDict
+        ``fields`` (comma separated names of the output values, default all),
+        ``iterations`` (comma separated iteration indices), ``from_step`` and
+        ``to_step`` (inclusive), ``from_date`` and ``to_date`` ("YYYY-MM-DD",
+        inclusive) and ``stride`` (every n-th step from ``from_step``).
+
+    Returns
+    -------
+    dict
+        The selected fields, iterations, step and date range and stride.
+
+    Raises
+    ------
+    ValueError
+        If a parameter is invalid.
+    """
+    available = list(DataModelOutput.SCALARS) + list(DataModelOutput.MAPS)
+    fields = [name for name in params.get('fields', '').split(',') if name] or available
+    unknown = set(fields) - set(available)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    query = {
+        'fields': fields,
+        'iterations': [int(index) for index in params['iterations'].split(',')] if params.get('iterations') else None,
+        'from_step': int(params.get('from_step', 0)),
+        'to_step': int(params['to_step']) if 'to_step' in params else None,
+        'from_date': None,
+        'to_date': None,
+        'stride': int(params.get('stride', 1)),
+    }
+    if query['stride'] < 1:
+        raise ValueError("The stride must be at least 1")
+    # Dates are stored as "YYYY-MM-DD HH:MM:SS", so they compare as strings
+    if 'from_date' in params:
+        query['from_date'] = datetime.strptime(params['from_date'], '%Y-%m-%d').strftime('%Y-%m-%d')
+    if 'to_date' in params:
+        query['to_date'] = (datetime.strptime(params['to_date'], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    return query
 
-from django.http import StreamingHttpResponse
-import json
 
 def get_simulation_data(request):
+    """
+    Stream the results of a simulation as NDJSON.
+
+    The stream starts with one "iteration" record per iteration, followed by one
+    "output" record per recorded step (referring to its iteration by id), so
+    the server never holds more than a chunk of outputs, however long the run.
+    The query parameters of ``parse_data_query`` select the values, steps and
+    iterations; columns that are not selected are not read from the database.
+    """
     simulation_name = request.GET.get('name', None)
     
     if not simulation_name:
         return JsonResponse({'error': 'No simulation name provided'}, status=400)
+    try:
+        query = parse_data_query(request.GET)
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    scalars = [name for name in query['fields'] if name in DataModelOutput.SCALARS]
+    maps = tuple(name for name in query['fields'] if name in DataModelOutput.MAPS)
     
     def data_generator():
-        iterations = SimulationIteration.objects.filter(input__simName=simulation_name).order_by('iteration_index')
+        iterations = (
+            SimulationIteration.objects.filter(input__simName=simulation_name)
+            .order_by('iteration_index')
+            .prefetch_related('sweep_points')
+        )
+        if query['iterations'] is not None:
+            iterations = iterations.filter(iteration_index__in=query['iterations'])
+        iterations = list(iterations)
         for iteration in iterations:
-            iteration_data = {
+            yield json.dumps({
+                "type": "iteration",
+                "id": iteration.id,
                 "iteration_index": iteration.iteration_index,
                 "param_value": iteration.param_value,
-                "outputs": [
-                    {
-                        "date": output.date,
-                        "yield": output.yield_value,
-                        "growth": output.growth,
-                        "water": output.water,
-                        "overlap": output.overlap,
-                        "map": output.map,
-                        "weed": output.weed,
-                        "time_needed": output.time_needed,
-                        "profit": output.profit,
-                        "rain": output.rain,
-                        "temperature": output.temperature,
-                        "num_plants": output.num_plants,
-                    }
-                    for output in DataModelOutput.objects.filter(iteration=iteration).order_by('date')
-                ]
-            }
-            yield json.dumps(iteration_data) + '\n'  # Füge eine neue Zeile hinzu
+                "parameters": iteration.get_parameters(),
+                "setup_time": iteration.setup_time,
+                "area": iteration.area,
+            }) + '\n'
+
+        # The iterations found in the result cache send the outputs they link to
+        linked = {}
+        for iteration in iterations:
+            linked.setdefault(iteration.result_id, []).append(iteration.id)
+
+        # One query for the outputs of all iterations, read in chunks along the (iteration, step) index
+        outputs = DataModelOutput.objects.filter(
+            iteration_id__in=list(linked), step__gte=query['from_step'],
+        ).order_by('iteration_id', 'step', 'date')
+        if query['to_step'] is not None:
+            outputs = outputs.filter(step__lte=query['to_step'])
+        if query['from_date'] is not None:
+            outputs = outputs.filter(date__gte=query['from_date'])
+        if query['to_date'] is not None:
+            outputs = outputs.filter(date__lt=query['to_date'])
+        in_stride = lambda step: (step - query['from_step']) % query['stride'] == 0
+        columns = [DataModelOutput.SCALARS[name] for name in scalars]
+
+        if not maps:
+            # Without maps every row is a plain dict of the selected columns
+            if query['stride'] > 1:
+                outputs = outputs.alias(offset=Mod(F('step') - query['from_step'], query['stride'])).filter(offset=0)
+            for row in outputs.values('iteration_id', *columns).iterator(chunk_size=OUTPUT_CHUNK_SIZE):
+                values = {name: row[column] for name, column in zip(scalars, columns)}
+                for iteration_id in linked[row['iteration_id']]:
+                    yield json.dumps({"type": "output", "iteration": iteration_id, **values}) + '\n'
+            return
+
+        # The deltas of the skipped steps are still decoded, only the selected steps are sent
+        snapshot_columns = [column for name in maps for column in DataModelOutput.MAPS[name]]
+        outputs = outputs.only('iteration_id', 'step', 'keyframe', *columns, *snapshot_columns)
+        for _, iteration_outputs in groupby(outputs.iterator(chunk_size=OUTPUT_CHUNK_SIZE), key=attrgetter('iteration_id')):
+            # The maps of the deltas are decoded from the step before, within one iteration
+            for output, arrays in DataModelOutput.iter_maps(iteration_outputs, maps):
+                if not in_stride(output.step):
+                    continue
+                values = {name: getattr(output, column) for name, column in zip(scalars, columns)}
+                values.update((name, None if array is None else array.tolist()) for name, array in arrays.items())
+                for iteration_id in linked[output.iteration_id]:
+                    yield json.dumps({"type": "output", "iteration": iteration_id, **values}) + '\n'
 
     response = StreamingHttpResponse(data_generator(), content_type="application/x-ndjson")
     return response
@@ -89,6 +234,82 @@ def get_simulation_data(request):
 
 
 
+def get_simulation_summary(request):
+    """
+    Send the summary metrics of every iteration of a simulation (see ``IterationSummary``).
+    """
+    simulation_name = request.GET.get('name', None)
+    if not simulation_name:
+        return JsonResponse({'error': 'No simulation name provided'}, status=400)
+    iterations = list(
+        SimulationIteration.objects.filter(input__simName=simulation_name)
+        .order_by('iteration_index')
+        .prefetch_related('sweep_points')
+    )
+    return JsonResponse({'iterations': [
+        {
+            'iteration_index': iteration.iteration_index,
+            'param_value': iteration.param_value,
+            'parameters': iteration.get_parameters(),
+            'area': summary.area,
+            **summary.get_data(),
+        }
+        for iteration, summary in zip(iterations, get_summaries(iterations))
+    ]})
+
+
+def frame_index(request, iteration_id):
+    """
+    List the steps of an iteration whose maps can be loaded as frames.
+    """
+    iteration = get_object_or_404(SimulationIteration, pk=iteration_id)
+    return JsonResponse({'iteration': iteration.id, 'frames': recorded_frames(iteration.result_id)})
+
+
+def frame_etag(request, iteration_id, step):
+    # A recorded step never changes, so the frame only depends on the request
+    params = [request.GET.get(name, '') for name in ('layer', 'format', 'max_size', 'pooling')]
+    return '-'.join([str(iteration_id), str(step), *params])
+
+
+@condition(etag_func=frame_etag)
+def frame(request, iteration_id, step):
+    """
+    Send the crop or weed map of one step.
+
+    Query parameters: ``layer`` ("map" or "weed"), ``format`` ("f32", a
+    little-endian float32 buffer of the rows, or "png", an 8-bit grayscale
+    image scaled to the value in X-Frame-Max), ``max_size`` (the largest
+    number of cells per side, larger maps are pooled) and ``pooling``
+    ("mean" or "max"). The shape is sent in X-Frame-Shape ("rows,columns").
+    """
+    layer = request.GET.get('layer', 'map')
+    frame_format = request.GET.get('format', 'f32')
+    pooling = request.GET.get('pooling', 'mean')
+    if layer not in DataModelOutput.MAPS or frame_format not in ('f32', 'png') or pooling not in ('mean', 'max'):
+        return JsonResponse({'error': 'Invalid layer, format or pooling'}, status=400)
+    try:
+        max_size = int(request.GET['max_size']) if request.GET.get('max_size') else None
+    except ValueError:
+        return JsonResponse({'error': 'Invalid max_size'}, status=400)
+
+    # An iteration found in the result cache sends the frames of the outputs it links to
+    iteration = get_object_or_404(SimulationIteration.objects.only('cached_from'), pk=iteration_id)
+    array = get_frame(iteration.result_id, step, layer)
+    if array is None:
+        return JsonResponse({'error': 'No map recorded for this step'}, status=404)
+    array = resize_frame(array, max_size, pooling)
+    if frame_format == 'png':
+        max_value = float(np.max(array, initial=0))
+        response = HttpResponse(encode_png(array, max_value), content_type='image/png')
+        response['X-Frame-Max'] = max_value
+    else:
+        response = HttpResponse(array.astype('<f4').tobytes(), content_type='application/octet-stream')
+    response['X-Frame-Shape'] = f'{array.shape[0]},{array.shape[1]}'
+    patch_cache_control(response, private=True, max_age=FRAME_MAX_AGE)
+    return response
+
+
 def plant_list(request):
     plants = Plant.objects.all()
     return render(request, 'simapp/plants/list.html', {'plants': plants})
@@ -83,6 +83,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',  # This points to a file in your project directory
+        # Simulation workers and the web tier write at the same time; wait for locks instead of failing
+        'OPTIONS': {'timeout': 30},
     }
 }
 